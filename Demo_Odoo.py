@@ -2,8 +2,17 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from odoo_client import OdooConnector # Asegúrate que el archivo se llame odoo_client.py
-import io
+from odoo_client import get_connector # Asegúrate que el archivo se llame odoo_client.py
+from bi_engine import PipelineBI
+from filter_index import FilterIndex
+from rebalancing import sugerir_traslados
+from transfer_optimizer import plan_traslados
+from snapshot_refresher import SnapshotRefresher
+from sales_cube import SalesCube
+from excel_export import exportar_excel
+from rpc_metrics import METRICAS
+from functools import partial
+import os
 import time
 
 # --- CONFIGURACIÓN DE PÁGINA ---
@@ -21,110 +30,106 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- FUNCIÓN PARA EXPORTAR EXCEL PROFESIONAL ---
-def generar_excel_profesional(df, sheet_name="Reporte"):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-        workbook = writer.book
-        worksheet = writer.sheets[sheet_name]
-        
-        # Formatos
-        header_format = workbook.add_format({
-            'bold': True, 'text_wrap': True, 'valign': 'center', 'align': 'center',
-            'fg_color': '#2e6c80', 'font_color': 'white', 'border': 1
-        })
-        cell_format = workbook.add_format({'border': 1, 'valign': 'center'})
-        money_format = workbook.add_format({'border': 1, 'num_format': '$#,##0.00', 'valign': 'center'})
-        
-        # Aplicar formato de encabezado y ajustar anchos
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            column_len = max(df[value].astype(str).map(len).max(), len(str(value))) + 2
-            worksheet.set_column(col_num, col_num, min(column_len, 30), cell_format)
-            
-            # Formato moneda para columnas específicas
-            if any(palabra in str(value).lower() for palabra in ['costo', 'precio', 'ingreso', 'inversion', 'revenue']):
-                worksheet.set_column(col_num, col_num, min(column_len, 20), money_format)
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-    return output.getvalue()
+def descargar_excel(hojas, label, file_name, key=None):
+    # Motor de memoria constante: el libro se escribe a un archivo temporal fila por fila
+    # (una hoja por DataFrame) y se entrega desde el disco
+    with METRICAS.span('exportar_excel', filas=sum(len(df) for df in hojas.values())):
+        path = exportar_excel(hojas)
+    try:
+        with open(path, 'rb') as f:
+            st.download_button(label=label, data=f, file_name=file_name, mime=XLSX_MIME, key=key)
+    finally:
+        os.remove(path)
 
-# --- EXTRACCIÓN DE DATOS (CACHÉ) ---
-# Se mantiene tu estructura original intacta
-@st.cache_data(ttl=300)
-def load_data():
-    connector = OdooConnector()
-    with st.spinner('Conectando al núcleo de Odoo... Extrayendo Productos...'):
-        df_prod = connector.get_products_detailed()
-    with st.spinner('Analizando Bodegas (Stock Quant)...'):
-        df_stock = connector.get_stock_quants()
-    with st.spinner('Procesando Histórico de Ventas...'):
-        df_sales = connector.get_sales_lines()
-    return df_prod, df_stock, df_sales
+# --- EXTRACCIÓN DE DATOS (REFRESCO EN SEGUNDO PLANO) ---
+# Días recientes de ventas que se releen en cada refresco (ventas nuevas y correcciones)
+DIAS_RELECTURA = 3
 
-# --- MOTOR DE ANÁLISIS (LÓGICA DE NEGOCIO) ---
-def process_data(df_prod, df_stock, df_sales):
-    if df_prod.empty:
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+# get_connector() devuelve el conector compartido del proceso: autentica una sola vez,
+# reutiliza sus conexiones y conserva las marcas de agua de la sincronización incremental
+def extraer_frames(anterior=None):
+    connector = get_connector()
+    # Cubo de ventas producto x día: se arma completo una vez al día; en los demás refrescos
+    # se parte del cubo del snapshot anterior y solo se releen los últimos DIAS_RELECTURA días
+    hoy = pd.Timestamp.today().normalize()
+    cubo = anterior.frames.get('cubo') if anterior is not None else None
+    desde = None
+    if cubo is not None and cubo.armado == hoy and not cubo.vacio:
+        desde = min(cubo.ultimo_dia, hoy) - pd.Timedelta(days=DIAS_RELECTURA)
+    # Los modelos son independientes: se extraen a la vez (el costo es el del más lento).
+    # Tras la primera carga solo viajan los cambios (incremental=True)
+    tareas = {
+        'productos': partial(connector.get_products_detailed, incremental=True),
+        'stock': partial(connector.get_stock_quants, incremental=True),
+        # Ventas se agrega en el servidor (producto x día) en lugar de bajar cada línea
+        'ventas': partial(connector.get_sales_summary, date_bucket='create_date:day', desde=desde),
+        # Salidas a clientes por ubicación: velocidad de venta de cada bodega
+        'demanda': connector.get_location_demand,
+    }
+    # Cada extracción queda cronometrada como span 'extraer:<nombre>' (panel ⏱ Rendimiento)
+    with METRICAS.span('extraer:total'):
+        frames = connector.load_parallel({nombre: METRICAS.envolver(f'extraer:{nombre}', tarea) for nombre, tarea in tareas.items()})
+    with METRICAS.span('cubo_ventas', incremental=desde is not None) as span:
+        cubo = SalesCube.desde_frame(frames['ventas'], armado=hoy) if desde is None else cubo.con_dias(frames['ventas'], desde)
+        span['filas'] = len(cubo)
+    # El análisis recibe las ventas por producto y día completas, reconstruidas desde el cubo
+    frames['cubo'] = cubo
+    frames['ventas'] = cubo.a_frame()
+    return frames
 
-    # 1. Enriquecer Stock
-    if not df_stock.empty:
-        df_stock_full = pd.merge(df_stock, df_prod, on='product_id', how='left')
-        df_stock_full['valor_inventario_costo'] = df_stock_full['stock_real_ubicacion'] * df_stock_full['standard_price']
-        df_stock_full['valor_inventario_venta'] = df_stock_full['stock_real_ubicacion'] * df_stock_full['list_price']
-        df_stock_full['location_name'] = df_stock_full['location_name'].fillna('Desconocida')
-    else:
-        df_stock_full = pd.DataFrame(columns=['product_id', 'stock_real_ubicacion', 'valor_inventario_costo', 'categ_name', 'location_name'])
+# Un solo refrescador por proceso: reconstruye los frames antes de que venzan y los publica
+# de forma atómica; los usuarios leen siempre la última versión buena sin esperar a Odoo.
+# Cada extracción recibe el snapshot vigente para actualizar su cubo de ventas
+@st.cache_resource
+def get_refresher():
+    refresher = SnapshotRefresher(lambda: extraer_frames(refresher.snapshot(timeout=0)))
+    return refresher.start()
 
-    # 2. Resumen de Ventas y Análisis ABC
-    if not df_sales.empty:
-        sales_summary = df_sales.groupby('product_id').agg({'qty_sold': 'sum', 'revenue': 'sum', 'date': 'max'}).reset_index()
-        dias_analisis = max((df_sales['date'].max() - df_sales['date'].min()).days, 1)
-        sales_summary['venta_diaria_promedio'] = sales_summary['qty_sold'] / dias_analisis
-        
-        # Clasificación ABC basada en Ingresos (Regla 80/15/5)
-        sales_summary = sales_summary.sort_values(by='revenue', ascending=False)
-        sales_summary['cum_rev_pct'] = sales_summary['revenue'].cumsum() / sales_summary['revenue'].sum()
-        sales_summary['clasificacion_abc'] = pd.cut(sales_summary['cum_rev_pct'], bins=[0, 0.8, 0.95, 1.1], labels=['A (Alto Impacto)', 'B (Medio)', 'C (Baja Rotación)'])
-    else:
-        sales_summary = pd.DataFrame(columns=['product_id', 'qty_sold', 'revenue', 'venta_diaria_promedio', 'clasificacion_abc'])
-
-    # 3. Master Data
-    df_master = pd.merge(df_prod, sales_summary, on='product_id', how='left')
-    
-    # Rellenar nulos numéricos
-    for col in ['qty_sold', 'revenue', 'venta_diaria_promedio']:
-        df_master[col] = df_master[col].fillna(0)
-        
-    # CORRECCIÓN DEL ERROR: Convertir la columna categórica a texto (object) antes de aplicar fillna
-    if 'clasificacion_abc' in df_master.columns:
-        df_master['clasificacion_abc'] = df_master['clasificacion_abc'].astype(object).fillna('Sin Ventas')
-    else:
-        df_master['clasificacion_abc'] = 'Sin Ventas'
+def load_data():
+    # Autenticación en el hilo del script: si falla, el error se muestra en pantalla
+    get_connector()
+    refresher = get_refresher()
+    snapshot = refresher.snapshot(timeout=0)
+    if snapshot is None:
+        # Arranque en frío: es la única vez que se espera la extracción
+        with st.spinner('Conectando al núcleo de Odoo... Extrayendo Productos, Bodegas y Ventas en paralelo...'):
+            snapshot = refresher.snapshot()
+    if snapshot is None:
+        st.error(f"🚨 No se pudo extraer la información de Odoo: {refresher.last_error}")
+        st.stop()
+    frames = snapshot.frames
+    return frames['productos'], frames['stock'], frames['ventas'], frames['demanda'], snapshot
 
-    # 4. KPIs Avanzados de Inventario
-    df_master['dias_inventario'] = df_master.apply(
-        lambda row: row['stock_total_teorico'] / row['venta_diaria_promedio'] if row['venta_diaria_promedio'] > 0 else 999, axis=1
-    )
-    
-    def clasificar_stock(row):
-        if row['stock_total_teorico'] <= 0: return "🔴 Agotado"
-        if row['dias_inventario'] < 10: return "🟠 Crítico (Reabastecer)"
-        if row['dias_inventario'] > 90: return "🔵 Sobre-stock"
-        return "🟢 Saludable"
-    
-    df_master['estado_inventario'] = df_master.apply(clasificar_stock, axis=1)
-    
-    # Asegurar columnas booleanas para selección en UI
-    df_master['Seleccionar'] = False
+# Motor de análisis por etapas memoizadas, compartido por todas las sesiones del proceso
+@st.cache_resource
+def get_pipeline():
+    return PipelineBI()
 
-    return df_master, df_stock_full, df_sales
+# Análisis e índices de filtros: una vez por snapshot (y compartidos entre sesiones), no en cada
+# interacción. Los frames devueltos son de solo lectura: cada vista filtrada es un frame nuevo
+@st.cache_resource(max_entries=2)
+def preparar_datos(version, as_of, _snapshot):
+    frames = _snapshot.frames
+    if frames['productos'].empty:
+        vacio = pd.DataFrame()
+        return vacio, vacio, vacio, None, None, None, None
+    # Con el cubo de ventas se agrega la etapa de pronóstico de demanda por SKU (Panel de Compras)
+    etapas = get_pipeline().analizar(frames['productos'], frames['stock'], frames['ventas'], version=(version, as_of),
+                                     cubo=frames.get('cubo'))
+    df_master, df_stock_full = etapas['kpis'].valor, etapas['stock'].valor
+    with METRICAS.span('indices_filtros', filas=len(df_master) + len(df_stock_full)):
+        indice_master = FilterIndex(df_master, ['categ_name', 'clasificacion_abc', 'estado_inventario'])
+        indice_stock = FilterIndex(df_stock_full, ['categ_name', 'location_name'])
+    return df_master, df_stock_full, frames['ventas'], indice_master, indice_stock, etapas['kpis'], etapas.get('pronostico')
 
 # ==========================================
 # --- INTERFAZ DE USUARIO (DASHBOARD) ---
 # ==========================================
 try:
-    df_prod, df_stock, df_sales = load_data()
-    df_master_raw, df_stock_full_raw, df_sales_raw = process_data(df_prod, df_stock, df_sales)
+    df_prod, df_stock, df_sales, df_demanda, snapshot = load_data()
+    df_master_raw, df_stock_full_raw, df_sales_raw, indice_master, indice_stock, etapa_kpis, etapa_pronostico = preparar_datos(snapshot.version, snapshot.as_of, snapshot)
     
     if df_master_raw.empty:
         st.error("🚨 Base de datos vacía o error de conexión. Verifica Odoo.")
@@ -135,31 +140,34 @@ try:
         st.title("🎛️ Centro de Mando")
         st.markdown("Filtros globales para todo el sistema.")
         
-        categorias = ['Todas'] + sorted([str(x) for x in df_master_raw['categ_name'].dropna().unique()])
+        categorias = ['Todas'] + sorted([str(x) for x in indice_master.valores('categ_name')])
         filtro_categ = st.selectbox("📌 Filtrar por Categoría", categorias)
         
-        clases_abc = ['Todas'] + list(df_master_raw['clasificacion_abc'].unique())
+        clases_abc = ['Todas'] + indice_master.valores('clasificacion_abc')
         filtro_abc = st.selectbox("📊 Clasificación ABC", clases_abc)
         
         st.markdown("---")
+        st.caption(f"🕒 Datos al {snapshot.as_of:%d/%m/%Y %H:%M:%S} (v{snapshot.version}, extraídos en {snapshot.segundos} s)")
+        if get_refresher().last_error:
+            st.caption("⚠️ Odoo no respondió en el último refresco; se muestra la versión anterior.")
+        if st.button("🔄 Actualizar en segundo plano"):
+            get_refresher().refresh_now()
         st.markdown("⚙️ *Desarrollado por GM-Datovate*")
 
-    # Aplicar filtros globales
-    df_master = df_master_raw.copy()
-    df_stock_full = df_stock_full_raw.copy()
-
-    if filtro_categ != 'Todas':
-        df_master = df_master[df_master['categ_name'] == filtro_categ]
-        if not df_stock_full.empty: 
-            df_stock_full = df_stock_full[df_stock_full['categ_name'] == filtro_categ]
-    
-    if filtro_abc != 'Todas':
-        df_master = df_master[df_master['clasificacion_abc'] == filtro_abc]
+    # Aplicar filtros globales: intersección de posiciones del índice, sin copiar los frames completos
+    filtros_master = {'categ_name': filtro_categ, 'clasificacion_abc': filtro_abc}
+    with METRICAS.span('filtros') as span:
+        df_master = indice_master.vista(**filtros_master)
+        df_stock_full = indice_stock.vista(categ_name=filtro_categ)
+        span['filas'] = len(df_master) + len(df_stock_full)
 
     # --- ENCABEZADO PRINCIPAL ---
     st.title("🚀 Super BI Odoo | Inteligencia de Negocios")
     st.markdown("Análisis avanzado, balanceo algorítmico y sugerencias de compra interactivas.")
     
+    # Hojas del reporte consolidado (se van agregando a medida que cada pestaña las calcula)
+    hojas_reporte = {}
+
     # --- PESTAÑAS ---
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Visión Ejecutiva", "📦 Gestión de Inventario", "🚚 Traslados Inteligentes", "🛒 Panel de Compras"])
 
@@ -207,11 +215,10 @@ try:
     with tab2:
         st.markdown("### 📦 Salud Detallada del Inventario")
         c1, c2, c3 = st.columns(3)
-        f_estado = c1.selectbox("Filtrar por Estado", ["Todos"] + list(df_master['estado_inventario'].unique()))
+        estados = indice_master.valores('estado_inventario', indice_master.posiciones(**filtros_master))
+        f_estado = c1.selectbox("Filtrar por Estado", ["Todos"] + estados)
         
-        df_inv_view = df_master.copy()
-        if f_estado != "Todos":
-            df_inv_view = df_inv_view[df_inv_view['estado_inventario'] == f_estado]
+        df_inv_view = indice_master.vista(**filtros_master, estado_inventario=f_estado)
 
         columnas_ver = ['Seleccionar', 'default_code', 'name', 'categ_name', 'stock_total_teorico', 'venta_diaria_promedio', 'dias_inventario', 'estado_inventario', 'clasificacion_abc']
         
@@ -228,11 +235,12 @@ try:
             use_container_width=True, hide_index=True, key="inv_editor"
         )
 
+        hojas_reporte["Inventario"] = df_inv_view[columnas_ver[1:]]
+
         # Descargar lo seleccionado
         seleccion_inv = edited_inv[edited_inv['Seleccionar'] == True]
         if not seleccion_inv.empty:
-            excel_data = generar_excel_profesional(seleccion_inv.drop(columns=['Seleccionar']), "Inventario_Seleccionado")
-            st.download_button(label="📥 Descargar Filas Seleccionadas (Excel)", data=excel_data, file_name=f"Inventario_Status_{time.strftime('%Y%m%d')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            descargar_excel({"Inventario_Seleccionado": seleccion_inv.drop(columns=['Seleccionar'])}, "📥 Descargar Filas Seleccionadas (Excel)", f"Inventario_Status_{time.strftime('%Y%m%d')}.xlsx")
 
     # === TAB 3: TRASLADOS INTELIGENTES ===
     with tab3:
@@ -242,43 +250,32 @@ try:
         if df_stock_full.empty:
             st.warning("No hay datos de múltiples bodegas.")
         else:
-            bodegas_disp = sorted([str(x) for x in df_stock_full['location_name'].dropna().unique()])
+            bodegas_disp = sorted([str(x) for x in indice_stock.valores('location_name', indice_stock.posiciones(categ_name=filtro_categ))])
             
             c_orig, c_dest = st.columns(2)
             bodega_origen_filtro = c_orig.selectbox("📍 Filtrar Origen (Donde sobra)", ["Todas"] + bodegas_disp)
             bodega_destino_filtro = c_dest.selectbox("🎯 Filtrar Destino (Donde falta)", ["Todas"] + bodegas_disp)
+            origen_sel = None if bodega_origen_filtro == "Todas" else bodega_origen_filtro
+            destino_sel = None if bodega_destino_filtro == "Todas" else bodega_destino_filtro
 
-            stock_pivot = df_stock_full.pivot_table(index=['product_id', 'name', 'default_code'], columns='location_name', values='stock_real_ubicacion', fill_value=0).reset_index()
-            bodegas_cols = [c for c in stock_pivot.columns if c not in ['product_id', 'name', 'default_code']]
-            
-            sugerencias = []
-            for _, row in stock_pivot.iterrows():
-                for b_origen in bodegas_cols:
-                    for b_destino in bodegas_cols:
-                        if b_origen == b_destino: continue
-                        
-                        # Respetar filtros del usuario
-                        if bodega_origen_filtro != "Todas" and b_origen != bodega_origen_filtro: continue
-                        if bodega_destino_filtro != "Todas" and b_destino != bodega_destino_filtro: continue
-
-                        q_origen = row[b_origen]
-                        q_destino = row[b_destino]
-                        
-                        # ALGORITMO: Sobra en origen (>5), falta en destino (0 o 1)
-                        if q_origen >= 5 and q_destino <= 1:
-                            sugerencias.append({
-                                'Aprobar': False,
-                                'Referencia': row['default_code'],
-                                'Producto': row['name'],
-                                'Bodega Origen': b_origen,
-                                'Bodega Destino': b_destino,
-                                'Stock Origen': q_origen,
-                                'Stock Destino': q_destino,
-                                'Cant. Sugerida (Editar)': int(q_origen * 0.3) # Sugiere mover el 30%
-                            })
+            motor = st.radio("⚙️ Motor de sugerencias", ["📦 Por niveles de stock", "📈 Basado en demanda por bodega"], horizontal=True)
+            if motor == "📈 Basado en demanda por bodega":
+                # Plan global: cada unidad de excedente se asigna a un solo destino
+                c_obj, c_max = st.columns(2)
+                dias_objetivo = c_obj.slider("🎯 Cobertura objetivo en destino (días)", min_value=7, max_value=90, value=30, step=1)
+                dias_maximos = c_max.slider("📦 Cobertura que conserva el origen (días)", min_value=dias_objetivo, max_value=180, value=max(60, dias_objetivo), step=1)
+                with METRICAS.span('traslados:plan', filas=len(df_stock_full)):
+                    df_sug = plan_traslados(df_stock_full, df_demanda, origen=origen_sel, destino=destino_sel,
+                                            dias_objetivo=dias_objetivo, dias_maximos=dias_maximos)
+            else:
+                with METRICAS.span('traslados:niveles', filas=len(df_stock_full)):
+                    stock_pivot = df_stock_full.pivot_table(index=['product_id', 'name', 'default_code'], columns='location_name', values='stock_real_ubicacion', fill_value=0).reset_index()
+                    bodegas_cols = [c for c in stock_pivot.columns if c not in ['product_id', 'name', 'default_code']]
+                    
+                    # Motor vectorizado: producto x origen x destino sobre el pivot como matriz NumPy
+                    df_sug = sugerir_traslados(stock_pivot, bodegas_cols, origen=origen_sel, destino=destino_sel)
             
-            if sugerencias:
-                df_sug = pd.DataFrame(sugerencias)
+            if not df_sug.empty:
                 st.success(f"✅ Motor encontró {len(df_sug)} oportunidades de balanceo.")
                 
                 # Tabla Editable (Checkboxes y cantidades)
@@ -288,16 +285,17 @@ try:
                         "Aprobar": st.column_config.CheckboxColumn("¿Aprobar?", default=False),
                         "Cant. Sugerida (Editar)": st.column_config.NumberColumn("Cantidad a Mover", min_value=1, step=1)
                     },
-                    disabled=['Referencia', 'Producto', 'Bodega Origen', 'Bodega Destino', 'Stock Origen', 'Stock Destino'],
+                    disabled=[c for c in df_sug.columns if c not in ['Aprobar', 'Cant. Sugerida (Editar)']],
                     use_container_width=True, hide_index=True
                 )
                 
+                hojas_reporte["Traslados"] = edited_transfers
+
                 # Lógica de descarga
                 aprobados_trans = edited_transfers[edited_transfers['Aprobar'] == True]
                 if not aprobados_trans.empty:
                     st.info(f"Tienes {len(aprobados_trans)} traslados aprobados listos para exportar.")
-                    excel_trans = generar_excel_profesional(aprobados_trans.drop(columns=['Aprobar']), "Orden_Traslado")
-                    st.download_button(label="📥 Generar Orden de Traslado (Excel)", data=excel_trans, file_name=f"Traslados_Aprobados_{time.strftime('%Y%m%d')}.xlsx", mime="application/vnd.ms-excel")
+                    descargar_excel({"Orden_Traslado": aprobados_trans.drop(columns=['Aprobar'])}, "📥 Generar Orden de Traslado (Excel)", f"Traslados_Aprobados_{time.strftime('%Y%m%d')}.xlsx")
             else:
                 st.info("👍 No se encontraron desbalances críticos con los filtros seleccionados.")
 
@@ -309,22 +307,22 @@ try:
         col_p1, col_p2 = st.columns(2)
         dias_cobertura = col_p1.slider("🎯 Meta: Días de inventario a cubrir", min_value=15, max_value=120, value=30, step=5)
         solo_abc = col_p2.multiselect("Filtrar por Importancia (ABC)", ['A (Alto Impacto)', 'B (Medio)', 'C (Baja Rotación)'], default=['A (Alto Impacto)', 'B (Medio)'])
+        col_p3, col_p4 = st.columns(2)
+        nivel_servicio = col_p3.select_slider("🛡️ Nivel de servicio (stock de seguridad)", options=[0.80, 0.90, 0.95, 0.98, 0.99], value=0.95, format_func=lambda x: f"{x:.0%}")
+        dias_reposicion = col_p4.number_input("🚚 Días de reposición del proveedor", min_value=1, max_value=90, value=7, step=1)
 
-        df_compras = df_master[df_master['clasificacion_abc'].isin(solo_abc)].copy()
-        
-        # Fórmula: (Venta Diaria * Días Meta) - Stock Actual
-        df_compras['stock_ideal'] = df_compras['venta_diaria_promedio'] * dias_cobertura
-        df_compras['faltante'] = df_compras['stock_ideal'] - df_compras['stock_total_teorico']
-        
-        # Filtrar solo lo que requiere compra y redondear
-        df_compras = df_compras[(df_compras['faltante'] > 0) & (df_compras['venta_diaria_promedio'] > 0)].copy()
-        df_compras['cant_pedir'] = df_compras['faltante'].apply(lambda x: int(round(x, 0)))
+        # Fórmula: (Demanda Pronosticada * Días Meta) + Stock de Seguridad - Stock Actual, memoizada por
+        # parámetros sobre todo el catálogo; luego se restringe a las filas de los filtros globales
+        df_compras = get_pipeline().compras(etapa_kpis, dias_cobertura, solo_abc, etapa_pronostico,
+                                            nivel_servicio=nivel_servicio, dias_reposicion=dias_reposicion)
+        if df_master is not df_master_raw:
+            df_compras = df_compras[df_compras.index.isin(df_master.index)]
         
         if df_compras.empty:
             st.success("🎉 Tu inventario está perfectamente cubierto para los parámetros seleccionados.")
         else:
             # Preparar dataframe para edición
-            df_compras_ui = df_compras[['default_code', 'name', 'clasificacion_abc', 'stock_total_teorico', 'venta_diaria_promedio', 'standard_price', 'cant_pedir']].copy()
+            df_compras_ui = df_compras[['default_code', 'name', 'clasificacion_abc', 'stock_total_teorico', 'demanda_diaria', 'modelo_pronostico', 'stock_seguridad', 'standard_price', 'cant_pedir']].copy()
             df_compras_ui.insert(0, 'Aprobar Compra', False)
             df_compras_ui['Inversión Fila ($)'] = df_compras_ui['cant_pedir'] * df_compras_ui['standard_price']
             
@@ -335,16 +333,19 @@ try:
                 column_config={
                     "Aprobar Compra": st.column_config.CheckboxColumn("Aprobar", default=False),
                     "cant_pedir": st.column_config.NumberColumn("Cantidad a Pedir (Editar)", min_value=0, step=1),
-                    "venta_diaria_promedio": st.column_config.NumberColumn("Venta/Día", format="%.2f"),
+                    "demanda_diaria": st.column_config.NumberColumn("Demanda/Día (Pronóstico)", format="%.2f"),
+                    "modelo_pronostico": st.column_config.TextColumn("Modelo"),
+                    "stock_seguridad": st.column_config.NumberColumn("Stock Seguridad", format="%.1f"),
                     "standard_price": st.column_config.NumberColumn("Costo Unitario", format="$%.2f"),
                     "Inversión Fila ($)": st.column_config.NumberColumn("Costo Total", format="$%.2f")
                 },
-                disabled=['default_code', 'name', 'clasificacion_abc', 'stock_total_teorico', 'venta_diaria_promedio', 'standard_price', 'Inversión Fila ($)'],
+                disabled=['default_code', 'name', 'clasificacion_abc', 'stock_total_teorico', 'demanda_diaria', 'modelo_pronostico', 'stock_seguridad', 'standard_price', 'Inversión Fila ($)'],
                 use_container_width=True, hide_index=True
             )
             
             # Recalcular la inversión total en tiempo real según las ediciones del usuario
             inversion_total = (edited_purchases['cant_pedir'] * edited_purchases['standard_price']).sum()
+            hojas_reporte["Compras"] = edited_purchases
             st.metric("💰 Proyección Total de la Inversión (En Pantalla)", f"${inversion_total:,.0f}")
             
             aprobados_compra = edited_purchases[edited_purchases['Aprobar Compra'] == True]
@@ -352,8 +353,30 @@ try:
                 inv_aprobada = (aprobados_compra['cant_pedir'] * aprobados_compra['standard_price']).sum()
                 st.success(f"🛒 Has aprobado {len(aprobados_compra)} productos por un total de **${inv_aprobada:,.0f}**.")
                 
-                excel_compras = generar_excel_profesional(aprobados_compra.drop(columns=['Aprobar Compra']), "Sugerencia_Compras")
-                st.download_button(label="📥 Generar Orden de Compra (Excel)", data=excel_compras, file_name=f"Orden_Compra_{time.strftime('%Y%m%d')}.xlsx", mime="application/vnd.ms-excel")
+                descargar_excel({"Sugerencia_Compras": aprobados_compra.drop(columns=['Aprobar Compra'])}, "📥 Generar Orden de Compra (Excel)", f"Orden_Compra_{time.strftime('%Y%m%d')}.xlsx")
+
+    # --- SIDEBAR: REPORTE CONSOLIDADO (inventario + traslados + compras en un solo libro) ---
+    with st.sidebar:
+        if hojas_reporte and st.button("📦 Preparar Reporte Consolidado (Excel)"):
+            with st.spinner("Generando reporte..."):
+                descargar_excel(hojas_reporte, "📥 Descargar Reporte Consolidado", f"Reporte_BI_{time.strftime('%Y%m%d')}.xlsx", key="reporte_consolidado")
+
+    # --- SIDEBAR: PANEL DE RENDIMIENTO (opcional) ---
+    # Llamadas RPC (tiempo, bytes, parseo, filas, errores) y spans del pipeline del proceso
+    with st.sidebar:
+        if st.checkbox("⏱ Rendimiento", value=False):
+            resumen_perf = METRICAS.resumen()
+            if resumen_perf.empty:
+                st.caption("Aún no hay mediciones.")
+            else:
+                rpc = resumen_perf[resumen_perf['tipo'] == 'rpc']
+                st.caption(f"RPC: {int(rpc['llamadas'].sum())} llamadas, {rpc['total_s'].sum():.1f} s, "
+                           f"{rpc['mb_recibidos'].sum():.1f} MB recibidos, {int(rpc['errores'].sum())} errores")
+                st.dataframe(resumen_perf, hide_index=True, use_container_width=True)
+                with st.expander("Últimos eventos"):
+                    st.dataframe(METRICAS.eventos().tail(200).iloc[::-1], hide_index=True, use_container_width=True)
+            if st.button("🧹 Limpiar mediciones"):
+                METRICAS.limpiar()
 
 except Exception as e:
     st.error(f"Ocurrió un error crítico: {e}")
@@ -0,0 +1,252 @@
+"""
+Suite de benchmarks reproducibles del pipeline completo contra el Odoo simulado
+(mock_odoo.py): extracción con los getters de OdooConnector, cubo de ventas producto
+x día, pronóstico de demanda, process_data, motores de traslados y exportación a Excel.
+Por cada paso registra segundos, filas, filas/s y memoria (pico de RSS del proceso
+durante el paso y su aumento sobre el inicio).
+
+El servidor simulado corre en un proceso aparte para que su CPU no se mezcle con la
+del cliente medido. El resultado se guarda en JSON; con --baseline se compara contra
+una corrida anterior y el proceso termina con código 1 si algún paso es más lento
+que la tolerancia (sirve como control de regresiones entre versiones).
+
+Uso:
+    python benchmark_suite.py --escala 10000 100000 --salida bench.json
+    python benchmark_suite.py --escala 100000 --transport jsonrpc --baseline bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import subprocess
+import threading
+import time
+import xmlrpc.client
+
+import numpy as np
+import pandas as pd
+
+import mock_odoo
+from bi_engine import process_data
+from demand_forecast import pronosticar_cubo
+from excel_export import exportar_excel
+from odoo_client import TRANSPORT, OdooConnector
+from rebalancing import sugerir_traslados
+from sales_cube import SalesCube
+from transfer_optimizer import plan_traslados
+
+ESCALAS = [10_000]
+REPETICIONES = 1
+TOLERANCIA = 0.25          # Un paso 25% más lento que la línea base cuenta como regresión
+MINIMO_SEGUNDOS = 0.05     # ...siempre que además pierda más que esto (ruido en pasos muy cortos)
+ESPERA_SERVIDOR = 1800     # Segundos máximos para que el mock genere sus datos (10M filas tarda)
+MUESTREO_MEMORIA = 0.01    # Segundos entre lecturas de RSS
+
+
+class MedidorMemoria:
+    """
+    Pico de memoria residente (RSS) del proceso mientras dura un bloque `with`.
+    Un hilo lee /proc/self/statm cada `intervalo` segundos; fuera de Linux se usa
+    ru_maxrss, que es el pico de toda la vida del proceso.
+    """
+
+    def __init__(self, intervalo=MUESTREO_MEMORIA):
+        self.intervalo = intervalo
+        self.inicio = 0
+        self.pico = 0
+        self._fin = threading.Event()
+        self._hilo = None
+
+    def __enter__(self):
+        self.inicio = self.pico = rss_bytes()
+        self._fin.clear()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+        self.pico = max(self.pico, rss_bytes())
+        return False
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, rss_bytes())
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def medir(pasos, nombre, funcion, filas=len, repeticiones=REPETICIONES):
+    """Ejecuta `funcion` `repeticiones` veces, guarda en `pasos` la mejor marca y devuelve el último resultado."""
+    mejor = None
+    for _ in range(max(repeticiones, 1)):
+        with MedidorMemoria() as memoria:
+            t0 = time.perf_counter()
+            resultado = funcion()
+            segundos = time.perf_counter() - t0
+        n = filas(resultado) if callable(filas) else filas
+        marca = {
+            'segundos': round(segundos, 4),
+            'filas': int(n),
+            'filas_por_segundo': round(n / segundos, 1) if segundos > 0 else None,
+            'pico_rss_mb': round(memoria.pico / 2**20, 1),
+            'delta_rss_mb': round((memoria.pico - memoria.inicio) / 2**20, 1),
+        }
+        if mejor is None or marca['segundos'] < mejor['segundos']:
+            mejor = marca
+    pasos[nombre] = mejor
+    print(f"  {nombre:<26} {mejor['segundos']:>9.3f} s {mejor['filas']:>11,} filas "
+          f"{mejor['delta_rss_mb']:>8.1f} MB", flush=True)
+    return resultado
+
+
+def iniciar_mock(escala, seed, hoy):
+    """Arranca mock_odoo en otro proceso y espera a que responda; devuelve (proceso, url)."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    proceso = multiprocessing.Process(target=mock_odoo.servir, args=(escala, seed, '127.0.0.1', port, hoy), daemon=True)
+    proceso.start()
+    url = f'http://127.0.0.1:{port}'
+    limite = time.time() + ESPERA_SERVIDOR
+    while time.time() < limite:
+        if not proceso.is_alive():
+            raise RuntimeError(f"El servidor simulado terminó con código {proceso.exitcode}")
+        try:
+            xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/common').version()
+            return proceso, url
+        except OSError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise TimeoutError(f"El servidor simulado no respondió en {ESPERA_SERVIDOR} s")
+
+
+def correr_escala(escala, transport=TRANSPORT, shards=1, repeticiones=REPETICIONES, seed=42, hoy=None):
+    """Corre todos los pasos del pipeline a una escala y devuelve {paso: marca}."""
+    print(f"▶ Escala {escala:,} ({transport}, shards={shards})", flush=True)
+    proceso, url = iniciar_mock(escala, seed, hoy)
+    try:
+        connector = OdooConnector(url, mock_odoo.DB, mock_odoo.USERNAME, mock_odoo.PASSWORD, transport)
+        # Se mide la extracción real: sin caché en disco
+        connector.disk_cache = None
+        pasos = {}
+
+        df_prod = medir(pasos, 'get_products_detailed', lambda: connector.get_products_detailed(shards=shards), repeticiones=repeticiones)
+        df_stock = medir(pasos, 'get_stock_quants', lambda: connector.get_stock_quants(shards=shards), repeticiones=repeticiones)
+        medir(pasos, 'get_sales_lines', lambda: connector.get_sales_lines(shards=shards), repeticiones=repeticiones)
+        df_sales = medir(pasos, 'get_sales_summary', lambda: connector.get_sales_summary(date_bucket='create_date:day'), repeticiones=repeticiones)
+        cubo = medir(pasos, 'cubo_ventas', lambda: SalesCube.desde_frame(df_sales), repeticiones=repeticiones)
+        medir(pasos, 'velocidades_cubo', cubo.velocidades, repeticiones=repeticiones)
+        ayer = pd.Timestamp(hoy or pd.Timestamp.today()).normalize() - pd.Timedelta(days=1)
+        medir(pasos, 'pronostico_demanda', lambda: pronosticar_cubo(cubo, ayer), repeticiones=repeticiones)
+        df_demanda = medir(pasos, 'get_location_demand', connector.get_location_demand, repeticiones=repeticiones)
+        medir(pasos, 'get_moves', lambda: connector.get_moves(shards=shards), repeticiones=repeticiones)
+
+        filas_entrada = len(df_prod) + len(df_stock) + len(df_sales)
+        df_master, df_stock_full, _ = medir(pasos, 'process_data', lambda: process_data(df_prod, df_stock, df_sales),
+                                            filas=filas_entrada, repeticiones=repeticiones)
+
+        def rebalanceo_stock():
+            # Igual que la pestaña de traslados: pivot producto x bodega + motor vectorizado
+            pivot = df_stock_full.pivot_table(index=['product_id', 'name', 'default_code'], columns='location_name',
+                                              values='stock_real_ubicacion', fill_value=0).reset_index()
+            bodegas = [c for c in pivot.columns if c not in ['product_id', 'name', 'default_code']]
+            return sugerir_traslados(pivot, bodegas)
+
+        medir(pasos, 'sugerir_traslados', rebalanceo_stock, filas=len(df_stock_full), repeticiones=repeticiones)
+        medir(pasos, 'plan_traslados', lambda: plan_traslados(df_stock_full, df_demanda),
+              filas=len(df_stock_full), repeticiones=repeticiones)
+
+        def excel():
+            os.remove(exportar_excel({'Inventario': df_master.drop(columns=['Seleccionar'], errors='ignore')}))
+
+        medir(pasos, 'exportar_excel', excel, filas=len(df_master), repeticiones=repeticiones)
+        return pasos
+    finally:
+        proceso.terminate()
+        proceso.join()
+
+
+def metadatos(transport, shards, seed, hoy):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'fecha': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'transport': transport,
+        'shards': shards,
+        'page_size': int(os.getenv("ODOO_PAGE_SIZE", "2000")),
+        'seed': seed,
+        'hoy': hoy,
+    }
+
+
+def comparar(actual, base, tolerancia=TOLERANCIA):
+    """
+    Compara dos resultados de la suite por escala y paso.
+    Devuelve una lista de (escala, paso, segundos base, segundos actuales, razón, es_regresión).
+    """
+    filas = []
+    for escala, pasos in actual['escalas'].items():
+        pasos_base = base.get('escalas', {}).get(escala, {})
+        for paso, marca in pasos.items():
+            if paso not in pasos_base:
+                continue
+            antes, ahora = pasos_base[paso]['segundos'], marca['segundos']
+            razon = ahora / antes if antes > 0 else float('inf')
+            regresion = razon > 1 + tolerancia and ahora - antes > MINIMO_SEGUNDOS
+            filas.append((escala, paso, antes, ahora, round(razon, 2), regresion))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=int, nargs='+', default=ESCALAS, help="Filas por modelo transaccional")
+    parser.add_argument('--transport', default=TRANSPORT, choices=['xmlrpc', 'jsonrpc'])
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=REPETICIONES, help="Se guarda la mejor de N corridas por paso")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--hoy', default=None, help="Fecha de referencia de los datos (fija = corridas comparables)")
+    parser.add_argument('--salida', default='benchmark_resultados.json')
+    parser.add_argument('--baseline', default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    resultado = {'meta': metadatos(args.transport, args.shards, args.seed, args.hoy), 'escalas': {}}
+    for escala in args.escala:
+        resultado['escalas'][str(escala)] = correr_escala(escala, args.transport, args.shards, args.repeat, args.seed, args.hoy)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados en {args.salida}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            base = json.load(f)
+        regresiones = 0
+        for escala, paso, antes, ahora, razon, regresion in comparar(resultado, base, args.tolerancia):
+            regresiones += regresion
+            print(f"{'❌' if regresion else '✅'} {escala:>10} {paso:<26} {antes:>9.3f} s -> {ahora:>9.3f} s ({razon}x)")
+        if regresiones:
+            raise SystemExit(f"❌ {regresiones} paso(s) más lentos que la línea base (tolerancia {args.tolerancia:.0%})")
+
+
+if __name__ == '__main__':
+    main()
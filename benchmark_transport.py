@@ -0,0 +1,73 @@
+"""
+Benchmark XML-RPC vs JSON-RPC contra el mismo modelo de Odoo.
+Mide bytes en el cable, bytes descomprimidos, tiempo total y tiempo de parseo
+de un search_read idéntico con cada transporte.
+
+Uso:
+    python benchmark_transport.py --model sale.order.line --limit 5000 --repeat 3
+(usa las variables de entorno URL, DB, USERNAME, PASSWORD)
+"""
+import argparse
+import json
+import os
+import time
+import xmlrpc.client
+
+from jsonrpc_transport import make_proxy
+
+
+def medir_xmlrpc(url, db, uid, password, model, fields, limit):
+    proxy = make_proxy(url, 'object', 'xmlrpc')
+    transport = proxy('transport')
+    t0 = time.perf_counter()
+    data = proxy.execute_kw(db, uid, password, model, 'search_read', [[]], {'fields': fields, 'limit': limit, 'order': 'id'})
+    total = time.perf_counter() - t0
+    proxy('close')()
+    return {
+        'rows': len(data), 'seconds': total, 'parse_seconds': transport.last_parse_seconds,
+        'wire_bytes': transport.last_response_bytes, 'decoded_bytes': transport.last_decoded_bytes,
+    }
+
+
+def medir_jsonrpc(url, db, uid, password, model, fields, limit):
+    proxy = make_proxy(url, 'object', 'jsonrpc')
+    t0 = time.perf_counter()
+    data = proxy.execute_kw(db, uid, password, model, 'search_read', [[]], {'fields': fields, 'limit': limit, 'order': 'id'})
+    total = time.perf_counter() - t0
+    proxy('close')()
+    return {
+        'rows': len(data), 'seconds': total, 'parse_seconds': proxy.last_parse_seconds,
+        'wire_bytes': proxy.last_response_bytes, 'decoded_bytes': proxy.last_decoded_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='sale.order.line')
+    parser.add_argument('--fields', default='', help="Lista separada por comas (vacío = todos)")
+    parser.add_argument('--limit', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    url, db = os.getenv("URL"), os.getenv("DB")
+    username, password = os.getenv("USERNAME"), os.getenv("PASSWORD")
+    uid = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/common').authenticate(db, username, password, {})
+    if not uid:
+        raise SystemExit("❌ La autenticación falló.")
+    fields = [f for f in args.fields.split(',') if f]
+
+    resultados = {'model': args.model, 'limit': args.limit, 'xmlrpc': [], 'jsonrpc': []}
+    for _ in range(args.repeat):
+        resultados['xmlrpc'].append(medir_xmlrpc(url, db, uid, password, args.model, fields, args.limit))
+        resultados['jsonrpc'].append(medir_jsonrpc(url, db, uid, password, args.model, fields, args.limit))
+
+    resumen = {}
+    for transporte in ('xmlrpc', 'jsonrpc'):
+        corridas = resultados[transporte]
+        resumen[transporte] = {k: min(c[k] for c in corridas) for k in ('seconds', 'parse_seconds', 'wire_bytes', 'decoded_bytes')}
+    resultados['best'] = resumen
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from itertools import count
+
+import numpy as np
+import pandas as pd
+
+from demand_forecast import DIAS_REPOSICION, NIVEL_SERVICIO, pronosticar_cubo, stock_seguridad
+from inventory_kpis import calcular_kpis_inventario
+from rpc_metrics import METRICAS
+
+# Resultados de etapas que conserva el grafo (LRU); alcanza para varios snapshots y combinaciones de parámetros
+MAX_ETAPAS = 64
+ETIQUETAS_ABC = ['A (Alto Impacto)', 'B (Medio)', 'C (Baja Rotación)']
+SIN_VENTAS = 'Sin Ventas'
+
+# Fuentes sin versión: cada una recibe una clave nueva y nunca reutiliza un resultado
+_SIN_VERSION = count()
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """Resultado de una etapa del grafo y su clave (nombre + claves de entrada + parámetros)."""
+    clave: str
+    valor: object
+
+
+class PipelineBI:
+    """
+    Motor de análisis como grafo de etapas con nombre y memoizadas:
+    stock enriquecido, resumen de ventas, ABC, maestro, KPIs, pronóstico de demanda y
+    sugerencia de compras.
+    Cada etapa se guarda bajo una clave derivada de las claves de sus entradas y de sus
+    parámetros; los datos de origen se identifican por la versión del snapshot. Así,
+    mover un parámetro (ej. los días de cobertura) solo recalcula la etapa final.
+    Los resultados se comparten (entre sesiones y etapas) y son de solo lectura: cada
+    etapa devuelve un frame nuevo y nunca modifica sus entradas.
+    Cada cálculo (no los aciertos) queda como span 'etapa:<nombre>' en `metricas`.
+    """
+
+    def __init__(self, max_etapas=MAX_ETAPAS, metricas=METRICAS):
+        self.max_etapas = max_etapas
+        self.metricas = metricas
+        self.recalculos = Counter()  # Veces que se calculó cada etapa (el resto fueron aciertos)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fuente(self, nombre, valor, version=None):
+        """Dato de origen; con `version` (ej. la del snapshot) sus etapas se reutilizan entre llamadas."""
+        etiqueta = f"v:{version!r}" if version is not None else f"sin-version:{next(_SIN_VERSION)}"
+        return Etapa(_clave(nombre, [etiqueta], {}), valor)
+
+    def etapa(self, nombre, funcion, *entradas, **params):
+        """Ejecuta `funcion(*valores de entradas, **params)` o devuelve el resultado memoizado."""
+        clave = _clave(nombre, [e.clave for e in entradas], params)
+        with self._lock:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return Etapa(clave, self._cache[clave])
+        with self.metricas.span(f"etapa:{nombre}") as span:
+            valor = funcion(*[e.valor for e in entradas], **params)
+            span['filas'] = len(valor)
+        with self._lock:
+            self.recalculos[nombre] += 1
+            self._cache[clave] = valor
+            while len(self._cache) > self.max_etapas:
+                self._cache.popitem(last=False)
+        return Etapa(clave, valor)
+
+    def analizar(self, df_prod, df_stock, df_sales, version=None, cubo=None, **umbrales):
+        """
+        Etapas del análisis de un snapshot: {'stock', 'ventas', 'abc', 'maestro', 'kpis'} y,
+        si se entrega el cubo de ventas (SalesCube), 'pronostico' hasta el último día completo.
+        `umbrales` se pasan a calcular_kpis_inventario (dias_critico, dias_sobrestock...).
+        """
+        productos = self.fuente('productos', df_prod, version)
+        stock = self.fuente('stock', df_stock, version)
+        ventas = self.fuente('ventas', df_sales, version)
+        etapas = {'stock': self.etapa('stock_enriquecido', enriquecer_stock, stock, productos)}
+        etapas['ventas'] = self.etapa('resumen_ventas', resumir_ventas, ventas)
+        etapas['abc'] = self.etapa('abc', clasificar_abc, etapas['ventas'])
+        etapas['maestro'] = self.etapa('maestro', armar_maestro, productos, etapas['abc'])
+        etapas['kpis'] = self.etapa('kpis', calcular_kpis, etapas['maestro'], **umbrales)
+        if cubo is not None:
+            # El día en curso está incompleto: se pronostica con los días cerrados (cambia una vez al día)
+            hasta = (pd.Timestamp.today().normalize() - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            etapas['pronostico'] = self.etapa('pronostico', pronosticar_cubo, self.fuente('cubo', cubo, version), hasta=hasta)
+        return etapas
+
+    def compras(self, kpis, dias_cobertura, solo_abc, pronostico=None,
+                nivel_servicio=NIVEL_SERVICIO, dias_reposicion=DIAS_REPOSICION):
+        """
+        Sugerencia de compras sobre la etapa de KPIs y, si se entrega, la de pronóstico
+        (memoizada por días de cobertura, clases ABC, nivel de servicio y días de reposición).
+        """
+        entradas = (kpis,) if pronostico is None else (kpis, pronostico)
+        return self.etapa('compras', sugerir_compras, *entradas, dias_cobertura=dias_cobertura,
+                          solo_abc=tuple(solo_abc), nivel_servicio=nivel_servicio,
+                          dias_reposicion=dias_reposicion).valor
+
+
+def _clave(nombre, entradas, params):
+    texto = repr((nombre, entradas, sorted(params.items())))
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+# --- MOTOR DE ANÁLISIS (LÓGICA DE NEGOCIO) ---
+# Sin Streamlit: lo importan el dashboard y la suite de benchmarks (benchmark_suite.py)
+def process_data(df_prod, df_stock, df_sales):
+    """Análisis completo de una sola vez (sin memoización entre llamadas): maestro, stock enriquecido y ventas."""
+    if df_prod.empty:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    etapas = PipelineBI().analizar(df_prod, df_stock, df_sales)
+    return etapas['kpis'].valor, etapas['stock'].valor, df_sales
+
+
+def enriquecer_stock(df_stock, df_prod):
+    """1. Stock por ubicación con los datos del producto y su valorización."""
+    if df_stock.empty or df_prod.empty:
+        return pd.DataFrame(columns=['product_id', 'stock_real_ubicacion', 'valor_inventario_costo', 'categ_name', 'location_name'])
+    df_stock_full = pd.merge(df_stock, df_prod, on='product_id', how='left')
+    df_stock_full['valor_inventario_costo'] = df_stock_full['stock_real_ubicacion'] * df_stock_full['standard_price']
+    df_stock_full['valor_inventario_venta'] = df_stock_full['stock_real_ubicacion'] * df_stock_full['list_price']
+    df_stock_full['location_name'] = df_stock_full['location_name'].fillna('Desconocida')
+    return df_stock_full
+
+
+def resumir_ventas(df_sales):
+    """2. Ventas por producto y venta diaria promedio en el periodo analizado."""
+    if df_sales.empty:
+        return pd.DataFrame(columns=['product_id', 'qty_sold', 'revenue', 'venta_diaria_promedio'])
+    sales_summary = df_sales.groupby('product_id').agg({'qty_sold': 'sum', 'revenue': 'sum', 'date': 'max'}).reset_index()
+    # Con ventas agregadas por periodo la fecha mínima real viene en 'date_min'
+    fecha_min = df_sales['date_min'].min() if 'date_min' in df_sales.columns else df_sales['date'].min()
+    dias_analisis = max((df_sales['date'].max() - fecha_min).days, 1)
+    sales_summary['venta_diaria_promedio'] = sales_summary['qty_sold'] / dias_analisis
+    return sales_summary
+
+
+def clasificar_abc(sales_summary):
+    """3. Clasificación ABC basada en Ingresos (Regla 80/15/5)."""
+    if sales_summary.empty:
+        return sales_summary.assign(clasificacion_abc=pd.Series(dtype=object))
+    sales_summary = sales_summary.sort_values(by='revenue', ascending=False)
+    sales_summary['cum_rev_pct'] = sales_summary['revenue'].cumsum() / sales_summary['revenue'].sum()
+    sales_summary['clasificacion_abc'] = pd.cut(sales_summary['cum_rev_pct'], bins=[0, 0.8, 0.95, 1.1], labels=ETIQUETAS_ABC)
+    return sales_summary
+
+
+def armar_maestro(df_prod, sales_abc):
+    """4. Master Data: productos con sus ventas y clase ABC (sin ventas -> ceros y 'Sin Ventas')."""
+    df_master = pd.merge(df_prod, sales_abc, on='product_id', how='left')
+
+    # Rellenar nulos numéricos
+    for col in ['qty_sold', 'revenue', 'venta_diaria_promedio']:
+        df_master[col] = df_master[col].fillna(0)
+
+    # CORRECCIÓN DEL ERROR: Convertir la columna categórica a texto (object) antes de aplicar fillna
+    df_master['clasificacion_abc'] = df_master['clasificacion_abc'].astype(object).fillna(SIN_VENTAS)
+    return df_master
+
+
+def calcular_kpis(df_master, **umbrales):
+    """5. KPIs Avanzados de Inventario (motor vectorizado) sobre una copia del maestro."""
+    df_master = calcular_kpis_inventario(df_master.copy(), **umbrales)
+    # Asegurar columnas booleanas para selección en UI
+    df_master['Seleccionar'] = False
+    return df_master
+
+
+def sugerir_compras(df_master, pronostico=None, dias_cobertura=30, solo_abc=tuple(ETIQUETAS_ABC[:2]),
+                    nivel_servicio=NIVEL_SERVICIO, dias_reposicion=DIAS_REPOSICION):
+    """
+    6. Sugerencia de compras: (Demanda Diaria * Días Meta) + Stock de Seguridad - Stock Actual,
+    solo para las clases ABC elegidas y productos con demanda. Con `pronostico` (demand_forecast)
+    la demanda es la pronosticada por SKU y el stock de seguridad cubre su desvío durante la
+    reposición; sin él se usa la venta diaria promedio, sin stock de seguridad.
+    La cantidad a pedir se redondea en NumPy con la misma regla que round() de Python (al par
+    más cercano en los empates). Conserva el índice del maestro para cruzarla con las vistas filtradas.
+    """
+    df_compras = df_master[df_master['clasificacion_abc'].isin(solo_abc)]
+    if pronostico is None:
+        demanda = df_compras['venta_diaria_promedio'].to_numpy(dtype=float)
+        seguridad = np.zeros(len(df_compras))
+        modelo = np.full(len(df_compras), 'promedio', dtype=object)
+    else:
+        # Productos fuera del pronóstico (sin ventas en el cubo): demanda cero
+        pronostico = pronostico.reindex(df_compras['product_id'].to_numpy())
+        demanda = pronostico['demanda_diaria'].fillna(0).to_numpy(dtype=float)
+        seguridad = stock_seguridad(pronostico['desvio_diario'].fillna(0).to_numpy(), dias_reposicion, nivel_servicio)
+        modelo = pronostico['modelo'].fillna(SIN_VENTAS).to_numpy()
+    stock_ideal = demanda * dias_cobertura + seguridad
+    faltante = stock_ideal - df_compras['stock_total_teorico'].to_numpy(dtype=float)
+
+    # Filtrar solo lo que requiere compra y redondear
+    requiere = (faltante > 0) & (demanda > 0)
+    df_compras = df_compras[requiere].copy()
+    df_compras['demanda_diaria'] = demanda[requiere]
+    df_compras['modelo_pronostico'] = modelo[requiere]
+    df_compras['stock_seguridad'] = seguridad[requiere]
+    df_compras['stock_ideal'] = stock_ideal[requiere]
+    df_compras['faltante'] = faltante[requiere]
+    df_compras['cant_pedir'] = np.round(faltante[requiere]).astype(int)
+    return df_compras
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from odoo_client import PAGE_SIZE
+from odoo_records import normalizar_registros, quitar_false
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN DE LA EXPORTACIÓN MASIVA ---
+FORMATOS = ('csv', 'parquet')
+EXPORT_WORKERS = 4
+SPOOL_MAX_BYTES = 32 * 1024 * 1024  # El ZIP vive en memoria hasta este tamaño; luego pasa a disco
+TIPOS_EXCLUIDOS = ('binary', 'one2many')  # Adjuntos pesados y relaciones inversas
+
+# Tipo Arrow de cada tipo de campo de Odoo (Parquet); lo no listado se exporta como texto
+TIPOS_ARROW = {
+    'integer': pa.int64(),
+    'float': pa.float64(),
+    'monetary': pa.float64(),
+    'boolean': pa.bool_(),
+    'many2one': pa.int64(),
+}
+
+
+def exportar_modelos_zip(connector, catalogo, modelos, formato='csv', destino=None,
+                         max_workers=EXPORT_WORKERS, page_size=PAGE_SIZE):
+    """
+    Exporta modelos completos de Odoo a un ZIP (un archivo CSV o Parquet por modelo)
+    más un manifest.json con filas, páginas, tiempos y errores por modelo.
+
+    - Cada modelo se lee página por página (sin límite de filas) y cada página se
+      escribe de inmediato a un archivo temporal: en memoria vive una página por hilo.
+    - Los modelos se leen en paralelo (`max_workers`); al terminar cada uno, su archivo
+      se agrega al ZIP bajo un candado (ZipFile admite un solo escritor).
+    - `destino`: ruta o archivo binario; por defecto un SpooledTemporaryFile que pasa
+      a disco al superar SPOOL_MAX_BYTES.
+    - Se exportan los campos almacenados de `catalogo` (SchemaCatalog) salvo binarios
+      y one2many; los many2one quedan como `<campo>` (id) y `<base>_name`.
+    Devuelve (archivo o ruta del ZIP, manifest).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato!r} (opciones: {', '.join(FORMATOS)})")
+    salida = destino if destino is not None else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    candado = threading.Lock()
+    inicio = time.time()
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        def exportar(modelo):
+            return _exportar_modelo(connector, catalogo, modelo, formato, page_size, zf, candado)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(modelos) or 1))) as pool:
+            resultados = list(pool.map(exportar, modelos))
+
+        manifest = {
+            'db': connector.db,
+            'formato': formato,
+            'generado': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'segundos': round(time.time() - inicio, 2),
+            'filas': sum(r['filas'] for r in resultados),
+            'errores': sum(1 for r in resultados if r['error']),
+            'modelos': resultados,
+        }
+        zf.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    if hasattr(salida, 'seek'):
+        salida.seek(0)
+    return salida, manifest
+
+
+def _exportar_modelo(connector, catalogo, modelo, formato, page_size, zf, candado):
+    """Lee un modelo por páginas a un archivo temporal y lo agrega al ZIP. Nunca levanta: el error va al manifest."""
+    resultado = {'modelo': modelo, 'archivo': None, 'filas': 0, 'paginas': 0, 'segundos': 0.0, 'error': None}
+    inicio = time.time()
+    fd, tmp = tempfile.mkstemp(suffix=f'.{formato}', prefix='export_')
+    os.close(fd)
+    try:
+        meta = {campo: props for campo, props in catalogo.fields(modelo).items()
+                if props.get('store', True) and props.get('type') not in TIPOS_EXCLUIDOS}
+        many2one = {campo: props.get('relation') for campo, props in meta.items() if props.get('type') == 'many2one'}
+        campos = sorted(meta)
+        escritor = _EscritorParquet(tmp, meta) if formato == 'parquet' else _EscritorCsv(tmp)
+        try:
+            for page in connector.search_read_pages(modelo, [], campos, page_size):
+                df = pd.DataFrame(normalizar_registros(page, many2one, connector.nombres))
+                escritor.escribir(_limpiar_pagina(df, meta))
+                resultado['filas'] += len(page)
+                resultado['paginas'] += 1
+        finally:
+            escritor.cerrar()
+        resultado['archivo'] = f"{modelo.replace('.', '_')}.{formato}"
+        with candado:
+            zf.write(tmp, resultado['archivo'])
+    except Exception as e:
+        logger.warning("Exportación de %s falló: %s", modelo, e)
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        os.remove(tmp)
+        resultado['segundos'] = round(time.time() - inicio, 2)
+    return resultado
+
+
+def _limpiar_pagina(df, meta):
+    """False -> nulo en campos no booleanos y listas (many2many, etc.) -> texto JSON."""
+    for columna in df.columns:
+        tipo = meta.get(columna, {}).get('type')
+        serie = df[columna]
+        if tipo == 'boolean' or serie.dtype != object:
+            continue
+        serie = quitar_false(serie)
+        tipos = serie.map(type)
+        if tipos.eq(list).any():
+            serie = serie.mask(tipos.eq(list), serie[tipos.eq(list)].map(json.dumps))
+        df[columna] = serie
+    return df
+
+
+class _EscritorCsv:
+    """CSV incremental: encabezado con la primera página, el resto se anexa."""
+
+    def __init__(self, path):
+        self._f = open(path, 'w', encoding='utf-8', newline='')
+        self._columnas = None
+
+    def escribir(self, df):
+        if self._columnas is None:
+            self._columnas = list(df.columns)
+            df.to_csv(self._f, index=False)
+        else:
+            df.reindex(columns=self._columnas).to_csv(self._f, index=False, header=False)
+
+    def cerrar(self):
+        self._f.close()
+
+
+class _EscritorParquet:
+    """
+    Parquet incremental (un row group por página). El esquema sale de los tipos de
+    fields_get y no de la primera página, así una columna vacía al inicio no fija un tipo nulo.
+    """
+
+    def __init__(self, path, meta):
+        self._path = path
+        self._meta = meta
+        self._writer = None
+        self._schema = None
+
+    def _esquema(self, columnas):
+        campos = []
+        for columna in columnas:
+            tipo = self._meta.get(columna, {}).get('type')
+            campos.append(pa.field(columna, TIPOS_ARROW.get(tipo, pa.string())))
+        return pa.schema(campos)
+
+    def escribir(self, df):
+        if self._writer is None:
+            self._schema = self._esquema(df.columns)
+            self._writer = pq.ParquetWriter(self._path, self._schema)
+        df = df.reindex(columns=self._schema.names)
+        for campo in self._schema:
+            if pa.types.is_string(campo.type):
+                # StringDtype convierte a texto lo que no lo es y conserva los nulos
+                df[campo.name] = df[campo.name].astype('string')
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            # Modelo vacío: archivo Parquet válido sin filas
+            pq.write_table(pa.table({}), self._path)
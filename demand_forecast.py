@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURACIÓN DEL PRONÓSTICO ---
+PERIODO_DIAS = 7            # Se pronostica por semanas: la venta diaria de un SKU es casi todo ruido
+HISTORIA_PERIODOS = 104     # Dos años: el naïve estacional necesita una temporada completa de historia
+TEMPORADA = 52              # Periodos por temporada (52 semanas = un año)
+HORIZONTE = 4               # Periodos que promedia el naïve estacional (~el mes siguiente del año pasado)
+VALIDACION = 13             # Últimos periodos en que se comparan los modelos (~un trimestre)
+ALFAS_SES = (0.1, 0.2, 0.3, 0.5)  # Grilla de suavizamiento; cada SKU se queda con la de menor error
+ALFA_CROSTON = 0.1
+ADI_INTERMITENTE = 1.32     # Intervalo medio entre demandas desde el que la demanda es intermitente (Syntetos-Boylan)
+NIVEL_SERVICIO = 0.95       # Probabilidad de no quebrar stock durante la reposición
+DIAS_REPOSICION = 7         # Días entre pedir y recibir
+# Procesos para repartir catálogos muy grandes (1 = en el proceso actual)
+PROCESOS = int(os.getenv("ODOO_FORECAST_PROCESSES", "1"))
+MIN_FILAS_PROCESO = 25_000  # Por debajo de esto repartir cuesta más que calcular
+
+SES, CROSTON, ESTACIONAL, SIN_VENTAS = 'ses', 'croston', 'estacional', 'sin_ventas'
+
+
+def pronosticar_cubo(cubo, hasta, periodo_dias=PERIODO_DIAS, historia=HISTORIA_PERIODOS, procesos=PROCESOS):
+    """
+    Pronóstico de demanda de todos los productos del cubo de ventas (SalesCube) con los
+    `historia` periodos de `periodo_dias` días que terminan en `hasta` (un día completo).
+    """
+    hasta = pd.Timestamp(hasta)
+    desde = hasta - pd.Timedelta(days=periodo_dias * historia - 1)
+    matriz = cubo.matriz(desde, hasta, periodo=periodo_dias)
+    return pronosticar(matriz, periodo_dias=periodo_dias, procesos=procesos)
+
+
+def pronosticar(matriz, periodo_dias=PERIODO_DIAS, temporada=TEMPORADA, horizonte=HORIZONTE,
+                validacion=VALIDACION, procesos=PROCESOS):
+    """
+    Ajusta los modelos a todos los SKU a la vez sobre una matriz producto x periodo (filas =
+    productos, columnas = periodos en orden; ej. SalesCube.matriz) y elige uno por SKU:
+    - Suavizamiento exponencial simple (SES), con el alfa de la grilla de menor error.
+    - Croston (corrección SBA) si la demanda es intermitente (intervalo medio > ADI_INTERMITENTE).
+    - Naïve estacional (lo vendido un año antes) si hay historia y su error en los últimos
+      `validacion` periodos es menor que el del modelo anterior.
+    Cada serie empieza en su primera venta (los ceros previos no son demanda). El desvío es
+    el error cuadrático medio a un paso del modelo elegido en la validación.
+    Devuelve, por producto: modelo, demanda_periodo, demanda_diaria, desvio_diario, alfa, adi, mae.
+    Con `procesos` > 1 las filas se reparten en bloques entre procesos.
+    """
+    valores = matriz.to_numpy(dtype=float)
+    params = (temporada, horizonte, validacion)
+    bloques = min(procesos, len(valores) // MIN_FILAS_PROCESO)
+    if bloques > 1:
+        with ProcessPoolExecutor(max_workers=bloques) as executor:
+            partes = list(executor.map(_ajustar, np.array_split(valores, bloques), *map(repeat, params)))
+        columnas = {col: np.concatenate([p[col] for p in partes]) for col in partes[0]}
+    else:
+        columnas = _ajustar(valores, *params)
+    df = pd.DataFrame(columnas, index=matriz.index)
+    df.insert(1, 'demanda_diaria', df['demanda_periodo'] / periodo_dias)
+    # Días independientes: la varianza del periodo se reparte en partes iguales
+    df.insert(2, 'desvio_diario', df.pop('desvio_periodo') / np.sqrt(periodo_dias))
+    return df
+
+
+def stock_seguridad(desvio_diario, dias_reposicion=DIAS_REPOSICION, nivel_servicio=NIVEL_SERVICIO):
+    """Stock de seguridad para el tiempo de reposición: z(nivel de servicio) x desvío diario x raíz(días)."""
+    z = NormalDist().inv_cdf(nivel_servicio)
+    return z * np.asarray(desvio_diario, dtype=float) * np.sqrt(dias_reposicion)
+
+
+def _ajustar(y, temporada, horizonte, validacion):
+    """Modelos sobre un bloque de filas; cada paso del tiempo es una operación sobre todas las filas."""
+    n_filas, n_periodos = y.shape
+    con_venta = y > 0
+    inicio = np.where(con_venta.any(axis=1), con_venta.argmax(axis=1), n_periodos)
+    t = np.arange(n_periodos)
+    # Periodos con pronóstico a un paso (después de la primera venta) y los de validación
+    activo = t[None, :] > inicio[:, None]
+    evalua = activo & (t >= n_periodos - validacion)[None, :]
+    n_eval = evalua.sum(axis=1)
+
+    # SES con toda la grilla de alfas a la vez (filas x alfas)
+    alfas = np.asarray(ALFAS_SES)
+    nivel = np.zeros((n_filas, len(alfas)))
+    sse = np.zeros_like(nivel)
+    abs_ses = np.zeros_like(nivel)
+    sq_ses = np.zeros_like(nivel)
+    # Croston: tamaño de la demanda, intervalo entre demandas y periodos desde la última
+    tamano = np.zeros(n_filas)
+    intervalo = np.ones(n_filas)
+    desde_ultima = np.zeros(n_filas)
+    abs_cro = np.zeros(n_filas)
+    sq_cro = np.zeros(n_filas)
+    for i in range(n_periodos):
+        yi = y[:, i]
+        act, ev, arranca = activo[:, i], evalua[:, i], inicio == i
+        # Máscaras como 0/1: multiplicar evita los temporales de np.where en las matrices
+        act_f, ev_f = act.astype(float), ev.astype(float)
+
+        error = yi[:, None] - nivel
+        cuadrado = error * error
+        sse += cuadrado * act_f[:, None]
+        abs_ses += np.abs(error) * ev_f[:, None]
+        sq_ses += cuadrado * ev_f[:, None]
+        nivel += error * alfas * act_f[:, None]
+        nivel[arranca] = yi[arranca, None]
+
+        error = yi - (1 - ALFA_CROSTON / 2) * tamano / intervalo
+        abs_cro += np.abs(error) * ev_f
+        sq_cro += error * error * ev_f
+        desde_ultima += act_f
+        demanda = act & (yi > 0)
+        tamano = np.where(demanda, tamano + ALFA_CROSTON * (yi - tamano), np.where(arranca, yi, tamano))
+        intervalo = np.where(demanda, intervalo + ALFA_CROSTON * (desde_ultima - intervalo), intervalo)
+        desde_ultima[demanda | arranca] = 0
+
+    filas = np.arange(n_filas)
+    mejor = sse.argmin(axis=1)
+    adi = (n_periodos - inicio) / np.maximum(con_venta.sum(axis=1), 1)
+    intermitente = adi > ADI_INTERMITENTE
+    modelo = np.where(intermitente, CROSTON, SES).astype(object)
+    pronostico = np.where(intermitente, (1 - ALFA_CROSTON / 2) * tamano / intervalo, nivel[filas, mejor])
+    abs_err = np.where(intermitente, abs_cro, abs_ses[filas, mejor])
+    sq_err = np.where(intermitente, sq_cro, sq_ses[filas, mejor])
+
+    # Naïve estacional: solo si el año anterior ya había ventas y cubre toda la validación
+    if n_periodos >= temporada:
+        origen = n_periodos - temporada
+        error = y[:, temporada:] - y[:, :n_periodos - temporada]
+        valido = evalua[:, temporada:] & (t[:n_periodos - temporada][None, :] >= inicio[:, None])
+        abs_est = np.where(valido, np.abs(error), 0).sum(axis=1)
+        estacional = ((origen >= inicio) & (n_eval > 0) & (valido.sum(axis=1) == n_eval) & (abs_est < abs_err))
+        modelo[estacional] = ESTACIONAL
+        pronostico = np.where(estacional, y[:, origen:origen + horizonte].mean(axis=1), pronostico)
+        abs_err = np.where(estacional, abs_est, abs_err)
+        sq_err = np.where(estacional, np.where(valido, error * error, 0).sum(axis=1), sq_err)
+
+    # Sin periodos de validación (series muy cortas): desvío de la demanda desde la primera venta
+    desde_inicio = activo | (t[None, :] == inicio[:, None])
+    cuenta = np.maximum(desde_inicio.sum(axis=1), 1)
+    media = np.where(desde_inicio, y, 0).sum(axis=1) / cuenta
+    desvio_historia = np.sqrt(np.where(desde_inicio, (y - media[:, None]) ** 2, 0).sum(axis=1) / cuenta)
+    con_eval = n_eval > 0
+    desvio = np.where(con_eval, np.sqrt(sq_err / np.maximum(n_eval, 1)), desvio_historia)
+
+    sin_ventas = inicio == n_periodos
+    modelo[sin_ventas] = SIN_VENTAS
+    return {
+        'modelo': modelo,
+        'demanda_periodo': np.where(sin_ventas, 0.0, pronostico),
+        'desvio_periodo': np.where(sin_ventas, 0.0, desvio),
+        'alfa': np.where(modelo == SES, alfas[mejor], np.nan),
+        'adi': np.where(sin_ventas, np.nan, adi),
+        'mae': np.where(con_eval, abs_err / np.maximum(n_eval, 1), np.nan),
+    }
@@ -0,0 +1,119 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# --- PARÁMETROS DEL EXPORTADOR ---
+CHUNK_ROWS = 10_000     # Filas que se convierten a valores Python por bloque
+MUESTRA_ANCHOS = 1_000  # Filas de muestra para estimar el ancho de columnas numéricas
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')  # Día 0 del sistema de fechas de Excel
+ANCHO_MAXIMO = 30
+ANCHO_MAXIMO_MONEDA = 20
+PALABRAS_MONEDA = ('costo', 'precio', 'ingreso', 'inversion', 'revenue')
+
+
+def exportar_excel(hojas, path=None, chunk_rows=CHUNK_ROWS, muestra=MUESTRA_ANCHOS):
+    """
+    Escribe uno o varios DataFrames ({nombre de hoja: df}) en un .xlsx con el formato
+    corporativo (encabezado azul, bordes, moneda) y devuelve la ruta del archivo.
+    Usa el modo constant_memory de xlsxwriter: cada fila se vuelca al disco al pasar a la
+    siguiente, así la memoria no crece con el número de filas. Sin `path` se escribe en
+    un archivo temporal que debe borrar quien lo consuma.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.xlsx', prefix='export_')
+        os.close(fd)
+    # Los textos se escriben tal cual: sin convertir '=...' en fórmulas ni 'http...' en enlaces
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
+    try:
+        header_format = workbook.add_format({
+            'bold': True, 'text_wrap': True, 'valign': 'center', 'align': 'center',
+            'fg_color': '#2e6c80', 'font_color': 'white', 'border': 1
+        })
+        cell_format = workbook.add_format({'border': 1, 'valign': 'center'})
+        money_format = workbook.add_format({'border': 1, 'num_format': '$#,##0.00', 'valign': 'center'})
+        date_format = workbook.add_format({'border': 1, 'num_format': 'yyyy-mm-dd hh:mm', 'valign': 'center'})
+
+        for sheet_name, df in hojas.items():
+            worksheet = workbook.add_worksheet(str(sheet_name)[:31])
+            # Anchos y formatos de columna antes de escribir (las filas no se pueden revisitar)
+            for col_num, (columna, ancho) in enumerate(anchos_columnas(df, muestra).items()):
+                if pd.api.types.is_datetime64_any_dtype(df[columna].dtype):
+                    worksheet.set_column(col_num, col_num, min(ancho, ANCHO_MAXIMO), date_format)
+                elif any(palabra in str(columna).lower() for palabra in PALABRAS_MONEDA):
+                    worksheet.set_column(col_num, col_num, min(ancho, ANCHO_MAXIMO_MONEDA), money_format)
+                else:
+                    worksheet.set_column(col_num, col_num, min(ancho, ANCHO_MAXIMO), cell_format)
+            worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+            for inicio in range(0, len(df), chunk_rows):
+                _escribir_bloque(worksheet, inicio + 1, df.iloc[inicio:inicio + chunk_rows])
+    finally:
+        workbook.close()
+    return path
+
+
+def anchos_columnas(df, muestra=MUESTRA_ANCHOS):
+    """
+    Ancho de cada columna (en caracteres, con 2 de margen) sin copiar la columna a texto:
+    los textos usan str.len vectorizado (o solo las categorías, si es category) y el resto
+    se estima con una muestra de filas repartida en todo el frame.
+    """
+    if len(df) > muestra:
+        filas_muestra = df.iloc[np.linspace(0, len(df) - 1, muestra).astype(int)]
+    else:
+        filas_muestra = df
+    anchos = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            largo = serie.cat.categories.astype(str).str.len().max() if len(serie.cat.categories) else 0
+        elif pd.api.types.is_string_dtype(serie.dtype) and serie.dtype != object:
+            largo = serie.str.len().max()
+        else:
+            largo = filas_muestra[columna].astype(str).str.len().max()
+        largo = 0 if pd.isna(largo) else int(largo)
+        anchos[columna] = max(largo, len(str(columna))) + 2
+    return anchos
+
+
+def _escribir_bloque(worksheet, fila_inicial, bloque):
+    """
+    Escribe un bloque de filas con el método tipado de cada columna (write_number,
+    write_string...), sin pasar por la detección de tipo de write() en cada celda.
+    Las fechas se convierten a número de serie de Excel en forma vectorizada y toman el
+    formato de fecha de su columna; los nulos (NaN/NaT/None) quedan como celda vacía.
+    """
+    columnas = []
+    for col_num, columna in enumerate(bloque.columns):
+        serie = bloque[columna]
+        nulos = serie.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+            serie = serie.dt.tz_localize(None) if serie.dt.tz is not None else serie
+            valores = ((serie - EXCEL_EPOCH) / pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+            escribir = worksheet.write_number
+        elif pd.api.types.is_bool_dtype(serie.dtype):
+            valores = serie.to_numpy(dtype=object)
+            escribir = worksheet.write_boolean
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            valores = serie.to_numpy(dtype=float, na_value=np.nan)
+            escribir = worksheet.write_number
+        else:
+            valores = serie.astype(object).to_numpy()
+            escribir = _write_texto(worksheet)
+        valores = valores.astype(object)
+        valores[nulos] = None
+        columnas.append((col_num, escribir, valores.tolist()))
+
+    for i in range(len(bloque)):
+        fila = fila_inicial + i
+        for col_num, escribir, valores in columnas:
+            valor = valores[i]
+            if valor is not None:
+                escribir(fila, col_num, valor)
+
+
+def _write_texto(worksheet):
+    """write_string con conversión a texto (listas, ids, etc. de columnas object)."""
+    return lambda fila, col, valor: worksheet.write_string(fila, col, valor if isinstance(valor, str) else str(valor))
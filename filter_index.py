@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Valores de los selectores que significan "sin filtro"
+SIN_FILTRO = (None, 'Todas', 'Todos')
+_VACIO = np.array([], dtype=np.intp)
+
+
+class FilterIndex:
+    """
+    Índice invertido de un DataFrame para los filtros del dashboard: por cada columna
+    indexada, valor -> posiciones de fila (np.ndarray ascendente). Se construye una vez
+    por snapshot de datos; en cada interacción el filtrado es una intersección de
+    arreglos de posiciones y solo se materializan las filas que pasan el filtro.
+    El frame indexado no debe modificarse: sin filtros, `vista` lo devuelve tal cual.
+    """
+
+    def __init__(self, df, columnas):
+        self.df = df
+        self._indices = {col: _indexar(df[col]) for col in columnas if col in df.columns}
+
+    def posiciones(self, **filtros):
+        """
+        Posiciones (ascendentes) de las filas que cumplen todos los filtros {columna: valor}.
+        Los valores en SIN_FILTRO se ignoran; sin ningún filtro activo devuelve None.
+        """
+        conjuntos = [self._indices[col]['posiciones'].get(valor, _VACIO)
+                     for col, valor in filtros.items() if valor not in SIN_FILTRO]
+        if not conjuntos:
+            return None
+        # Se parte del conjunto más chico: cada intersección cuesta lo que el menor
+        conjuntos.sort(key=len)
+        resultado = conjuntos[0]
+        for otro in conjuntos[1:]:
+            resultado = np.intersect1d(resultado, otro, assume_unique=True)
+        return resultado
+
+    def vista(self, **filtros):
+        """Filas que cumplen los filtros (mismo orden e índice que una máscara booleana)."""
+        posiciones = self.posiciones(**filtros)
+        if posiciones is None:
+            return self.df
+        return self.df.take(posiciones)
+
+    def valores(self, columna, posiciones=None):
+        """Valores distintos (sin nulos) de la columna, en orden de aparición; opcionalmente solo en `posiciones`."""
+        indice = self._indices[columna]
+        if posiciones is None:
+            return list(indice['posiciones'])
+        codigos, primero = np.unique(indice['codigos'][posiciones], return_index=True)
+        codigos = codigos[np.argsort(primero, kind='stable')]
+        return [indice['valores'][c] for c in codigos.tolist() if c >= 0]
+
+
+def _indexar(serie):
+    """
+    Códigos enteros de la columna (categorías o factorize, -1 = nulo) y, por valor,
+    sus posiciones: un solo argsort estable y cada valor es un tramo (vista) del resultado.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    valores = list(valores)
+    orden = np.argsort(codigos, kind='stable')
+    ordenados = codigos[orden]
+    rango = np.arange(len(valores))
+    inicios = np.searchsorted(ordenados, rango, side='left')
+    fines = np.searchsorted(ordenados, rango, side='right')
+    # Valores presentes, en orden de primera aparición (como Series.unique)
+    presentes = np.flatnonzero(fines > inicios)
+    presentes = presentes[np.argsort(orden[inicios[presentes]], kind='stable')].tolist()
+    return {
+        'codigos': codigos,
+        'valores': valores,
+        'posiciones': {valores[c]: orden[inicios[c]:fines[c]] for c in presentes},
+    }
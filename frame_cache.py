@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from odoo_records import es_false
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN DEL CACHÉ EN DISCO ---
+CACHE_DIR = os.getenv("ODOO_CACHE_DIR", ".odoo_cache")
+CACHE_MAX_BYTES = int(os.getenv("ODOO_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Vigencia (segundos) de cada modelo: el maestro cambia poco, el stock mucho. Solo acota la
+# edad de un arranque en frío: después manda el refresco en segundo plano, y los frames
+# incrementales se ponen al día con su marca de agua apenas se leen del disco
+TTL_POR_MODELO = {
+    'product.product': 3600,
+    'stock.quant': 300,
+    'sale.order.line': 900,
+    'stock.move': 900,
+}
+TTL_DEFAULT = 600
+
+# Se incluye en la clave: si cambia la limpieza de los getters, basta con subirlo
+FORMAT_VERSION = 2
+
+
+class FrameDiskCache:
+    """
+    Caché persistente de DataFrames en formato Arrow IPC (Feather v2, sin compresión).
+    Sobrevive a reinicios y es compartido por todos los workers de Streamlit.
+    La lectura es memory-mapped; la vigencia se controla por modelo (TTL sobre la fecha
+    de escritura) y el tamaño total con expulsión LRU (por fecha de último acceso).
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttls=None, default_ttl=TTL_DEFAULT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(TTL_POR_MODELO if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, db, model, domain, fields, context=None):
+        clave = json.dumps([FORMAT_VERSION, db, model, domain, list(fields), context or {}], sort_keys=True, default=str)
+        digest = hashlib.sha1(clave.encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.directory, f"{model}__{digest}.arrow")
+
+    def get(self, db, model, domain, fields, context=None):
+        """Devuelve el frame guardado si existe y sigue vigente; si no, None."""
+        path = self._path(db, model, domain, fields, context)
+        try:
+            escrito = os.path.getmtime(path)
+        except OSError:
+            return None
+        if time.time() - escrito > self.ttls.get(model, self.default_ttl):
+            return None
+        try:
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            df = table.to_pandas()
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Caché en disco ilegible (%s): %s", path, e)
+            return None
+        # Marca el acceso (atime) para la expulsión LRU sin tocar la fecha de escritura (mtime)
+        os.utime(path, (time.time(), escrito))
+        return df
+
+    def put(self, db, model, domain, fields, df, context=None):
+        """Guarda el frame de forma atómica (archivo temporal + rename) y aplica el límite de tamaño."""
+        path = self._path(db, model, domain, fields, context)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            feather.write_feather(_arrow_safe(df), tmp, compression='uncompressed')
+            os.replace(tmp, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("No se pudo guardar %s en caché de disco: %s", model, e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._evict()
+
+    def _evict(self):
+        """Borra los archivos menos usados hasta quedar por debajo de max_bytes."""
+        archivos = []
+        for nombre in os.listdir(self.directory):
+            if not nombre.endswith('.arrow'):
+                continue
+            path = os.path.join(self.directory, nombre)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            archivos.append((st.st_atime, st.st_size, path))
+        total = sum(size for _, size, _ in archivos)
+        for _, size, path in sorted(archivos):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _arrow_safe(df):
+    """
+    Odoo usa `False` como nulo en campos char/date: en columnas de texto se pasa a None
+    para que Arrow pueda tiparlas. El índice se descarta (los getters usan RangeIndex).
+    """
+    df = df.reset_index(drop=True)
+    for col in df.columns[df.dtypes == object]:
+        serie = df[col]
+        mascara = es_false(serie)
+        if mascara.any() and not mascara.all():
+            df[col] = serie.mask(mascara, None)
+    return df
@@ -0,0 +1,93 @@
+import logging
+
+import pandas as pd
+
+from odoo_records import es_false
+
+logger = logging.getLogger(__name__)
+
+# --- ESQUEMAS COMPACTOS POR MODELO ---
+# Tipos de las columnas que entregan los getters de OdooConnector (solo se aplican a las
+# columnas presentes). Criterios:
+# - 'category' para textos de baja cardinalidad (categorías, bodegas, unidades, estados).
+# - 'int32' para ids que nunca son nulos; 'Int32' (nullable) para many2one opcionales.
+# - 'float32' para cantidades; los montos (precios, costos, subtotales) siguen en float64
+#   porque se multiplican y suman en valorizaciones donde 7 dígitos no alcanzan.
+# - 'datetime64[ns]' para fechas (False de Odoo -> NaT).
+ESQUEMAS = {
+    'product.product': {
+        'product_id': 'int32',
+        'categ_name': 'category',
+        'uom_name': 'category',
+        'x_studio_ref_madre': 'category',
+        'stock_total_teorico': 'float32',
+        'virtual_available': 'float32',
+        'list_price': 'float64',
+        'standard_price': 'float64',
+    },
+    'stock.quant': {
+        'id': 'int32',
+        'product_id': 'Int32',
+        'location_name': 'category',
+        'stock_real_ubicacion': 'float32',
+        'in_date': 'datetime64[ns]',
+    },
+    'sale.order.line': {
+        'product_id': 'Int32',
+        'product_name': 'category',
+        'order_name': 'category',
+        'state': 'category',
+        'qty_sold': 'float32',
+        'qty_delivered': 'float32',
+        'price_unit': 'float64',
+        'revenue': 'float64',
+        'date': 'datetime64[ns]',
+        'date_min': 'datetime64[ns]',
+        'periodo': 'datetime64[ns]',
+        '__count': 'int32',
+    },
+    'stock.move': {
+        'id': 'int32',
+        'product_id': 'Int32',
+        'location_name': 'category',
+        'origen': 'category',
+        'destino': 'category',
+        'qty': 'float32',
+        'qty_salida': 'float32',
+        'venta_diaria': 'float32',
+        'date': 'datetime64[ns]',
+    },
+}
+
+
+def compactar(df, model):
+    """
+    Aplica el esquema compacto del modelo al frame (en el lugar) y registra los bytes ahorrados.
+    El reporte queda también en df.attrs['memoria'] = {'antes', 'despues', 'ahorro'}.
+    """
+    esquema = ESQUEMAS.get(model, {})
+    if df.empty or not esquema:
+        return df
+    antes = int(df.memory_usage(deep=True).sum())
+    for col, tipo in esquema.items():
+        if col not in df.columns:
+            continue
+        if tipo == 'category':
+            serie = df[col]
+            if serie.dtype in (object, bool):
+                # False es el nulo de Odoo en campos de texto
+                serie = serie.mask(es_false(serie))
+            df[col] = serie.astype('category')
+        elif tipo.startswith('datetime64'):
+            df[col] = pd.to_datetime(df[col], errors='coerce').astype(tipo)
+        elif tipo.startswith('float'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(tipo)
+        elif tipo == 'Int32':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(tipo)
+    despues = int(df.memory_usage(deep=True).sum())
+    df.attrs['memoria'] = {'antes': antes, 'despues': despues, 'ahorro': antes - despues}
+    logger.info("%s: %d filas, %.1f MB -> %.1f MB (%.1fx)", model, len(df), antes / 2**20, despues / 2**20,
+                antes / max(despues, 1))
+    return df
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+# --- ESTADOS DE INVENTARIO ---
+ESTADO_AGOTADO = "🔴 Agotado"
+ESTADO_CRITICO = "🟠 Crítico (Reabastecer)"
+ESTADO_SOBRESTOCK = "🔵 Sobre-stock"
+ESTADO_SALUDABLE = "🟢 Saludable"
+ESTADOS_INVENTARIO = [ESTADO_AGOTADO, ESTADO_CRITICO, ESTADO_SOBRESTOCK, ESTADO_SALUDABLE]
+
+# Umbrales por defecto (días de cobertura)
+DIAS_CRITICO = 10
+DIAS_SOBRESTOCK = 90
+DIAS_SIN_VENTA = 999  # Centinela para productos sin rotación
+
+
+def calcular_kpis_inventario(df, dias_critico=DIAS_CRITICO, dias_sobrestock=DIAS_SOBRESTOCK, dias_sin_venta=DIAS_SIN_VENTA):
+    """
+    Motor vectorizado de KPIs de inventario sobre el maestro de productos.
+    Requiere 'stock_total_teorico' y 'venta_diaria_promedio'; agrega:
+      - dias_inventario: stock / venta diaria (o `dias_sin_venta` si no hay rotación)
+      - estado_inventario: categórico con ESTADOS_INVENTARIO
+    Las reglas son las mismas (y en el mismo orden de prioridad) que la versión fila a fila.
+    """
+    stock = df['stock_total_teorico'].to_numpy(dtype=float)
+    venta = df['venta_diaria_promedio'].to_numpy(dtype=float)
+
+    dias = np.full(len(df), float(dias_sin_venta))
+    np.divide(stock, venta, out=dias, where=venta > 0)
+
+    estado = np.select(
+        [stock <= 0, dias < dias_critico, dias > dias_sobrestock],
+        [ESTADO_AGOTADO, ESTADO_CRITICO, ESTADO_SOBRESTOCK],
+        default=ESTADO_SALUDABLE,
+    )
+    df['dias_inventario'] = dias
+    df['estado_inventario'] = pd.Categorical(estado, categories=ESTADOS_INVENTARIO)
+    return df
@@ -0,0 +1,182 @@
+import http.client
+import itertools
+import json
+import time
+import urllib.parse
+import xmlrpc.client
+import zlib
+
+try:
+    # Decodificador JSON rápido (opcional); sin él se usa el json de la librería estándar
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+TRANSPORTS = ('xmlrpc', 'jsonrpc')
+CHUNK_SIZE = 256 * 1024
+
+
+def make_proxy(url, service, transport='xmlrpc'):
+    """Crea un proxy para el servicio `common` u `object` de Odoo con el transporte elegido."""
+    if transport == 'jsonrpc':
+        return JsonRpcProxy(url, service)
+    if transport == 'xmlrpc':
+        medidor = MedidorSafeTransport() if url.startswith('https') else MedidorTransport()
+        return xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/{service}', transport=medidor)
+    raise ValueError(f"Transporte desconocido: {transport!r} (opciones: {', '.join(TRANSPORTS)})")
+
+
+class _MedidorMixin:
+    """
+    Transporte XML-RPC que anota, de la última llamada, los bytes enviados y recibidos
+    (en el cable y ya descomprimidos) y los segundos de parseo del XML.
+    Se obtiene desde el proxy con `proxy('transport')`, igual que en JsonRpcProxy.
+    """
+    last_request_bytes = 0
+    last_response_bytes = 0
+    last_decoded_bytes = 0
+    last_parse_seconds = 0.0
+
+    def send_content(self, connection, request_body):
+        self.last_request_bytes = len(request_body)
+        super().send_content(connection, request_body)
+
+    def getparser(self):
+        # Lo que llega al parser ya está descomprimido
+        parser, unmarshaller = super().getparser()
+        feed = parser.feed
+
+        def feed_contado(data):
+            self.last_decoded_bytes += len(data)
+            feed(data)
+
+        parser.feed = feed_contado
+        return parser, unmarshaller
+
+    def parse_response(self, response):
+        # La lectura y el parseo van intercalados por bloques: se cuenta (y se cronometra) cada lectura
+        leer = response.read
+        leidos, en_red = 0, 0.0
+
+        def read(*args):
+            nonlocal leidos, en_red
+            t0 = time.perf_counter()
+            data = leer(*args)
+            en_red += time.perf_counter() - t0
+            leidos += len(data)
+            return data
+
+        response.read = read
+        self.last_decoded_bytes = 0
+        t0 = time.perf_counter()
+        try:
+            return super().parse_response(response)
+        finally:
+            self.last_response_bytes = leidos
+            self.last_parse_seconds = max(time.perf_counter() - t0 - en_red, 0.0)
+
+
+class MedidorTransport(_MedidorMixin, xmlrpc.client.Transport):
+    pass
+
+
+class MedidorSafeTransport(_MedidorMixin, xmlrpc.client.SafeTransport):
+    pass
+
+
+class JsonRpcProxy:
+    """
+    Cliente del endpoint /jsonrpc de Odoo con la misma interfaz que xmlrpc.client.ServerProxy:
+    `proxy.authenticate(...)`, `proxy.execute_kw(...)`, `proxy('close')()`, `proxy('transport')`.
+    Mantiene una conexión HTTP keep-alive, pide la respuesta comprimida con gzip y la
+    descomprime por bloques a medida que llega. Los errores de Odoo se levantan como
+    xmlrpc.client.Fault para que el manejo de errores no dependa del transporte.
+    Igual que ServerProxy, una instancia no es thread-safe (ver ProxyPool).
+    """
+
+    def __init__(self, url, service, timeout=300):
+        partes = urllib.parse.urlsplit(url)
+        self.service = service
+        self.timeout = timeout
+        self._https = partes.scheme == 'https'
+        self._host = partes.netloc
+        self._path = (partes.path.rstrip('/') or '') + '/jsonrpc'
+        self._conn = None
+        self._ids = itertools.count(1)
+        # Estadísticas de la última llamada (bytes en el cable / descomprimidos, parseo del JSON)
+        self.last_request_bytes = 0
+        self.last_response_bytes = 0
+        self.last_decoded_bytes = 0
+        self.last_parse_seconds = 0.0
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args: self._call(method, args)
+
+    def __call__(self, attr):
+        if attr == 'close':
+            return self.close
+        if attr == 'transport':
+            # Las estadísticas de la última llamada viven en el propio proxy
+            return self
+        raise AttributeError(attr)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = cls(self._host, timeout=self.timeout)
+        return self._conn
+
+    def _call(self, method, args):
+        body = json.dumps({
+            'jsonrpc': '2.0', 'method': 'call', 'id': next(self._ids),
+            'params': {'service': self.service, 'method': method, 'args': list(args)},
+        }).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        self.last_request_bytes = len(body)
+        try:
+            raw = self._post(body, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # El servidor cerró la conexión keep-alive inactiva: se reintenta una vez
+            self.close()
+            raw = self._post(body, headers)
+
+        t0 = time.perf_counter()
+        data = _loads(raw)
+        self.last_parse_seconds = time.perf_counter() - t0
+        if data.get('error'):
+            error = data['error']
+            detalle = error.get('data', {}).get('message') or error.get('message', '')
+            raise xmlrpc.client.Fault(error.get('code', 1), detalle)
+        return data.get('result')
+
+    def _post(self, body, headers):
+        conn = self._connection()
+        conn.request('POST', self._path, body, headers)
+        response = conn.getresponse()
+        gzip_stream = response.getheader('Content-Encoding', '') == 'gzip'
+        decomp = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip_stream else None
+        buffer = bytearray()
+        leidos = 0
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            leidos += len(chunk)
+            buffer += decomp.decompress(chunk) if decomp else chunk
+        if decomp:
+            buffer += decomp.flush()
+        if response.status != 200:
+            self.close()
+            raise xmlrpc.client.ProtocolError(self._host + self._path, response.status, response.reason, dict(response.getheaders()))
+        self.last_response_bytes = leidos
+        self.last_decoded_bytes = len(buffer)
+        return buffer
+
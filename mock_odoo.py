@@ -0,0 +1,563 @@
+"""
+Servidor Odoo simulado para pruebas de carga y benchmarks (sin tocar producción).
+Atiende /xmlrpc/2/common, /xmlrpc/2/object y /jsonrpc con datos sintéticos
+reproducibles (misma semilla = mismos datos) de product.product, stock.quant,
+sale.order.line y stock.move, a la escala que se pida (10k a 10M filas).
+
+Soporta lo que usa OdooConnector: authenticate, version, search_read (offset, limit,
+order), search, search_count, read, fields_get y read_group (lazy=False, agregados
+'campo:sum' y 'alias:max(campo)', agrupación por many2one y por fecha 'campo:day').
+Los dominios admiten '&', '|', '!', los operadores usuales y campos relacionados
+de un nivel ('location_id.usage').
+
+Uso:
+    python mock_odoo.py --escala 100000 --port 8069
+    URL=http://127.0.0.1:8069 DB=mock USERNAME=admin PASSWORD=admin streamlit run Demo_Odoo.py
+"""
+import argparse
+import gzip
+import json
+import threading
+import xmlrpc.client
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer
+from xmlrpc.server import MultiPathXMLRPCServer, SimpleXMLRPCDispatcher, SimpleXMLRPCRequestHandler
+
+import numpy as np
+import pandas as pd
+
+# --- PARÁMETROS DEL SERVIDOR SIMULADO ---
+DB = 'mock'
+USERNAME = 'admin'
+PASSWORD = 'admin'
+UID = 2
+SERVER_VERSION = '17.0'
+ESCALA = 10_000          # Filas de cada modelo transaccional (quants, líneas de venta, movimientos)
+PRODUCTOS_POR_FILA = 10  # Un producto por cada 10 filas transaccionales
+BODEGAS = 8
+CATEGORIAS = 40
+DIAS_HISTORIA = 365
+CACHE_DOMINIOS = 32      # Dominios evaluados que se guardan (las páginas repiten el mismo)
+
+
+@dataclass
+class Columna:
+    """
+    Columna sintética en NumPy. `tipo` es el tipo de Odoo (fields_get).
+    - many2one: `valores` son ids (0 = vacío) del modelo `relation`.
+    - selection / textos repetidos: `valores` son códigos sobre `etiquetas`.
+    - datetime: segundos desde epoch (-1 = vacío).
+    """
+    tipo: str
+    valores: np.ndarray
+    relation: str = None
+    etiquetas: np.ndarray = None
+
+
+class DatosSinteticos:
+    """
+    Genera (una vez por modelo y a pedido) las tablas sintéticas como columnas NumPy.
+    Los ids son la posición + 1, así un id se resuelve sin índices auxiliares.
+    """
+
+    def __init__(self, escala=ESCALA, seed=42, hoy=None, filas=None):
+        self.escala = escala
+        self.seed = seed
+        self.hoy = pd.Timestamp(hoy or pd.Timestamp.today()).normalize()
+        self.filas = dict(filas or {})
+        self._tablas = {}
+        # Reentrante: un generador puede pedir otra tabla (líneas de venta -> precios de productos)
+        self._lock = threading.RLock()
+
+    def tabla(self, modelo):
+        with self._lock:
+            if modelo not in self._tablas:
+                generador = getattr(self, '_gen_' + modelo.replace('.', '_'), None)
+                if generador is None:
+                    raise ValueError(f"Modelo no simulado: {modelo}")
+                # Una semilla por modelo: generar uno no altera los datos de otro
+                rng = np.random.default_rng([self.seed, sum(map(ord, modelo))])
+                self._tablas[modelo] = generador(rng)
+            return self._tablas[modelo]
+
+    def n_filas(self, modelo):
+        return len(next(iter(self.tabla(modelo).values())).valores)
+
+    def _n(self, modelo, defecto):
+        return int(self.filas.get(modelo, defecto))
+
+    def _segundos(self, rng, n, dias):
+        """Fechas uniformes en los últimos `dias` hasta hoy, en segundos desde epoch."""
+        fin = int(self.hoy.timestamp()) + 86_400
+        return fin - rng.integers(1, dias * 86_400, size=n, dtype=np.int64)
+
+    def _n_productos(self):
+        return self._n('product.product', max(self.escala // PRODUCTOS_POR_FILA, 100))
+
+    def _popularidad(self, rng, n):
+        """Productos con demanda de cola larga (Zipf suave): pocos venden mucho."""
+        p = self._n_productos()
+        pesos = 1.0 / np.arange(1, p + 1) ** 0.8
+        orden = rng.permutation(p) + 1
+        return orden[rng.choice(p, size=n, p=pesos / pesos.sum())].astype(np.int32)
+
+    # --- MODELOS DE REFERENCIA ---
+    def _gen_product_category(self, rng):
+        nombres = np.array([f'Todos / Línea {i:02d}' for i in range(1, CATEGORIAS + 1)], dtype=object)
+        return {'name': Columna('char', nombres)}
+
+    def _gen_uom_uom(self, rng):
+        return {'name': Columna('char', np.array(['Unidades', 'kg', 'm', 'Caja x 12'], dtype=object))}
+
+    def _gen_stock_location(self, rng):
+        nombres = [f'BOD{i:02d}/Stock' for i in range(1, BODEGAS + 1)] + ['Partners/Customers', 'Partners/Vendors']
+        usos = np.array([0] * BODEGAS + [1, 2], dtype=np.int8)
+        return {
+            'name': Columna('char', np.array(nombres, dtype=object)),
+            'usage': Columna('selection', usos, etiquetas=np.array(['internal', 'customer', 'supplier'], dtype=object)),
+        }
+
+    def _gen_sale_order(self, rng):
+        n = max(self._n('sale.order.line', self.escala) // 4, 1)
+        return {'name': Columna('char', np.array([f'S{i:07d}' for i in range(1, n + 1)], dtype=object))}
+
+    # --- MODELOS TRANSACCIONALES ---
+    def _gen_product_product(self, rng):
+        n = self._n_productos()
+        codigos = np.arange(1, n + 1)
+        costo = np.round(rng.lognormal(3.0, 1.0, n), 2)
+        madres = rng.integers(1, max(n // 5, 2), size=n)
+        return {
+            'name': Columna('char', np.array([f'Producto {i:07d}' for i in codigos], dtype=object)),
+            'default_code': Columna('char', np.array([f'REF-{i:07d}' for i in codigos], dtype=object)),
+            'categ_id': Columna('many2one', rng.integers(1, CATEGORIAS + 1, size=n, dtype=np.int32), 'product.category'),
+            'list_price': Columna('float', np.round(costo * rng.uniform(1.15, 1.9, n), 2)),
+            'standard_price': Columna('float', costo),
+            'qty_available': Columna('float', rng.poisson(40, n).astype(np.float64)),
+            'virtual_available': Columna('float', rng.poisson(45, n).astype(np.float64)),
+            'uom_id': Columna('many2one', rng.choice(4, size=n, p=[0.85, 0.05, 0.05, 0.05]).astype(np.int32) + 1, 'uom.uom'),
+            'active': Columna('boolean', rng.random(n) < 0.97),
+            # Campo de Studio: False en la mitad de los productos
+            'x_studio_ref_madre': Columna('char', np.where(rng.random(n) < 0.5, 0, madres),
+                                          etiquetas=np.array([False] + [f'MADRE-{i:06d}' for i in range(1, max(n // 5, 2))], dtype=object)),
+            'write_date': Columna('datetime', self._segundos(rng, n, 30)),
+        }
+
+    def _gen_stock_quant(self, rng):
+        # Un quant por par producto x ubicación (como en Odoo, sin lotes)
+        productos = self._n_productos()
+        n = min(self._n('stock.quant', self.escala), productos * BODEGAS)
+        pares = rng.choice(productos * BODEGAS, size=n, replace=False)
+        pares.sort()
+        return {
+            'product_id': Columna('many2one', (pares // BODEGAS + 1).astype(np.int32), 'product.product'),
+            'location_id': Columna('many2one', (pares % BODEGAS + 1).astype(np.int32), 'stock.location'),
+            'quantity': Columna('float', np.maximum(rng.negative_binomial(2, 0.06, n) - 3, 0).astype(np.float64)),
+            'in_date': Columna('datetime', self._segundos(rng, n, DIAS_HISTORIA)),
+            'write_date': Columna('datetime', self._segundos(rng, n, 30)),
+        }
+
+    def _gen_sale_order_line(self, rng):
+        n = self._n('sale.order.line', self.escala)
+        fechas = np.sort(self._segundos(rng, n, DIAS_HISTORIA))
+        cantidad = rng.geometric(0.35, n).astype(np.float64)
+        productos = self._popularidad(rng, n)
+        precio = self.tabla('product.product')['list_price'].valores[productos - 1]
+        ordenes = self.n_filas('sale.order')
+        return {
+            'order_id': Columna('many2one', np.minimum(np.arange(n) // 4 + 1, ordenes).astype(np.int32), 'sale.order'),
+            'product_id': Columna('many2one', productos, 'product.product'),
+            'product_uom_qty': Columna('float', cantidad),
+            'qty_delivered': Columna('float', np.where(rng.random(n) < 0.9, cantidad, 0.0)),
+            'price_unit': Columna('float', precio),
+            'price_subtotal': Columna('monetary', np.round(cantidad * precio, 2)),
+            'create_date': Columna('datetime', fechas),
+            'state': Columna('selection', rng.choice(4, size=n, p=[0.05, 0.02, 0.73, 0.2]).astype(np.int8),
+                             etiquetas=np.array(['draft', 'cancel', 'sale', 'done'], dtype=object)),
+            'write_date': Columna('datetime', fechas),
+        }
+
+    def _gen_stock_move(self, rng):
+        n = self._n('stock.move', self.escala)
+        fechas = np.sort(self._segundos(rng, n, DIAS_HISTORIA))
+        origen = rng.integers(1, BODEGAS + 1, size=n, dtype=np.int32)
+        # 70% salidas a clientes, 15% entradas de proveedor, 15% traslados internos
+        tipo = rng.choice(3, size=n, p=[0.7, 0.15, 0.15])
+        interna = rng.integers(1, BODEGAS + 1, size=n, dtype=np.int32)
+        location = np.where(tipo == 1, BODEGAS + 2, origen).astype(np.int32)
+        location_dest = np.select([tipo == 0, tipo == 1], [BODEGAS + 1, origen], interna).astype(np.int32)
+        return {
+            'product_id': Columna('many2one', self._popularidad(rng, n), 'product.product'),
+            'location_id': Columna('many2one', location, 'stock.location'),
+            'location_dest_id': Columna('many2one', location_dest, 'stock.location'),
+            'date': Columna('datetime', fechas),
+            'product_uom_qty': Columna('float', rng.geometric(0.3, n).astype(np.float64)),
+            'state': Columna('selection', np.where(rng.random(n) < 0.92, 2, rng.integers(0, 2, n)).astype(np.int8),
+                             etiquetas=np.array(['draft', 'cancel', 'done'], dtype=object)),
+            'write_date': Columna('datetime', fechas),
+        }
+
+
+class MockOdoo:
+    """Implementación de los servicios `common` y `object` sobre DatosSinteticos."""
+
+    def __init__(self, datos=None, db=DB, username=USERNAME, password=PASSWORD):
+        self.datos = datos or DatosSinteticos()
+        self.db = db
+        self.username = username
+        self.password = password
+        self._cache = {}
+        self._orden_cache = []
+        self._lock = threading.Lock()
+
+    # --- SERVICIO common ---
+    def version(self):
+        return {'server_version': SERVER_VERSION, 'server_version_info': [17, 0, 0, 'final', 0, ''], 'protocol_version': 1}
+
+    def authenticate(self, db, login, password, user_agent_env=None):
+        return UID if (db, login, password) == (self.db, self.username, self.password) else False
+
+    def login(self, db, login, password):
+        return self.authenticate(db, login, password)
+
+    # --- SERVICIO object ---
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        if self.authenticate(db, self.username, password) != uid:
+            raise xmlrpc.client.Fault(3, 'Access Denied')
+        metodo = getattr(self, '_rpc_' + method, None)
+        if metodo is None:
+            raise xmlrpc.client.Fault(1, f"Método no simulado: {model}.{method}")
+        kwargs = dict(kwargs or {})
+        kwargs.pop('context', None)
+        return metodo(model, *args, **kwargs)
+
+    def _rpc_fields_get(self, model, allfields=None, attributes=None):
+        campos = {'id': Columna('integer', None), **self.datos.tabla(model)}
+        salida = {}
+        for campo, col in campos.items():
+            if allfields and campo not in allfields:
+                continue
+            props = {'type': col.tipo, 'string': campo.replace('_', ' ').title(), 'store': True,
+                     'required': False, 'readonly': campo in ('id', 'write_date')}
+            if col.relation:
+                props['relation'] = col.relation
+            salida[campo] = {k: v for k, v in props.items() if not attributes or k in attributes}
+        return salida
+
+    def _rpc_search(self, model, domain=None, offset=0, limit=None, order=None, count=False):
+        idx = self._ordenar(model, self._filtrar(model, domain or []), order)
+        if count:
+            return int(len(idx))
+        idx = idx[offset:offset + limit] if limit else idx[offset:]
+        return (idx + 1).tolist()
+
+    def _rpc_search_count(self, model, domain=None, limit=None):
+        return int(len(self._filtrar(model, domain or [])))
+
+    def _rpc_search_read(self, model, domain=None, fields=None, offset=0, limit=None, order=None):
+        idx = self._ordenar(model, self._filtrar(model, domain or []), order)
+        idx = idx[offset:offset + limit] if limit else idx[offset:]
+        return self._registros(model, idx, fields)
+
+    def _rpc_read(self, model, ids, fields=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[(ids >= 1) & (ids <= self.datos.n_filas(model))]
+        return self._registros(model, ids - 1, fields)
+
+    def _rpc_read_group(self, model, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        if isinstance(groupby, str):
+            groupby = [groupby]
+        clave = ('read_group', model, repr(domain), repr(fields), repr(groupby))
+        grupos = self._cacheado(clave, lambda: self._agrupar(model, domain, fields, groupby))
+        return grupos[offset:offset + limit] if limit else grupos[offset:]
+
+    # --- DOMINIOS ---
+    def _cacheado(self, clave, calcular):
+        """LRU pequeño: la paginación repite el mismo dominio en cada página."""
+        with self._lock:
+            if clave in self._cache:
+                return self._cache[clave]
+        valor = calcular()
+        with self._lock:
+            self._cache[clave] = valor
+            self._orden_cache.append(clave)
+            if len(self._orden_cache) > CACHE_DOMINIOS:
+                self._cache.pop(self._orden_cache.pop(0), None)
+        return valor
+
+    def _filtrar(self, model, domain):
+        """Posiciones (ordenadas por id) de las filas que cumplen el dominio."""
+        return self._cacheado(('dominio', model, repr(domain)), lambda: np.flatnonzero(self._mascara(model, domain)))
+
+    def _mascara(self, model, domain):
+        # Notación polaca: se evalúa de derecha a izquierda con una pila; '&' implícito entre hojas sueltas
+        pila = []
+        for termino in reversed(domain):
+            if termino == '&':
+                pila.append(pila.pop() & pila.pop())
+            elif termino == '|':
+                pila.append(pila.pop() | pila.pop())
+            elif termino == '!':
+                pila.append(~pila.pop())
+            else:
+                pila.append(self._hoja(model, *termino))
+        mascara = np.ones(self.datos.n_filas(model), dtype=bool)
+        for parcial in pila:
+            mascara &= parcial
+        return mascara
+
+    def _hoja(self, model, campo, operador, valor):
+        tabla = self.datos.tabla(model)
+        if '.' in campo:
+            # Campo relacionado de un nivel: se evalúa en el modelo destino y se proyecta por id
+            base, resto = campo.split('.', 1)
+            col = tabla[base]
+            destino = np.concatenate([[False], self._hoja(col.relation, resto, operador, valor)])
+            return destino[col.valores]
+        if campo == 'id':
+            valores = np.arange(1, self.datos.n_filas(model) + 1)
+        else:
+            col = tabla[campo]
+            valores = col.valores
+            if col.tipo == 'datetime':
+                valor = _a_segundos(valor)
+            elif col.etiquetas is not None:
+                # Se compara sobre los códigos, sin expandir las etiquetas de todas las filas
+                lista = list(valor) if isinstance(valor, (list, tuple)) else [valor]
+                codigos = [i for i, e in enumerate(col.etiquetas.tolist()) if e in lista]
+                if operador in ('=', 'in'):
+                    return np.isin(valores, codigos)
+                if operador in ('!=', 'not in'):
+                    return ~np.isin(valores, codigos)
+                valores = col.etiquetas[valores]
+            elif col.tipo == 'many2one' and valor is False:
+                valor = 0
+        if operador == '=':
+            return valores == valor
+        if operador == '!=':
+            return valores != valor
+        if operador == '>':
+            return valores > valor
+        if operador == '>=':
+            return valores >= valor
+        if operador == '<':
+            return valores < valor
+        if operador == '<=':
+            return valores <= valor
+        if operador == 'in':
+            return np.isin(valores, list(valor))
+        if operador == 'not in':
+            return ~np.isin(valores, list(valor))
+        if operador in ('ilike', 'like', '=ilike'):
+            patron = str(valor).lower()
+            return np.array([patron in str(v).lower() for v in valores.tolist()], dtype=bool)
+        raise xmlrpc.client.Fault(1, f"Operador no simulado: {operador!r}")
+
+    def _ordenar(self, model, idx, order):
+        """Solo se simula el orden por un campo; las posiciones ya vienen ordenadas por id."""
+        if not order:
+            return idx
+        campo, *direccion = str(order).split(',')[0].split()
+        desc = bool(direccion) and direccion[0].lower() == 'desc'
+        if campo != 'id':
+            valores = self.datos.tabla(model)[campo].valores[idx]
+            idx = idx[np.argsort(-valores if desc else valores, kind='stable')]
+            return idx
+        return idx[::-1] if desc else idx
+
+    # --- RESPUESTAS ---
+    def _registros(self, model, idx, fields):
+        """Lista de dicts estilo search_read (many2one -> [id, nombre] o False)."""
+        tabla = self.datos.tabla(model)
+        campos = ['id'] + [c for c in (fields or tabla) if c != 'id' and c in tabla]
+        columnas = []
+        for campo in campos:
+            columnas.append((idx + 1).tolist() if campo == 'id' else self._valores_salida(tabla[campo], idx))
+        return [dict(zip(campos, fila)) for fila in zip(*columnas)]
+
+    def _valores_salida(self, col, idx):
+        valores = col.valores[idx]
+        if col.tipo == 'many2one':
+            nombres = self.datos.tabla(col.relation)['name'].valores
+            return [[i, nombres[i - 1]] if i else False for i in valores.tolist()]
+        if col.tipo == 'datetime':
+            return _a_texto(valores)
+        if col.etiquetas is not None:
+            return col.etiquetas[valores].tolist()
+        return valores.tolist()
+
+    def _agrupar(self, model, domain, fields, groupby):
+        """read_group completo (todas las páginas) como lista de dicts ordenada por las claves."""
+        tabla = self.datos.tabla(model)
+        idx = self._filtrar(model, domain)
+        df = pd.DataFrame(index=np.arange(len(idx)))
+        claves = []
+        for spec in groupby:
+            campo, _, granularidad = spec.partition(':')
+            valores = tabla[campo].valores[idx]
+            if granularidad:
+                fechas = pd.to_datetime(valores, unit='s')
+                if granularidad == 'day':
+                    df[spec] = fechas.floor('D')
+                else:
+                    periodo = {'week': 'W-SUN', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}[granularidad]
+                    df[spec] = fechas.to_period(periodo).start_time
+            else:
+                df[spec] = valores
+            claves.append(spec)
+
+        agregados = {}
+        for spec in fields:
+            alias, _, resto = spec.partition(':')
+            if not resto:
+                continue
+            funcion, _, campo = resto.partition('(')
+            campo = campo.rstrip(')') or alias
+            df['__' + alias] = tabla[campo].valores[idx]
+            agregados[alias] = ('__' + alias, funcion, tabla[campo].tipo)
+        agg = {alias: (col, {'count': 'size'}.get(funcion, funcion)) for alias, (col, funcion, _) in agregados.items()}
+        grupos = df.groupby(claves, sort=True).agg(__count=(claves[0], 'size'), **agg).reset_index()
+
+        # Cada columna de salida se formatea una vez, vectorizada; el bucle solo arma los dicts
+        columnas = {'__count': grupos['__count'].tolist()}
+        rangos = {}
+        for spec in claves:
+            campo, _, granularidad = spec.partition(':')
+            if granularidad:
+                desde = pd.DatetimeIndex(grupos[spec])
+                hasta = desde + {'day': pd.DateOffset(days=1), 'week': pd.DateOffset(weeks=1), 'month': pd.DateOffset(months=1),
+                                 'quarter': pd.DateOffset(months=3), 'year': pd.DateOffset(years=1)}[granularidad]
+                columnas[spec] = desde.strftime('%d %b %Y').tolist()
+                rangos[spec] = (campo, desde.strftime('%Y-%m-%d %H:%M:%S').tolist(), hasta.strftime('%Y-%m-%d %H:%M:%S').tolist())
+                continue
+            col = tabla[campo]
+            valores = grupos[spec].to_numpy()
+            if col.tipo == 'many2one':
+                nombres = self.datos.tabla(col.relation)['name'].valores
+                columnas[spec] = [[i, nombres[i - 1]] if i else False for i in valores.tolist()]
+            elif col.etiquetas is not None:
+                columnas[spec] = col.etiquetas[valores].tolist()
+            else:
+                columnas[spec] = valores.tolist()
+            rangos[spec] = (campo, valores.tolist(), None)
+        for alias, (_, _, tipo) in agregados.items():
+            columnas[alias] = _a_texto(grupos[alias].to_numpy()) if tipo == 'datetime' else grupos[alias].tolist()
+
+        salida = [dict(zip(columnas, fila)) for fila in zip(*columnas.values())]
+        for i, grupo in enumerate(salida):
+            dominio = list(domain)
+            for spec, (campo, desde, hasta) in rangos.items():
+                if hasta is None:
+                    dominio.append([campo, '=', desde[i]])
+                else:
+                    grupo.setdefault('__range', {})[spec] = {'from': desde[i], 'to': hasta[i]}
+                    dominio += [[campo, '>=', desde[i]], [campo, '<', hasta[i]]]
+            grupo['__domain'] = dominio
+        return salida
+
+
+def _a_segundos(valor):
+    if valor is False or valor is None:
+        return -1
+    return int(pd.Timestamp(valor).timestamp())
+
+
+def _a_texto(segundos):
+    """Segundos desde epoch -> 'YYYY-MM-DD HH:MM:SS' (False si vacío), como los datetime de Odoo."""
+    segundos = np.asarray(segundos, dtype=np.int64)
+    textos = np.datetime_as_string(segundos.astype('datetime64[s]'), unit='s')
+    return [t.replace('T', ' ') if s >= 0 else False for t, s in zip(textos.tolist(), segundos.tolist())]
+
+
+# --- SERVIDOR HTTP ---
+class _Handler(SimpleXMLRPCRequestHandler):
+    """XML-RPC en /xmlrpc/2/<servicio> y JSON-RPC (con gzip) en /jsonrpc, con keep-alive."""
+    protocol_version = 'HTTP/1.1'
+    rpc_paths = ('/xmlrpc/2/common', '/xmlrpc/2/object')
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != '/jsonrpc':
+            return super().do_POST()
+        peticion = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        params = peticion.get('params', {})
+        respuesta = {'jsonrpc': '2.0', 'id': peticion.get('id')}
+        try:
+            dispatcher = self.server.dispatchers['/xmlrpc/2/' + params.get('service', '')]
+            respuesta['result'] = dispatcher.funcs[params['method']](*params.get('args', []))
+        except xmlrpc.client.Fault as e:
+            respuesta['error'] = {'code': 200, 'message': 'Odoo Server Error', 'data': {'message': e.faultString}}
+        except Exception as e:
+            respuesta['error'] = {'code': 200, 'message': 'Odoo Server Error', 'data': {'message': f'{type(e).__name__}: {e}'}}
+        cuerpo = json.dumps(respuesta).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            cuerpo = gzip.compress(cuerpo, compresslevel=1)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+class _Servidor(ThreadingHTTPServer, MultiPathXMLRPCServer):
+    daemon_threads = True
+
+    def __init__(self, direccion):
+        MultiPathXMLRPCServer.__init__(self, direccion, requestHandler=_Handler, logRequests=False,
+                                       allow_none=True, bind_and_activate=True)
+
+
+def crear_servidor(mock=None, host='127.0.0.1', port=0):
+    """
+    Crea (sin arrancar) el servidor HTTP del mock; port=0 toma un puerto libre.
+    La URL queda en `servidor.url`; se arranca con serve_forever() (p. ej. en un hilo).
+    """
+    mock = mock or MockOdoo()
+    servidor = _Servidor((host, port))
+    for servicio, funciones in (('common', ('version', 'authenticate', 'login')), ('object', ('execute_kw',))):
+        dispatcher = SimpleXMLRPCDispatcher(allow_none=True, encoding=None)
+        for nombre in funciones:
+            dispatcher.register_function(getattr(mock, nombre), nombre)
+        servidor.add_dispatcher(f'/xmlrpc/2/{servicio}', dispatcher)
+    servidor.mock = mock
+    servidor.url = f'http://{host}:{servidor.server_address[1]}'
+    return servidor
+
+
+def iniciar_en_hilo(mock=None, host='127.0.0.1', port=0):
+    """Arranca el servidor en un hilo daemon (pruebas en el mismo proceso) y lo devuelve."""
+    servidor = crear_servidor(mock, host, port)
+    threading.Thread(target=servidor.serve_forever, name='mock-odoo', daemon=True).start()
+    return servidor
+
+
+def servir(escala=ESCALA, seed=42, host='127.0.0.1', port=8069, hoy=None, precargar=True):
+    """Sirve el mock en primer plano (lo usan el CLI y benchmark_suite.py en un proceso aparte)."""
+    datos = DatosSinteticos(escala, seed, hoy)
+    if precargar:
+        for modelo in ('product.product', 'stock.quant', 'sale.order.line', 'stock.move'):
+            datos.tabla(modelo)
+    servidor = crear_servidor(MockOdoo(datos), host, port)
+    print(f"Mock Odoo en {servidor.url} (db={DB}, usuario={USERNAME}, clave={PASSWORD}, escala={escala:,})", flush=True)
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=int, default=ESCALA, help="Filas por modelo transaccional")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8069)
+    parser.add_argument('--hoy', default=None, help="Fecha de referencia de los datos (por defecto hoy)")
+    args = parser.parse_args()
+    servir(args.escala, args.seed, args.host, args.port, args.hoy)
+
+
+if __name__ == '__main__':
+    main()
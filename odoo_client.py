@@ -1,35 +1,350 @@
+import copy
+import hashlib
+import http.client
+import queue
+import threading
+import time
 import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
-import streamlit as st
 import os
+from frame_cache import FrameDiskCache
+from frame_schema import compactar
+from jsonrpc_transport import make_proxy
+from odoo_records import NameRegistry, columna_nombre, normalizar_registros, split_many2one
+from rpc_metrics import METRICAS, filas_resultado
+
+# Tamaño de página por defecto para las lecturas paginadas (search_read con offset/limit)
+PAGE_SIZE = int(os.getenv("ODOO_PAGE_SIZE", "2000"))
+# Número de fragmentos (rangos de id) en que se parte un modelo grande para leerlo en paralelo
+SHARDS = int(os.getenv("ODOO_SHARDS", "4"))
+# Caché persistente en disco de los frames extraídos (ODOO_DISK_CACHE=0 para desactivarlo)
+DISK_CACHE = os.getenv("ODOO_DISK_CACHE", "1") != "0"
+# Conexiones keep-alive que se conservan abiertas por conector
+POOL_SIZE = int(os.getenv("ODOO_POOL_SIZE", "8"))
+# Transporte RPC: 'xmlrpc' (por defecto) o 'jsonrpc' (más liviano de parsear)
+TRANSPORT = os.getenv("ODOO_TRANSPORT", "xmlrpc")
+# Marca en la clave del caché en disco de los frames crudos de la sincronización incremental
+CONTEXTO_SYNC = {'__sync__': 'incremental'}
+
+
+class ProxyPool:
+    """
+    Pool de proxies keep-alive (ServerProxy o JsonRpcProxy) hacia el servicio `object`.
+    Los proxies no son thread-safe: cada llamada toma uno libre (o crea uno),
+    lo usa en exclusiva y lo devuelve, dejando abierta su conexión HTTP/1.1
+    para la siguiente llamada. Expone el mismo `execute_kw` que un ServerProxy.
+    Cada llamada queda registrada en `metricas` (tiempo, bytes, parseo, filas, error).
+    """
+
+    def __init__(self, factory, size=POOL_SIZE, metricas=METRICAS):
+        self.factory = factory
+        self.metricas = metricas
+        self._libres = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def proxy(self):
+        try:
+            proxy = self._libres.get_nowait()
+        except queue.Empty:
+            proxy = self.factory()
+        try:
+            yield proxy
+        finally:
+            try:
+                self._libres.put_nowait(proxy)
+            except queue.Full:
+                proxy('close')()
+
+    def execute_kw(self, *args):
+        with self.proxy() as proxy:
+            return medir_rpc(self.metricas, proxy, args[3], args[4], proxy.execute_kw, *args)
+
+
+def medir_rpc(metricas, proxy, modelo, metodo, llamada, *args):
+    """Ejecuta `llamada(*args)` sobre `proxy` y registra el evento 'rpc' (también si falla)."""
+    transporte = proxy('transport')
+    transporte.last_request_bytes = transporte.last_response_bytes = 0
+    transporte.last_parse_seconds = 0.0
+    resultado, error = None, None
+    inicio = time.perf_counter()
+    try:
+        resultado = llamada(*args)
+        return resultado
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        metricas.rpc(
+            modelo, metodo, time.perf_counter() - inicio,
+            bytes_enviados=transporte.last_request_bytes, bytes_recibidos=transporte.last_response_bytes,
+            parse_s=round(transporte.last_parse_seconds, 6), filas=filas_resultado(resultado), error=error,
+        )
+
 
 class OdooConnector:
-    def __init__(self):
+    def __init__(self, url=None, db=None, username=None, password=None, transport=None):
+        """
+        Conecta y autentica contra Odoo. Si faltan credenciales, Odoo no responde o las
+        credenciales son inválidas levanta una excepción: nunca queda un conector a medias.
+        Quien lo usa (dashboard, páginas, CLI de sincronización) decide cómo mostrar el error.
+        """
+        # --- LECTURA DE VARIABLES DE ENTORNO (si no se pasan credenciales explícitas) ---
+        self.url = url or os.getenv("URL")
+        self.db = db or os.getenv("DB")
+        self.username = username or os.getenv("USERNAME")
+        self.password = password or os.getenv("PASSWORD")
+        self.transport = transport or TRANSPORT
+        # Contexto que viaja en cada llamada (ej. compañías permitidas, ver with_company)
+        self.context = {}
+
+        if not self.url or not self.db or not self.username or not self.password:
+            raise ValueError("❌ Faltan credenciales de Odoo (URL, DB, USERNAME, PASSWORD).")
+
+        # Estado de la sincronización incremental: frame crudo + marcas de agua por consulta
+        self._sync_lock = threading.Lock()
+        self._sync_state = {}
+        self.disk_cache = FrameDiskCache() if DISK_CACHE else None
+        self._consultas_en_frio = set()  # Consultas que ya pasaron por el caché en disco (ver _disk_get)
+        # Metadatos many2one por modelo (fields_get) y nombres id -> nombre por modelo relacionado
+        self._relaciones = {}
+        self.nombres = NameRegistry()
+        # Instrumentación de llamadas RPC y construcción de frames (ver rpc_metrics)
+        self.metricas = METRICAS
+
+        # Conexión (XML-RPC o JSON-RPC, misma semántica de execute_kw)
         try:
-            # --- LECTURA DE VARIABLES DE ENTORNO ---
-            self.url = os.getenv("URL")
-            self.db = os.getenv("DB")
-            self.username = os.getenv("USERNAME")
-            self.password = os.getenv("PASSWORD")
-
-            if not self.url or not self.db or not self.username or not self.password:
-                st.error("❌ Error: Faltan credenciales en las variables de entorno.")
-                st.stop()
-
-            # Conexión
-            common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-            self.uid = common.authenticate(self.db, self.username, self.password, {})
-            self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
-            
-            if not self.uid:
-                st.error("❌ Credenciales inválidas en Odoo.")
-                st.stop()
-                
+            common = make_proxy(self.url, 'common', self.transport)
+            self.uid = medir_rpc(self.metricas, common, 'common', 'authenticate', common.authenticate,
+                                 self.db, self.username, self.password, {})
         except Exception as e:
-            st.error(f"❌ Error crítico de conexión: {e}")
-            st.stop()
+            raise ConnectionError(f"❌ Error crítico de conexión con Odoo ({self.url}): {e}") from e
+        if not self.uid:
+            raise PermissionError("❌ Credenciales inválidas en Odoo.")
+        # Los proxies no son thread-safe: las llamadas pasan por un pool de proxies keep-alive
+        self.models = ProxyPool(lambda: make_proxy(self.url, 'object', self.transport), metricas=self.metricas)
+
+    def with_company(self, company_id):
+        """
+        Vista del conector restringida a una compañía (context allowed_company_ids).
+        Comparte autenticación, pool de conexiones y cachés con el conector original.
+        """
+        vista = copy.copy(self)
+        vista.context = {**self.context, 'allowed_company_ids': [company_id]}
+        return vista
+
+    def execute_kw(self, model, method, args, kwargs=None):
+        """execute_kw seguro para hilos: toma un proxy libre del pool de conexiones."""
+        kwargs = dict(kwargs or {})
+        if self.context:
+            kwargs['context'] = {**self.context, **kwargs.get('context', {})}
+        return self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+
+    def many2one_fields(self, model):
+        """{campo: modelo relacionado} de los many2one de `model` (fields_get, una vez por modelo)."""
+        with self._sync_lock:
+            relaciones = self._relaciones.get(model)
+        if relaciones is None:
+            meta = self.execute_kw(model, 'fields_get', [], {'attributes': ['type', 'relation']})
+            relaciones = {campo: p.get('relation') for campo, p in meta.items() if p.get('type') == 'many2one'}
+            with self._sync_lock:
+                self._relaciones[model] = relaciones
+        return relaciones
+
+    def search_read_pages(self, model, domain, fields, page_size=PAGE_SIZE, order='id'):
+        """
+        Generador de páginas de search_read con offset/limit sobre un orden estable (id).
+        Cada página es una lista de diccionarios de como máximo `page_size` registros,
+        así nunca se pide (ni se parsea) una respuesta XML-RPC gigante de una sola vez.
+        """
+        offset = 0
+        while True:
+            page = self.execute_kw(
+                model, 'search_read', [domain],
+                {'fields': fields, 'offset': offset, 'limit': page_size, 'order': order}
+            )
+            if not page:
+                break
+            yield page
+            if len(page) < page_size:
+                break
+            offset += len(page)
+
+    def fetch_frame(self, model, domain, fields, page_size=PAGE_SIZE, shards=1, incremental=False, computados=()):
+        """
+        Construye el DataFrame de forma incremental, página por página.
+        Solo una página de diccionarios crudos vive en memoria a la vez; cada una se
+        normaliza al llegar (los many2one quedan como `<base>_id` + `<base>_name`).
+        Con shards > 1 el modelo se parte en rangos de id que se leen en paralelo.
+        Con incremental=True solo se descargan los registros nuevos o modificados
+        desde la última llamada (ver _fetch_incremental); `computados` son los campos
+        calculados no almacenados (ej. qty_available) que se releen completos en cada llamada.
+        """
+        if incremental:
+            return self._fetch_incremental(model, domain, fields, page_size, shards, computados)
+        if shards > 1:
+            return self._fetch_sharded(model, domain, fields, page_size, shards)
+        many2one = self.many2one_fields(model)
+        frames = []
+        construccion = 0.0
+        for page in self.search_read_pages(model, domain, fields, page_size):
+            inicio = time.perf_counter()
+            frames.append(pd.DataFrame(normalizar_registros(page, many2one, self.nombres)))
+            construccion += time.perf_counter() - inicio
+        # Solo el tiempo de normalizar y armar los frames (la red y el parseo van en los eventos 'rpc')
+        self.metricas.registrar('dataframe', model, construccion, filas=sum(len(f) for f in frames), paginas=len(frames))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _fetch_sharded(self, model, domain, fields, page_size, shards):
+        """Lee un modelo grande en `shards` rangos de id [desde, hasta) en paralelo."""
+        primero = self.execute_kw(model, 'search', [domain], {'limit': 1, 'order': 'id asc'})
+        if not primero:
+            return pd.DataFrame()
+        ultimo = self.execute_kw(model, 'search', [domain], {'limit': 1, 'order': 'id desc'})
+        id_min, id_max = primero[0], ultimo[0] + 1
+        paso = max((id_max - id_min) // shards + 1, 1)
+        rangos = [(desde, min(desde + paso, id_max)) for desde in range(id_min, id_max, paso)]
+
+        def leer_rango(rango):
+            dominio = list(domain) + [['id', '>=', rango[0]], ['id', '<', rango[1]]]
+            return self.fetch_frame(model, dominio, fields, page_size)
+
+        with ThreadPoolExecutor(max_workers=len(rangos)) as pool:
+            frames = [df for df in pool.map(leer_rango, rangos) if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _fetch_incremental(self, model, domain, fields, page_size, shards, computados=()):
+        """
+        Sincronización por marcas de agua (write_date / id) por modelo y consulta.
+        La primera llamada hace la extracción completa; las siguientes solo piden
+        lo nuevo o modificado, lo fusionan por id con el frame guardado y descartan
+        los registros borrados (o que ya no cumplen el dominio) con un `search` de ids.
+        Los campos `computados` no se guardan en la base: cambian sin mover write_date
+        (el stock de un producto cambia con cada movimiento), así que se releen para todos
+        los registros y esa misma lectura da los ids vigentes.
+        Devuelve las mismas columnas que una lectura completa (search_read siempre trae id).
+        """
+        extras = [f for f in ('id', 'write_date') if f not in fields]
+        campos = list(fields) + extras
+        clave = (model, repr(domain), tuple(campos), repr(self.context))
+        with self._sync_lock:
+            estado = self._sync_state.get(clave)
+        if estado is None:
+            # Arranque en frío: se parte del frame de la última sincronización guardado en disco
+            estado = self._estado_en_disco(model, domain, campos)
+
+        if estado is None:
+            df = self.fetch_frame(model, domain, campos, page_size, shards)
+        else:
+            # Nuevos o modificados desde la última marca (>= para no perder cambios del mismo segundo)
+            dominio_delta = ['|', ['write_date', '>=', estado['write_date']], ['id', '>', estado['max_id']]] + list(domain)
+            delta = self.fetch_frame(model, dominio_delta, campos, page_size)
+            if computados:
+                frescos = self.fetch_frame(model, domain, ['id'] + list(computados), page_size, shards)
+                ids_vigentes = frescos['id'] if not frescos.empty else []
+            else:
+                ids_vigentes = self.execute_kw(model, 'search', [domain])
+            df = estado['frame']
+            df = df[df['id'].isin(ids_vigentes)]
+            if not delta.empty:
+                df = df[~df['id'].isin(delta['id'])]
+                df = pd.concat([df, delta], ignore_index=True).sort_values('id', ignore_index=True)
+            if computados and not df.empty:
+                frescos = frescos.set_index('id')
+                df = df.assign(**{campo: df['id'].map(frescos[campo]).to_numpy() for campo in computados})
+
+        with self._sync_lock:
+            if df.empty:
+                self._sync_state.pop(clave, None)
+            else:
+                self._sync_state[clave] = _estado_sync(df)
+        if self.disk_cache is not None and not df.empty:
+            self.disk_cache.put(self.db, model, domain, campos, df, {**self.context, **CONTEXTO_SYNC})
+        return df.drop(columns=[f for f in extras if f != 'id'])
+
+    def _estado_en_disco(self, model, domain, campos):
+        """Estado incremental (frame crudo con id / write_date y su marca de agua) guardado en disco, o None."""
+        if self.disk_cache is None:
+            return None
+        df = self.disk_cache.get(self.db, model, domain, campos, {**self.context, **CONTEXTO_SYNC})
+        if df is None or df.empty:
+            return None
+        return _estado_sync(df)
+
+    def read_group_frame(self, model, domain, fields, groupby, page_size=PAGE_SIZE):
+        """
+        Agregación en el servidor con read_group (lazy=False), paginada por offset/limit.
+        Devuelve un DataFrame con un grupo por fila; los many2one agrupados quedan como id
+        (más su nombre en '<campo sin _id>_name', ver columna_nombre) y cada agrupación por fecha
+        ('create_date:day', ':week', ':month'...) como el inicio del periodo en una
+        columna con el nombre del campo.
+        """
+        many2one = self.many2one_fields(model)
+        frames = []
+        offset = 0
+        while True:
+            grupos = self.execute_kw(
+                model, 'read_group', [domain, fields, groupby],
+                {'offset': offset, 'limit': page_size, 'lazy': False, 'orderby': ', '.join(groupby)}
+            )
+            if not grupos:
+                break
+            df = pd.DataFrame(grupos)
+            for spec in groupby:
+                campo = spec.split(':')[0]
+                if ':' in spec:
+                    df[campo] = pd.to_datetime([_inicio_periodo(g, spec, campo) for g in grupos])
+                    df.drop(columns=[spec], errors='ignore', inplace=True)
+                elif campo in many2one:
+                    nombre = columna_nombre(campo, df.columns)
+                    ids, nombres = split_many2one(df[campo].tolist(), many2one[campo], self.nombres)
+                    df[campo] = ids
+                    df[nombre] = pd.Series(nombres, index=df.index).fillna('')
+            df.drop(columns=['__domain', '__range', '__context', '__fold'], errors='ignore', inplace=True)
+            frames.append(df)
+            if len(grupos) < page_size:
+                break
+            offset += len(grupos)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _disk_get(self, model, domain, fields, incremental=False):
+        """
+        Frame del caché en disco solo en arranque en frío: la primera lectura de cada consulta
+        en este conector. Los refrescos siguientes siempre van a Odoo. Las lecturas incrementales
+        no usan este frame ya procesado: parten del frame crudo que guarda _fetch_incremental
+        y lo ponen al día desde su marca de agua.
+        """
+        if self.disk_cache is None or incremental:
+            return None
+        clave = (model, repr(domain), tuple(fields), repr(self.context))
+        with self._sync_lock:
+            if clave in self._consultas_en_frio:
+                return None
+            self._consultas_en_frio.add(clave)
+        return self.disk_cache.get(self.db, model, domain, fields, self.context)
 
-    def get_products_detailed(self):
+    def _disk_put(self, model, domain, fields, df, incremental=False):
+        if self.disk_cache is not None and not incremental and not df.empty:
+            self.disk_cache.put(self.db, model, domain, fields, df, self.context)
+
+    def load_parallel(self, tareas, max_workers=None):
+        """
+        Ejecuta varias extracciones independientes a la vez, cada una en su propio hilo
+        (y por lo tanto con su propio ServerProxy del pool).
+        `tareas` es un dict {nombre: callable}; devuelve {nombre: resultado}.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or len(tareas)) as pool:
+            futuros = {nombre: pool.submit(tarea) for nombre, tarea in tareas.items()}
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+    def get_products_detailed(self, shards=1, incremental=False):
         """
         Trae el maestro de productos (Variantes) con sus costos, precios y la referencia madre.
         Modelo: product.product
@@ -41,13 +356,16 @@ class OdooConnector:
         ]
         # Filtramos solo activos para no ensuciar el BI
         domain = [['active', '=', True]]
-        data = self.models.execute_kw(self.db, self.uid, self.password, 'product.product', 'search_read', [domain], {'fields': fields, 'limit': 10000})
-        
-        df = pd.DataFrame(data)
+        cached = self._disk_get('product.product', domain, fields, incremental)
+        if cached is not None:
+            return cached
+        # El stock es calculado (no mueve write_date): en modo incremental se relee completo
+        df = self.fetch_frame('product.product', domain, fields, shards=shards, incremental=incremental,
+                              computados=['qty_available', 'virtual_available'])
         if not df.empty:
-            # Limpieza de campos many2one
-            df['categ_name'] = df['categ_id'].apply(lambda x: x[1] if isinstance(x, list) else 'Sin Categoría')
-            df['uom_name'] = df['uom_id'].apply(lambda x: x[1] if isinstance(x, list) else '')
+            # Los many2one ya vienen separados en id / nombre (ver normalizar_registros)
+            df['categ_name'] = df['categ_name'].fillna('Sin Categoría')
+            df['uom_name'] = df['uom_name'].fillna('')
             # Renombrar para consistencia
             df.rename(columns={'id': 'product_id', 'qty_available': 'stock_total_teorico'}, inplace=True)
             
@@ -58,9 +376,11 @@ class OdooConnector:
                 
             # Eliminar columnas sucias
             df.drop(columns=['categ_id', 'uom_id'], errors='ignore', inplace=True)
+            compactar(df, 'product.product')
+        self._disk_put('product.product', domain, fields, df, incremental)
         return df
 
-    def get_stock_quants(self):
+    def get_stock_quants(self, shards=1, incremental=False):
         """
         CRUCIAL PARA BI: Trae el stock exacto por ubicación/bodega.
         Modelo: stock.quant
@@ -69,18 +389,20 @@ class OdooConnector:
         fields = ['product_id', 'location_id', 'quantity', 'in_date']
         # Filtramos ubicaciones internas (usage = internal) para no ver stock de clientes/proveedores
         domain = [['location_id.usage', '=', 'internal']]
-        data = self.models.execute_kw(self.db, self.uid, self.password, 'stock.quant', 'search_read', [domain], {'fields': fields, 'limit': 10000})
-        
-        df = pd.DataFrame(data)
+        cached = self._disk_get('stock.quant', domain, fields, incremental)
+        if cached is not None:
+            return cached
+        df = self.fetch_frame('stock.quant', domain, fields, shards=shards, incremental=incremental)
         if not df.empty:
-            df['product_id'] = df['product_id'].apply(lambda x: x[0] if isinstance(x, list) else x)
-            df['location_name'] = df['location_id'].apply(lambda x: x[1] if isinstance(x, list) else 'Desconocida')
+            df['location_name'] = df['location_name'].fillna('Desconocida')
             df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0)
             df.rename(columns={'quantity': 'stock_real_ubicacion'}, inplace=True)
-            df.drop(columns=['location_id'], errors='ignore', inplace=True)
+            df.drop(columns=['location_id', 'product_name'], errors='ignore', inplace=True)
+            compactar(df, 'stock.quant')
+        self._disk_put('stock.quant', domain, fields, df, incremental)
         return df
 
-    def get_sales_lines(self):
+    def get_sales_lines(self, shards=1, incremental=False):
         """
         Trae el detalle de ventas para calcular rotación.
         Modelo: sale.order.line
@@ -88,32 +410,178 @@ class OdooConnector:
         fields = ['order_id', 'product_id', 'product_uom_qty', 'qty_delivered', 'price_unit', 'price_subtotal', 'create_date', 'state']
         # Traemos ventas confirmadas o hechas (sale, done)
         domain = [['state', 'in', ['sale', 'done']]] 
-        data = self.models.execute_kw(self.db, self.uid, self.password, 'sale.order.line', 'search_read', [domain], {'fields': fields, 'limit': 10000})
-        
-        df = pd.DataFrame(data)
+        cached = self._disk_get('sale.order.line', domain, fields, incremental)
+        if cached is not None:
+            return cached
+        df = self.fetch_frame('sale.order.line', domain, fields, shards=shards, incremental=incremental)
         if not df.empty:
-            df['product_id'] = df['product_id'].apply(lambda x: x[0] if isinstance(x, list) else x)
-            df['order_name'] = df['order_id'].apply(lambda x: x[1] if isinstance(x, list) else '')
+            df['order_name'] = df['order_name'].fillna('')
             df['date'] = pd.to_datetime(df['create_date'])
             df['qty_sold'] = pd.to_numeric(df['product_uom_qty'], errors='coerce').fillna(0)
             df['revenue'] = pd.to_numeric(df['price_subtotal'], errors='coerce').fillna(0)
             
             # Limpieza
-            df.drop(columns=['order_id', 'product_uom_qty', 'price_subtotal'], errors='ignore', inplace=True)
+            df.drop(columns=['order_id', 'product_name', 'product_uom_qty', 'price_subtotal', 'create_date'], errors='ignore', inplace=True)
+            compactar(df, 'sale.order.line')
+        self._disk_put('sale.order.line', domain, fields, df, incremental)
+        return df
+
+    def get_sales_summary(self, date_bucket=None, desde=None):
+        """
+        Resumen de ventas agregado en el servidor (read_group) por producto y, opcionalmente,
+        por periodo (ej. date_bucket='create_date:day').
+        Modelo: sale.order.line
+        Devuelve las mismas columnas que usa el análisis (product_id, qty_sold, revenue, date)
+        más date_min, con miles de filas agregadas en lugar de millones de líneas.
+        Con `desde` solo se leen las ventas creadas a partir de esa fecha (relectura de los últimos días).
+        """
+        fields = ['product_uom_qty:sum', 'price_subtotal:sum', 'fecha_max:max(create_date)', 'fecha_min:min(create_date)']
+        groupby = ['product_id'] + ([date_bucket] if date_bucket else [])
+        # Mismo filtro que get_sales_lines: ventas confirmadas o hechas
+        domain = [['state', 'in', ['sale', 'done']]]
+        if desde is not None:
+            domain.append(['create_date', '>=', pd.Timestamp(desde).strftime('%Y-%m-%d %H:%M:%S')])
+        cached = self._disk_get('sale.order.line', domain, fields + groupby)
+        if cached is not None:
+            return cached
+        df = self.read_group_frame('sale.order.line', domain, fields, groupby)
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['fecha_max'])
+            df['date_min'] = pd.to_datetime(df['fecha_min'])
+            df['qty_sold'] = pd.to_numeric(df['product_uom_qty'], errors='coerce').fillna(0)
+            df['revenue'] = pd.to_numeric(df['price_subtotal'], errors='coerce').fillna(0)
+            if date_bucket:
+                df.rename(columns={date_bucket.split(':')[0]: 'periodo'}, inplace=True)
+
+            # Limpieza
+            df.drop(columns=['fecha_max', 'fecha_min', 'product_uom_qty', 'price_subtotal'], errors='ignore', inplace=True)
+            compactar(df, 'sale.order.line')
+        self._disk_put('sale.order.line', domain, fields + groupby, df)
         return df
 
-    def get_moves(self):
+    def get_location_demand(self, dias=90):
+        """
+        Demanda por producto y ubicación interna: salidas hechas hacia clientes
+        en los últimos `dias`, agregadas en el servidor (read_group).
+        Modelo: stock.move
+        """
+        # Se ancla al inicio del día para que la consulta (y su caché) sea estable durante el día
+        desde = (pd.Timestamp.today().normalize() - pd.Timedelta(days=dias)).strftime('%Y-%m-%d %H:%M:%S')
+        fields = ['product_uom_qty:sum']
+        groupby = ['product_id', 'location_id']
+        domain = [
+            ['state', '=', 'done'],
+            ['location_id.usage', '=', 'internal'],
+            ['location_dest_id.usage', '=', 'customer'],
+            ['date', '>=', desde],
+        ]
+        cached = self._disk_get('stock.move', domain, fields + groupby)
+        if cached is not None:
+            return cached
+        df = self.read_group_frame('stock.move', domain, fields, groupby)
+        if not df.empty:
+            df['qty_salida'] = pd.to_numeric(df['product_uom_qty'], errors='coerce').fillna(0)
+            df['venta_diaria'] = df['qty_salida'] / max(dias, 1)
+            df.drop(columns=['product_uom_qty', 'product_name', 'location_id'], errors='ignore', inplace=True)
+            compactar(df, 'stock.move')
+        self._disk_put('stock.move', domain, fields + groupby, df)
+        return df
+
+    def get_moves(self, shards=1, incremental=False):
         """
         Para analizar flujo de movimientos.
         Modelo: stock.move
         """
         fields = ['product_id', 'location_id', 'location_dest_id', 'date', 'product_uom_qty']
         domain = [['state', '=', 'done']]
-        data = self.models.execute_kw(self.db, self.uid, self.password, 'stock.move', 'search_read', [domain], {'fields': fields, 'limit': 5000})
-        df = pd.DataFrame(data)
+        cached = self._disk_get('stock.move', domain, fields, incremental)
+        if cached is not None:
+            return cached
+        df = self.fetch_frame('stock.move', domain, fields, shards=shards, incremental=incremental)
         if not df.empty:
-            df['product_id'] = df['product_id'].apply(lambda x: x[0] if isinstance(x, list) else x)
-            df['origen'] = df['location_id'].apply(lambda x: x[1] if isinstance(x, list) else '')
-            df['destino'] = df['location_dest_id'].apply(lambda x: x[1] if isinstance(x, list) else '')
+            df['origen'] = df['location_name'].fillna('')
+            df['destino'] = df['location_dest_name'].fillna('')
             df['qty'] = pd.to_numeric(df['product_uom_qty'], errors='coerce').fillna(0)
-        return df
\ No newline at end of file
+            # Solo quedan columnas planas: ids de producto y nombres de origen / destino
+            df.drop(columns=['location_id', 'location_name', 'location_dest_id', 'location_dest_name',
+                             'product_name', 'product_uom_qty'], errors='ignore', inplace=True)
+            compactar(df, 'stock.move')
+        self._disk_put('stock.move', domain, fields, df, incremental)
+        return df
+
+
+# --- REGISTRO DE CONECTORES DEL PROCESO ---
+_CONECTORES = {}
+_CONECTORES_LOCK = threading.Lock()  # Protege los dos diccionarios; nunca se retiene durante la red
+_CANDADOS_CLAVE = {}  # Un candado por juego de credenciales: serializa solo su autenticación
+# faultCode de AccessDenied en el XML-RPC de Odoo (sesión o credenciales inválidas)
+FAULT_ACCESO_DENEGADO = 3
+
+
+def get_connector(url=None, db=None, username=None, password=None, transport=None):
+    """
+    Fábrica de conectores compartidos por todo el proceso: autentica una sola vez por
+    juego de credenciales y reutiliza el uid y el pool de conexiones en cada recarga
+    y en cada página de Streamlit. Sin argumentos usa las variables de entorno.
+    Solo se registra un conector ya autenticado: si la conexión falla, la excepción
+    sube y la próxima llamada vuelve a intentar. La autenticación corre con el candado
+    de sus credenciales, no con el del registro: un Odoo lento no frena a los demás.
+    """
+    url = url or os.getenv("URL")
+    db = db or os.getenv("DB")
+    username = username or os.getenv("USERNAME")
+    password = password or os.getenv("PASSWORD")
+    transport = transport or TRANSPORT
+    clave = (url, db, username, hashlib.sha256((password or '').encode('utf-8')).hexdigest(), transport)
+    with _CONECTORES_LOCK:
+        connector = _CONECTORES.get(clave)
+        if connector is not None:
+            return connector
+        candado = _CANDADOS_CLAVE.setdefault(clave, threading.Lock())
+    with candado:
+        # Otro hilo con las mismas credenciales pudo registrarlo mientras se esperaba
+        with _CONECTORES_LOCK:
+            connector = _CONECTORES.get(clave)
+        if connector is None:
+            connector = OdooConnector(url, db, username, password, transport)
+            with _CONECTORES_LOCK:
+                _CONECTORES[clave] = connector
+    return connector
+
+
+def es_error_de_conexion(error):
+    """
+    True si `error` es de red o de autenticación (conexión caída, HTTP, sesión inválida):
+    los casos en que conviene descartar el conector y reconectar. Un Fault de datos
+    (dominio inválido, registro inexistente, permisos sobre un modelo) no lo es.
+    """
+    if isinstance(error, (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError)):
+        return True
+    return isinstance(error, xmlrpc.client.Fault) and (
+        error.faultCode == FAULT_ACCESO_DENEGADO or 'Access Denied' in str(error.faultString))
+
+
+def descartar_conector(connector):
+    """Saca `connector` del registro (ej. tras un error de Odoo) para que la próxima llamada reconecte."""
+    with _CONECTORES_LOCK:
+        for clave in [c for c, registrado in _CONECTORES.items() if registrado is connector]:
+            del _CONECTORES[clave]
+
+
+def _estado_sync(df):
+    """Estado de una consulta incremental: frame crudo y marcas de agua (write_date / id)."""
+    return {'frame': df, 'write_date': df['write_date'].max(), 'max_id': int(df['id'].max())}
+
+
+def _inicio_periodo(grupo, spec, campo):
+    """
+    Inicio del periodo de un grupo de read_group agrupado por fecha.
+    Odoo 16+ lo entrega en `__range`; en versiones anteriores se toma del `__domain`.
+    """
+    rango = grupo.get('__range', {}).get(spec)
+    if rango:
+        return rango.get('from')
+    for hoja in grupo.get('__domain', []):
+        if isinstance(hoja, (list, tuple)) and len(hoja) == 3 and hoja[0] == campo and hoja[1] == '>=':
+            return hoja[2]
+    return None
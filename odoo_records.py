@@ -0,0 +1,139 @@
+import threading
+from itertools import repeat
+from operator import is_, itemgetter
+
+import numpy as np
+import pandas as pd
+
+# Celda many2one vacía: Odoo devuelve False en lugar de [id, nombre]
+_NULO = (np.nan, None)
+_ID = itemgetter(0)
+# Nombres por modelo relacionado que guarda el registro; al superarlo la tabla se vacía y vuelve
+# a llenarse con lo que llegue (acota la memoria del conector compartido del proceso)
+MAX_NOMBRES_POR_MODELO = 200_000
+
+
+class NameRegistry:
+    """
+    Diccionario id -> nombre compartido por modelo relacionado (ej. 'stock.location').
+    Todas las columnas many2one que apuntan al mismo modelo (location_id, location_dest_id...)
+    y todas las páginas/consultas del conector alimentan y reutilizan la misma tabla, así
+    cada nombre se guarda una sola vez y se puede resolver un id sin volver a Odoo.
+    Cada tabla guarda a lo sumo `max_nombres` pares (ej. sale.order tiene un nombre por pedido).
+    """
+
+    def __init__(self, max_nombres=MAX_NOMBRES_POR_MODELO):
+        self.max_nombres = max_nombres
+        self._tablas = {}
+        self._lock = threading.Lock()
+
+    def tabla(self, relation):
+        """Tabla id -> nombre del modelo relacionado (vacía si aún no se vio ninguno)."""
+        with self._lock:
+            return self._tablas.setdefault(relation, {})
+
+    def nombre(self, relation, record_id, default=None):
+        return self._tablas.get(relation, {}).get(record_id, default)
+
+    def registrar(self, relation, ids, nombres):
+        """
+        Registra los pares vistos y devuelve los nombres canónicos: si el id ya tiene el mismo
+        nombre se reutiliza el string guardado (una sola copia entre páginas y consultas); si
+        cambió en Odoo (ej. producto renombrado) se reemplaza.
+        """
+        tabla = self.tabla(relation)
+        with self._lock:
+            if len(tabla) + len(ids) > self.max_nombres:
+                tabla.clear()
+            canonicos = []
+            for i, nombre in zip(ids, nombres):
+                actual = tabla.get(i)
+                if actual != nombre:
+                    tabla[i] = actual = nombre
+                canonicos.append(actual)
+            return canonicos
+
+
+def es_false(valores):
+    """
+    Máscara de las celdas que son exactamente False: el nulo de Odoo en campos no booleanos.
+    La comparación por identidad corre en C (operator.is_ sobre la columna), sin lambdas por
+    celda, y no confunde 0 ni 0.0 con False.
+    """
+    return np.fromiter(map(is_, valores, repeat(False)), dtype=bool, count=len(valores))
+
+
+def quitar_false(serie):
+    """Serie con los False de Odoo reemplazados por None (la misma serie si no hay ninguno)."""
+    mascara = es_false(serie)
+    return serie.mask(mascara, None) if mascara.any() else serie
+
+
+def split_many2one(valores, relation=None, registry=None):
+    """
+    Separa una columna many2one ([id, nombre] o False) en dos arreglos: ids y nombres.
+    El desempaquetado usa itemgetter en C sobre la columna (sin lambdas por celda); los
+    nombres se resuelven una vez por id distinto y se expanden con el índice inverso.
+    Devuelve (ids, nombres): Int64 nullable si hay vacíos (int64 si no) y object.
+    """
+    if len(valores) == 0:
+        return np.array([], dtype='int64'), np.array([], dtype=object)
+    pares = [v or _NULO for v in valores]
+    ids = np.fromiter(map(_ID, pares), dtype=float, count=len(pares))
+    unicos, primero, inverso = np.unique(ids, return_index=True, return_inverse=True)
+    validos = ~np.isnan(unicos)
+    # Un nombre por id distinto, tomado de su primera aparición
+    nombres_unicos = [pares[i][1] for i in primero[validos].tolist()]
+    if registry is not None and relation:
+        nombres_unicos = registry.registrar(relation, unicos[validos].astype('int64').tolist(), nombres_unicos)
+    tabla = np.empty(len(unicos), dtype=object)
+    tabla[validos] = nombres_unicos
+    if validos.all():
+        return ids.astype('int64'), tabla[inverso]
+    return pd.array(ids, dtype='Int64'), tabla[inverso]
+
+
+def columna_nombre(campo, existentes=()):
+    """
+    Columna con el nombre de un many2one: `<campo sin _id>_name` (location_id -> location_name).
+    Si ese nombre ya es un campo leído del modelo (company_id -> company_name en res.partner)
+    se usa `<campo>_display` (company_id_display) para no pisar el valor real.
+    """
+    nombre = (campo[:-3] if campo.endswith('_id') else campo) + '_name'
+    return f"{campo}_display" if nombre in existentes else nombre
+
+
+def normalizar_registros(records, many2one=None, registry=None, solo_nombre=False):
+    """
+    Convierte una página de search_read (lista de dicts) en un dict de columnas, en una pasada.
+    - many2one: {campo: modelo relacionado} (ver OdooConnector.many2one_fields). Si es None se
+      detectan por el primer valor no vacío de cada columna ([id, nombre]).
+    - Cada many2one `<base>_id` queda como ids en `<base>_id` más `<base>_name` con el nombre
+      (misma convención que read_group_frame; ver columna_nombre si `<base>_name` ya es un
+      campo). Con solo_nombre=True la columna se reemplaza por el nombre (vista de auditoría).
+    """
+    if not records:
+        return {}
+    columnas = {}
+    for campo in records[0]:
+        try:
+            # search_read devuelve las mismas claves en todos los registros
+            valores = list(map(itemgetter(campo), records))
+        except KeyError:
+            valores = [r.get(campo) for r in records]
+        if many2one is not None:
+            es_m2o = campo in many2one
+        else:
+            muestra = next((v for v in valores if v), None)
+            es_m2o = isinstance(muestra, list) and len(muestra) == 2 and isinstance(muestra[0], int)
+        if not es_m2o:
+            columnas[campo] = valores
+            continue
+        relation = many2one.get(campo) if many2one else None
+        ids, nombres = split_many2one(valores, relation, registry)
+        if solo_nombre:
+            columnas[campo] = nombres
+        else:
+            columnas[campo] = ids
+            columnas[columna_nombre(campo, records[0])] = nombres
+    return columnas
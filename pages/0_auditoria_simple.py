@@ -1,7 +1,8 @@
-import xmlrpc.client
 import pandas as pd
 import streamlit as st
 import os
+from odoo_client import get_connector
+from odoo_records import normalizar_registros
 
 # --- CONFIGURACIÓN RÁPIDA (Copia tus credenciales aquí si no las lee del env) ---
 URL = os.getenv("URL")
@@ -17,15 +18,11 @@ if not URL:
     st.stop()
 
 try:
-    # Conexión
-    common = xmlrpc.client.ServerProxy(f'{URL}/xmlrpc/2/common')
-    uid = common.authenticate(DB, USERNAME, PASSWORD, {})
-    models = xmlrpc.client.ServerProxy(f'{URL}/xmlrpc/2/object')
+    # Conexión compartida del proceso (autentica una sola vez por juego de credenciales)
+    connector = get_connector(URL, DB, USERNAME, PASSWORD)
+    uid = connector.uid
+    models = connector.models
     
-    if not uid:
-        st.error("❌ Credenciales rechazadas.")
-        st.stop()
-        
     st.success(f"✅ Conectado exitosamente con UID: {uid}")
 
     # 1. VERIFICAR COMPAÑÍAS
@@ -46,13 +43,14 @@ try:
     stock_data = models.execute_kw(DB, uid, PASSWORD, 'stock.quant', 'search_read', [domain_stock], {'fields': fields_stock, 'limit': 500})
     
     if stock_data:
-        df_stock = pd.DataFrame(stock_data)
+        # Los many2one llegan separados en <campo>_id / <campo>_name (sin recorrer celda por celda)
+        df_stock = pd.DataFrame(normalizar_registros(stock_data, connector.many2one_fields('stock.quant'), connector.nombres))
         
         # Limpiar datos para lectura fácil
         if not df_stock.empty:
-            df_stock['Producto'] = df_stock['product_id'].apply(lambda x: x[1] if isinstance(x, list) else x)
-            df_stock['Ubicación'] = df_stock['location_id'].apply(lambda x: x[1] if isinstance(x, list) else x)
-            df_stock['Compañía Dueña'] = df_stock['company_id'].apply(lambda x: x[1] if isinstance(x, list) else 'Sin Cía')
+            df_stock['Producto'] = df_stock['product_name']
+            df_stock['Ubicación'] = df_stock['location_name']
+            df_stock['Compañía Dueña'] = df_stock['company_name'].fillna('Sin Cía')
             
             st.dataframe(df_stock[['Producto', 'quantity', 'Ubicación', 'Compañía Dueña', 'in_date']], use_container_width=True)
             
@@ -76,9 +74,9 @@ try:
     st.subheader("3. Últimas 50 Líneas de Venta")
     sales_data = models.execute_kw(DB, uid, PASSWORD, 'sale.order.line', 'search_read', [[]], {'fields': ['order_id', 'product_id', 'product_uom_qty', 'state'], 'limit': 50})
     if sales_data:
-        df_sales = pd.DataFrame(sales_data)
-        df_sales['Producto'] = df_sales['product_id'].apply(lambda x: x[1] if isinstance(x, list) else x)
-        df_sales['Pedido'] = df_sales['order_id'].apply(lambda x: x[1] if isinstance(x, list) else x)
+        df_sales = pd.DataFrame(normalizar_registros(sales_data, connector.many2one_fields('sale.order.line'), connector.nombres))
+        df_sales['Producto'] = df_sales['product_name']
+        df_sales['Pedido'] = df_sales['order_name']
         st.dataframe(df_sales[['Pedido', 'Producto', 'product_uom_qty', 'state']])
     else:
         st.warning("No se encontraron líneas de venta.")
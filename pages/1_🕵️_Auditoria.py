@@ -1,7 +1,8 @@
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
-import zipfile
-from io import BytesIO
 
 st.set_page_config(page_title="Auditoría de Datos", layout="wide")
 
@@ -10,23 +11,31 @@ st.markdown("Esta herramienta verifica qué campos existen realmente en tu base
 
 # --- 1. CONEXIÓN USANDO OdooConnector ---
 try:
-    from odoo_client import OdooConnector
-    connector = OdooConnector()
+    from odoo_client import get_connector
+    from odoo_records import normalizar_registros
+    from schema_catalog import SchemaCatalog
+    from bulk_export import exportar_modelos_zip
+    from snapshot_refresher import REFRESH_SECONDS
+    connector = get_connector()
     st.success(f"✅ Conectado exitosamente a la BD: **{connector.db}** como **{connector.username}**")
 except Exception as e:
     st.error(f"❌ Error de conexión crítico con Odoo: {e}")
     st.stop()
 
+# --- CATÁLOGO DE ESQUEMAS (fields_get en caché de disco, compartido por el proceso) ---
+@st.cache_resource
+def get_catalogo(db):
+    return SchemaCatalog(connector)
+
+catalogo = get_catalogo(connector.db)
+
 # --- FUNCIÓN DE AUDITORÍA ---
 def auditar_modelo(nombre_modelo, campos_sospechosos):
     st.divider()
     st.subheader(f"📦 Modelo: `{nombre_modelo}`")
     try:
         # 1. Obtener todos los campos disponibles
-        all_fields = connector.models.execute_kw(
-            connector.db, connector.uid, connector.password,
-            nombre_modelo, 'fields_get', [], {'attributes': ['string', 'type']}
-        )
+        all_fields = catalogo.fields(nombre_modelo)
         lista_campos_reales = list(all_fields.keys())
 
         # 2. Verificar los que necesitamos
@@ -128,40 +137,11 @@ st.header("📚 Explorador de Modelos y Campos Odoo")
 if st.button("🔍 Listar todos los modelos y campos disponibles"):
     with st.spinner("Consultando modelos y campos, esto puede tardar unos segundos..."):
         try:
-            # 1. Obtener todos los modelos
-            ir_model_data = connector.models.execute_kw(
-                connector.db, connector.uid, connector.password,
-                'ir.model', 'search_read', [[]], {'fields': ['model', 'name'], 'limit': 2000}
-            )
-            modelos = sorted(ir_model_data, key=lambda x: x['model'])
-            st.success(f"Se encontraron {len(modelos)} modelos en Odoo.")
-
-            # 2. Para cada modelo, obtener los campos
-            resumen = []
-            for modelo in modelos:
-                try:
-                    fields = connector.models.execute_kw(
-                        connector.db, connector.uid, connector.password,
-                        modelo['model'], 'fields_get', [], {'attributes': ['string', 'type']}
-                    )
-                    for campo, props in fields.items():
-                        resumen.append({
-                            "Modelo": modelo['model'],
-                            "Nombre Modelo": modelo['name'],
-                            "Campo": campo,
-                            "Descripción": props.get('string', ''),
-                            "Tipo": props.get('type', '')
-                        })
-                except Exception as e:
-                    resumen.append({
-                        "Modelo": modelo['model'],
-                        "Nombre Modelo": modelo['name'],
-                        "Campo": "ERROR",
-                        "Descripción": f"Error: {e}",
-                        "Tipo": ""
-                    })
-
-            df_resumen = pd.DataFrame(resumen)
+            # Catálogo en caché: solo se piden a Odoo (en paralelo) los modelos nuevos o modificados
+            estado = catalogo.actualizar()
+            st.success(f"Se encontraron {estado['modelos']} modelos en Odoo "
+                       f"({estado['refrescados']} actualizados en {estado['segundos']} s).")
+            df_resumen = catalogo.resumen()
             st.dataframe(df_resumen, use_container_width=True)
             st.info("Puedes filtrar y buscar en la tabla para investigar cualquier modelo o campo.")
         except Exception as e:
@@ -182,23 +162,13 @@ modelos_clave = [
     ('product.category', 'Categorías de Producto'),
 ]
 
-try:
-    from odoo_client import OdooConnector
-    connector = OdooConnector()
-    st.success(f"✅ Conectado exitosamente a la BD: **{connector.db}** como **{connector.username}**")
-except Exception as e:
-    st.error(f"❌ Error de conexión crítico con Odoo: {e}")
-    st.stop()
-
+# Se reutiliza el mismo conector de arriba (una sola autenticación por proceso)
 for modelo, nombre in modelos_clave:
     st.divider()
     st.subheader(f"📦 Modelo: `{modelo}` ({nombre})")
     try:
         # Mostrar todos los campos
-        all_fields = connector.models.execute_kw(
-            connector.db, connector.uid, connector.password,
-            modelo, 'fields_get', [], {'attributes': ['string', 'type']}
-        )
+        all_fields = catalogo.fields(modelo)
         campos = []
         for campo, props in all_fields.items():
             campos.append({
@@ -219,11 +189,9 @@ for modelo, nombre in modelos_clave:
                 modelo, 'search_read', [[]], {'fields': list(all_fields.keys()), 'limit': 10}
             )
             if data:
-                df_data = pd.DataFrame(data)
-                # Procesa campos Many2one: si es lista, muestra solo el nombre
-                for col in df_data.columns:
-                    if df_data[col].apply(lambda x: isinstance(x, list)).any():
-                        df_data[col] = df_data[col].apply(lambda x: x[1] if isinstance(x, list) and len(x) > 1 else x)
+                # Campos Many2one: se muestra solo el nombre (tipos según fields_get)
+                many2one = {c: p.get('relation') for c, p in all_fields.items() if p.get('type') == 'many2one'}
+                df_data = pd.DataFrame(normalizar_registros(data, many2one, connector.nombres, solo_nombre=True))
                 st.dataframe(df_data, use_container_width=True)
             else:
                 st.warning("La tabla está vacía (0 registros).")
@@ -235,130 +203,94 @@ for modelo, nombre in modelos_clave:
 
 st.header("🔬 Diagnóstico de Stock y Ventas")
 
-df_stock = connector.get_stock_data()
-df_sales = connector.get_sales_data()
-
-st.subheader("Stock (primeros 10 registros)")
-st.dataframe(df_stock.head(10))
-st.write("Total productos con stock:", df_stock['product_name'].nunique())
-st.write("Suma total de stock:", df_stock['quantity'].sum())
-
-st.subheader("Ventas (primeros 10 registros)")
-st.dataframe(df_sales.head(10))
-st.write("Total productos con ventas:", df_sales['product_name'].nunique())
-st.write("Suma total de ventas:", df_sales['qty_sold'].sum())
+# Las cifras y las muestras de esta página se piden con agregaciones del servidor (read_group)
+# y search_read con límite: nunca se descargan modelos completos solo para mostrar 10 filas.
+# Se guardan en caché por el intervalo de refresco del dashboard, así un rerun no vuelve a Odoo
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def totales_stock_ventas(db):
+    stock = connector.read_group_frame('stock.quant', [['location_id.usage', '=', 'internal']], ['quantity:sum'], ['product_id'])
+    ventas = connector.get_sales_summary()
+    return {
+        "Total productos con stock": len(stock),
+        "Suma total de stock": float(stock['quantity'].sum()) if not stock.empty else 0,
+        "Total productos con ventas": len(ventas),
+        "Suma total de ventas": float(ventas['qty_sold'].sum()) if not ventas.empty else 0,
+    }
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def muestra_modelo(db, modelo, dominio, campos, limite=10):
+    """Primeros `limite` registros (un search_read) con los many2one separados, y el total del dominio."""
+    registros = connector.execute_kw(modelo, 'search_read', [dominio], {'fields': campos, 'limit': limite, 'order': 'id'})
+    total = connector.execute_kw(modelo, 'search_count', [dominio])
+    return pd.DataFrame(normalizar_registros(registros, connector.many2one_fields(modelo), connector.nombres)), total
+
+
+# Un fallo aquí no impide llegar a la exportación de abajo
+try:
+    for etiqueta, valor in totales_stock_ventas(connector.db).items():
+        st.write(f"{etiqueta}:", valor)
+except Exception as e:
+    st.error(f"Error al calcular los totales de stock y ventas: {e}")
 
-st.header("⬇️ Exportar datos reales de modelos clave a CSV (ZIP)")
+st.header("⬇️ Exportar datos reales de modelos clave (ZIP: CSV o Parquet)")
 
-if st.button("Exportar todos los modelos a ZIP (CSV por modelo)"):
+formato_zip = st.radio("Formato de cada modelo", ["csv", "parquet"], horizontal=True)
+# El ZIP se escribe en un archivo temporal en disco (memoria acotada durante la exportación) y se
+# entrega desde ahí, como el Excel del dashboard. Streamlit guarda en memoria el archivo que ofrece
+# para descargar: por encima de este tamaño no se ofrece el botón
+ZIP_MAX_DESCARGA = int(os.getenv("ODOO_ZIP_MAX_MB", "512")) * 1024 * 1024
+if st.button("Exportar todos los modelos a ZIP"):
     with st.spinner("Extrayendo y exportando datos reales..."):
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w") as zf:
-            for modelo, nombre in modelos_clave:
-                try:
-                    all_fields = connector.models.execute_kw(
-                        connector.db, connector.uid, connector.password,
-                        modelo, 'fields_get', [], {'attributes': ['string', 'type']}
-                    )
-                    data = connector.models.execute_kw(
-                        connector.db, connector.uid, connector.password,
-                        modelo, 'search_read', [[]], {'fields': list(all_fields.keys()), 'limit': 1000}
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        try:
+            # Modelos completos (paginados, en paralelo) directo al ZIP + manifest.json
+            _, manifest = exportar_modelos_zip(connector, catalogo, [m for m, _ in modelos_clave], formato_zip, destino=path)
+            st.dataframe(pd.DataFrame(manifest['modelos']), use_container_width=True)
+            tamano = os.path.getsize(path)
+            if tamano > ZIP_MAX_DESCARGA:
+                st.warning(f"El ZIP pesa {tamano / 1024 ** 2:,.0f} MB, más que el máximo para descargar desde la página "
+                           f"({ZIP_MAX_DESCARGA / 1024 ** 2:,.0f} MB, ODOO_ZIP_MAX_MB). Exporta menos modelos o usa bulk_export.exportar_modelos_zip con un destino en disco.")
+            else:
+                with open(path, 'rb') as f:
+                    st.download_button(
+                        label="📦 Descargar ZIP con todos los modelos",
+                        data=f,
+                        file_name="auditoria_modelos_odoo.zip",
+                        mime="application/zip"
                     )
-                    if data:
-                        df_data = pd.DataFrame(data)
-                        # Procesa campos Many2one: si es lista, muestra solo el nombre
-                        for col in df_data.columns:
-                            if df_data[col].apply(lambda x: isinstance(x, list)).any():
-                                df_data[col] = df_data[col].apply(lambda x: x[1] if isinstance(x, list) and len(x) > 1 else x)
-                        # Guarda el CSV en el ZIP
-                        csv_bytes = df_data.to_csv(index=False).encode("utf-8")
-                        zf.writestr(f"{modelo.replace('.', '_')}.csv", csv_bytes)
-                except Exception as e:
-                    # Si falla un modelo, lo salta y sigue
-                    continue
-        zip_buffer.seek(0)
-        st.download_button(
-            label="📦 Descargar ZIP con todos los CSV",
-            data=zip_buffer,
-            file_name="auditoria_modelos_odoo.zip",
-            mime="application/zip"
-        )
-        st.success("¡Listo! Descarga el ZIP y descomprímelo para ver cada modelo en un CSV separado.")
-
-st.header("🔎 Diagnóstico directo de DataFrames para BI Engine")
-
-# Extrae los DataFrames usando el mismo método que el dashboard principal
-try:
-    df_stock = connector.get_stock_data()
-    df_sales = connector.get_sales_data()
-    df_product = connector.get_product_data()
-    df_location = connector.get_location_data()
-    df_moves = connector.get_stock_move_data()
-    df_clients = connector.get_partner_data()
-    df_purchases = connector.get_purchase_order_line_data()
-
-    st.subheader("Stock (DataFrame crudo)")
-    st.dataframe(df_stock.head(10))
-    st.write("Shape:", df_stock.shape)
-    st.write("Columnas:", df_stock.columns.tolist())
-
-    st.subheader("Ventas (DataFrame crudo)")
-    st.dataframe(df_sales.head(10))
-    st.write("Shape:", df_sales.shape)
-    st.write("Columnas:", df_sales.columns.tolist())
-
-    st.subheader("Productos (DataFrame crudo)")
-    # Asegura que la columna de categoría sea segura para mostrar
-    if isinstance(df_product, pd.DataFrame):
-        if 'categ_id_nombre' in df_product.columns:
-            # ya normalizada por OdooConnector.get_product_data
-            df_product_display = df_product.copy()
+        finally:
+            os.remove(path)
+        if manifest['errores']:
+            st.warning(f"{manifest['errores']} modelo(s) no se pudieron exportar; el detalle está en manifest.json.")
         else:
-            # fallback: intenta convertir values variados a string para evitar inferencias de tipo
-            df_product_display = df_product.copy()
-            for col in df_product_display.columns:
-                df_product_display[col] = df_product_display[col].apply(lambda x: x[1] if isinstance(x, list) and len(x) > 1 else (str(x) if x is not None else None))
-        st.dataframe(df_product_display.head(10))
-        st.write("Shape:", df_product.shape)
-        st.write("Columnas:", df_product.columns.tolist())
-    else:
-        st.warning("No se obtuvo DataFrame de productos.")
-
-    st.subheader("Ubicaciones (DataFrame crudo)")
-    try:
-        # Normaliza company_id para mostrar solo el nombre
-        if 'company_id' in df_location.columns:
-            df_location['company_id_nombre'] = df_location['company_id'].apply(
-                lambda x: x[1] if isinstance(x, list) and len(x) > 1 else (x if isinstance(x, str) else None)
-            )
-        st.dataframe(df_location.head(10))
-        st.write("Shape:", df_location.shape)
-        st.write("Columnas:", df_location.columns.tolist())
-    except Exception as e:
-        st.error(f"Error al extraer DataFrame de ubicaciones: {e}")
+            st.success(f"¡Listo! {manifest['filas']:,} filas en {manifest['segundos']} s. Descarga el ZIP y descomprímelo para ver cada modelo en un archivo separado.")
 
-    st.subheader("Movimientos de Stock (DataFrame crudo)")
-    st.dataframe(df_moves.head(10))
-    st.write("Shape:", df_moves.shape)
-    st.write("Columnas:", df_moves.columns.tolist())
+st.header("🔎 Diagnóstico directo de DataFrames para BI Engine")
 
-    st.subheader("Clientes (DataFrame crudo)")
-    st.dataframe(df_clients.head(10))
-    st.write("Shape:", df_clients.shape)
-    st.write("Columnas:", df_clients.columns.tolist())
+# Muestra de los frames crudos que leen los getters del dashboard (mismos dominios y campos; los
+# many2one separados en `<campo>` con el id y `<campo sin _id>_name` con el nombre) y el total
+# de registros. Cada sección va por separado: un modelo ausente (ej. compras sin el módulo
+# purchase) no oculta los demás
+FRAMES_CRUDOS = [
+    ("Stock", 'stock.quant', [['location_id.usage', '=', 'internal']], ['product_id', 'location_id', 'quantity', 'in_date']),
+    ("Ventas", 'sale.order.line', [['state', 'in', ['sale', 'done']]],
+     ['order_id', 'product_id', 'product_uom_qty', 'qty_delivered', 'price_unit', 'price_subtotal', 'create_date', 'state']),
+    ("Productos", 'product.product', [['active', '=', True]],
+     ['name', 'default_code', 'categ_id', 'list_price', 'standard_price', 'qty_available', 'virtual_available', 'uom_id']),
+    ("Ubicaciones", 'stock.location', [], ['name', 'complete_name', 'usage', 'company_id']),
+    ("Movimientos de Stock", 'stock.move', [['state', '=', 'done']], ['product_id', 'location_id', 'location_dest_id', 'date', 'product_uom_qty']),
+    ("Clientes", 'res.partner', [['customer_rank', '>', 0]], ['name', 'email', 'phone', 'customer_rank']),
+    ("Compras", 'purchase.order.line', [], ['order_id', 'product_id', 'product_qty', 'price_unit', 'date_planned']),
+]
 
-    st.subheader("Compras (DataFrame crudo)")
-    st.subheader("Compras (DataFrame crudo)")
+for titulo, modelo, dominio, campos in FRAMES_CRUDOS:
+    st.subheader(f"{titulo} (DataFrame crudo)")
     try:
-        if 'order_id' in df_purchases.columns:
-            df_purchases['order_id_nombre'] = df_purchases['order_id'].apply(
-                lambda x: x[1] if isinstance(x, list) and len(x) > 1 else (x if isinstance(x, str) else None)
-            )
-        st.dataframe(df_purchases.head(10))
-        st.write("Shape:", df_purchases.shape)
-        st.write("Columnas:", df_purchases.columns.tolist())
+        df_crudo, total = muestra_modelo(connector.db, modelo, dominio, campos)
+        st.dataframe(df_crudo)
+        st.write("Registros:", total)
+        st.write("Columnas:", df_crudo.columns.tolist())
     except Exception as e:
-        st.error(f"Error al extraer DataFrame de compras: {e}")
-
-except Exception as e:
-    st.error(f"Error al extraer DataFrames crudos: {e}")
+        st.error(f"Error al extraer DataFrame de {titulo.lower()}: {e}")
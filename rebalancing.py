@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# --- REGLAS POR DEFECTO DEL MOTOR DE REBALANCEO ---
+STOCK_MIN_ORIGEN = 5      # Sobra en origen: stock >= 5
+STOCK_MAX_DESTINO = 1     # Falta en destino: stock <= 1
+FRACCION_SUGERIDA = 0.3   # Sugiere mover el 30% del stock de origen
+
+COLUMNAS_SUGERENCIA = [
+    'Aprobar', 'Referencia', 'Producto', 'Bodega Origen', 'Bodega Destino',
+    'Stock Origen', 'Stock Destino', 'Cant. Sugerida (Editar)'
+]
+
+
+def sugerir_traslados(stock_pivot, bodegas, origen=None, destino=None,
+                      min_origen=STOCK_MIN_ORIGEN, max_destino=STOCK_MAX_DESTINO, fraccion=FRACCION_SUGERIDA):
+    """
+    Motor de rebalanceo vectorizado sobre el pivot producto x bodega.
+    `stock_pivot` trae las columnas 'name', 'default_code' y una columna por bodega (`bodegas`).
+    `origen` / `destino` restringen a una sola bodega (None = todas).
+    Devuelve las mismas sugerencias (y en el mismo orden: producto, origen, destino)
+    que el recorrido fila x origen x destino, como DataFrame con COLUMNAS_SUGERENCIA.
+    """
+    bodegas = list(bodegas)
+    origenes = [b for b in bodegas if origen is None or b == origen]
+    destinos = [b for b in bodegas if destino is None or b == destino]
+    if stock_pivot.empty or not origenes or not destinos:
+        return pd.DataFrame(columns=COLUMNAS_SUGERENCIA)
+
+    stock = stock_pivot[bodegas].to_numpy(dtype=float)
+    q_origen = stock[:, [bodegas.index(b) for b in origenes]]
+    q_destino = stock[:, [bodegas.index(b) for b in destinos]]
+
+    # Filtros antes de expandir: solo productos con algún origen que sobra y algún destino que falta
+    sobra = q_origen >= min_origen
+    falta = q_destino <= max_destino
+    filas = np.flatnonzero(sobra.any(axis=1) & falta.any(axis=1))
+    sobra, falta = sobra[filas], falta[filas]
+
+    # Producto x origen x destino por broadcasting, sin cruzar una bodega consigo misma
+    misma_bodega = np.array(origenes, dtype=object)[:, None] == np.array(destinos, dtype=object)[None, :]
+    candidatos = sobra[:, :, None] & falta[:, None, :] & ~misma_bodega[None, :, :]
+    p, o, d = np.nonzero(candidatos)
+    filas = filas[p]
+
+    stock_origen = q_origen[filas, o]
+    return pd.DataFrame({
+        'Aprobar': False,
+        'Referencia': stock_pivot['default_code'].to_numpy()[filas],
+        'Producto': stock_pivot['name'].to_numpy()[filas],
+        'Bodega Origen': np.array(origenes, dtype=object)[o],
+        'Bodega Destino': np.array(destinos, dtype=object)[d],
+        'Stock Origen': stock_origen,
+        'Stock Destino': q_destino[filas, d],
+        'Cant. Sugerida (Editar)': np.trunc(stock_origen * fraccion).astype(int),
+    }, columns=COLUMNAS_SUGERENCIA)
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN DE LA INSTRUMENTACIÓN ---
+MAX_EVENTOS = 5_000  # Eventos recientes que se conservan en memoria para el panel
+# Archivo JSONL con un evento por línea (vacío = no se escribe)
+METRICS_FILE = os.getenv("ODOO_METRICS_FILE", "")
+# Llamadas RPC más lentas que esto se registran como WARNING
+SLOW_RPC_SECONDS = float(os.getenv("ODOO_SLOW_RPC_SECONDS", "5"))
+
+
+class Metricas:
+    """
+    Registro de eventos de rendimiento del proceso, seguro para hilos:
+    - 'rpc': cada execute_kw / authenticate (modelo, método, segundos, bytes enviados y
+      recibidos, segundos de parseo, filas devueltas, error).
+    - 'dataframe': construcción de los frames a partir de las páginas de un modelo.
+    - 'span': etapas del pipeline (extracción, análisis, filtros, exportación...).
+    Cada evento queda en memoria (los últimos `max_eventos`), en el log del módulo
+    (DEBUG; WARNING si falló o fue lento) y, si hay `archivo`, como una línea JSON.
+    """
+
+    def __init__(self, max_eventos=MAX_EVENTOS, archivo=METRICS_FILE, lento=SLOW_RPC_SECONDS):
+        self.archivo = archivo
+        self.lento = lento
+        self._eventos = deque(maxlen=max_eventos)
+        self._lock = threading.Lock()
+        self._archivo_lock = threading.Lock()
+
+    def registrar(self, tipo, nombre, segundos, **datos):
+        """Agrega un evento y lo exporta al log y al archivo de métricas. Devuelve el evento."""
+        evento = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'tipo': tipo,
+            'nombre': nombre,
+            'segundos': round(segundos, 6),
+            'hilo': threading.current_thread().name,
+            **datos,
+        }
+        with self._lock:
+            self._eventos.append(evento)
+        if evento.get('error'):
+            logger.warning("%s %s falló en %.3f s: %s", tipo, nombre, segundos, evento['error'])
+        elif tipo == 'rpc' and segundos >= self.lento:
+            logger.warning("RPC lenta: %s en %.3f s (%s filas)", nombre, segundos, evento.get('filas'))
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(evento, default=str))
+        if self.archivo:
+            self._escribir(evento)
+        return evento
+
+    def rpc(self, modelo, metodo, segundos, **datos):
+        return self.registrar('rpc', f"{modelo}.{metodo}", segundos, modelo=modelo, metodo=metodo, **datos)
+
+    @contextmanager
+    def span(self, nombre, **datos):
+        """
+        Cronometra un bloque `with` como evento 'span'. El dict entregado se puede
+        completar dentro del bloque (ej. `span['filas'] = len(df)`); si el bloque
+        levanta, el error queda en el evento y la excepción sigue su curso.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield datos
+        except Exception as e:
+            datos['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.registrar('span', nombre, time.perf_counter() - inicio, **datos)
+
+    def envolver(self, nombre, funcion):
+        """`funcion` envuelta en un span; si devuelve un frame, registra sus filas."""
+        def envuelta(*args, **kwargs):
+            with self.span(nombre) as span:
+                resultado = funcion(*args, **kwargs)
+                if hasattr(resultado, '__len__'):
+                    span['filas'] = len(resultado)
+                return resultado
+        return envuelta
+
+    def eventos(self):
+        """Eventos en memoria como DataFrame (el más reciente al final)."""
+        with self._lock:
+            return pd.DataFrame(list(self._eventos))
+
+    def resumen(self):
+        """
+        Una fila por (tipo, nombre), de la más costosa a la menos: llamadas, errores,
+        segundos totales, p50 / p95 / máximo, filas, MB recibidos y segundos de parseo.
+        """
+        df = self.eventos()
+        if df.empty:
+            return pd.DataFrame()
+        for columna in ('filas', 'bytes_enviados', 'bytes_recibidos', 'parse_s', 'error'):
+            if columna not in df.columns:
+                df[columna] = None
+        df['con_error'] = df['error'].notna()
+        grupos = df.groupby(['tipo', 'nombre'], sort=False)
+        resumen = grupos.agg(
+            llamadas=('segundos', 'size'),
+            errores=('con_error', 'sum'),
+            total_s=('segundos', 'sum'),
+            p50_s=('segundos', 'median'),
+            p95_s=('segundos', lambda s: s.quantile(0.95)),
+            max_s=('segundos', 'max'),
+            filas=('filas', 'sum'),
+            mb_enviados=('bytes_enviados', lambda s: s.sum() / 2**20),
+            mb_recibidos=('bytes_recibidos', lambda s: s.sum() / 2**20),
+            parse_s=('parse_s', 'sum'),
+        ).reset_index()
+        return resumen.sort_values('total_s', ascending=False, ignore_index=True).round(4)
+
+    def limpiar(self):
+        with self._lock:
+            self._eventos.clear()
+
+    def _escribir(self, evento):
+        linea = json.dumps(evento, default=str, ensure_ascii=False) + '\n'
+        try:
+            with self._archivo_lock, open(self.archivo, 'a', encoding='utf-8') as f:
+                f.write(linea)
+        except OSError as e:
+            logger.warning("No se pudo escribir el archivo de métricas %s: %s", self.archivo, e)
+
+
+def filas_resultado(resultado):
+    """Filas de la respuesta de un execute_kw: registros, ids o grupos (0 si es un escalar)."""
+    return len(resultado) if isinstance(resultado, (list, dict)) else 0
+
+
+# Registro compartido por todo el proceso (conectores, motor de análisis y dashboard)
+METRICAS = Metricas()
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+
+# Clave de cada celda: fila del producto en los bits altos y día (desde 1970-01-01) en los bajos.
+# Ordenadas, las celdas de un producto quedan contiguas y por día: cada ventana es un tramo
+BITS_DIA = 20
+MASCARA_DIA = (1 << BITS_DIA) - 1
+MEDIDAS = ('qty_sold', 'revenue')
+VENTANAS = (7, 30, 90)  # Días de las velocidades de venta por defecto
+_NS_DIA = 86_400 * 10**9
+
+
+class SalesCube:
+    """
+    Cubo de ventas producto x día, disperso y de solo lectura: solo se guardan los días
+    con venta (clave, cantidad, ingreso y primera / última hora vendida) y, por medida,
+    su suma acumulada. Cualquier total en un rango de días es `acum[fin] - acum[inicio]`,
+    con los dos bordes ubicados por búsqueda binaria y para todos los productos a la vez:
+    las velocidades 7/30/90 días, la actividad de cada producto o la comparación entre
+    periodos salen del cubo sin volver a agrupar las ventas.
+    Se arma una vez por snapshot; las actualizaciones (`con_dias`, `agregar`) devuelven un
+    cubo nuevo y no tocan este, así que puede compartirse entre hilos y sesiones.
+    """
+
+    def __init__(self, productos=None, claves=None, medidas=None, fecha_min=None, fecha_max=None, armado=None):
+        self.productos = np.asarray([] if productos is None else productos, dtype=np.int64)  # fila -> product_id
+        self.claves = np.asarray([] if claves is None else claves, dtype=np.int64)
+        medidas = medidas or {}
+        self.medidas = {m: np.asarray(medidas.get(m, []), dtype=float) for m in MEDIDAS}
+        self.fecha_min = np.asarray([] if fecha_min is None else fecha_min, dtype='datetime64[ns]')
+        self.fecha_max = np.asarray([] if fecha_max is None else fecha_max, dtype='datetime64[ns]')
+        self.armado = armado  # Día del último armado completo (las actualizaciones lo conservan)
+        self._indice = pd.Index(self.productos)
+        self._acum = {m: np.concatenate(([0.0], np.cumsum(v))) for m, v in self.medidas.items()}
+
+    @classmethod
+    def desde_frame(cls, df, armado=None):
+        """
+        Cubo a partir de líneas de venta (get_sales_lines: product_id, date, qty_sold, revenue)
+        o de ventas ya agregadas por día (get_sales_summary con date_bucket='create_date:day').
+        """
+        return cls(*_celdas(df, np.array([], dtype=np.int64)), armado=armado)
+
+    def __len__(self):
+        return len(self.claves)
+
+    @property
+    def vacio(self):
+        return len(self.claves) == 0
+
+    @property
+    def primer_dia(self):
+        return None if self.vacio else _fecha((self.claves & MASCARA_DIA).min())
+
+    @property
+    def ultimo_dia(self):
+        return None if self.vacio else _fecha((self.claves & MASCARA_DIA).max())
+
+    # --- ACTUALIZACIÓN (DEVUELVE UN CUBO NUEVO) ---
+    def con_dias(self, df, desde):
+        """
+        Cubo con los días anteriores a `desde` de este cubo y, desde ese día, las ventas de `df`
+        (típicamente releídas solo para los últimos días): reemplaza, no suma.
+        """
+        dia = _dia(desde)
+        conservar = (self.claves & MASCARA_DIA) < dia
+        productos, claves, medidas, fecha_min, fecha_max = _celdas(df, self.productos)
+        nuevas = (claves & MASCARA_DIA) >= dia
+        return SalesCube(productos, *_agrupar(
+            np.concatenate([self.claves[conservar], claves[nuevas]]),
+            {m: np.concatenate([self.medidas[m][conservar], medidas[m][nuevas]]) for m in MEDIDAS},
+            np.concatenate([self.fecha_min[conservar], fecha_min[nuevas]]),
+            np.concatenate([self.fecha_max[conservar], fecha_max[nuevas]]),
+        ), armado=self.armado)
+
+    def agregar(self, df):
+        """Cubo con las ventas de `df` sumadas a las de este (solo líneas nuevas: las repetidas se cuentan dos veces)."""
+        productos, claves, medidas, fecha_min, fecha_max = _celdas(df, self.productos)
+        return SalesCube(productos, *_agrupar(
+            np.concatenate([self.claves, claves]),
+            {m: np.concatenate([self.medidas[m], medidas[m]]) for m in MEDIDAS},
+            np.concatenate([self.fecha_min, fecha_min]),
+            np.concatenate([self.fecha_max, fecha_max]),
+        ), armado=self.armado)
+
+    # --- CONSULTAS ---
+    def ventas(self, desde, hasta, medida='qty_sold'):
+        """Total de `medida` por producto entre dos fechas (ambas inclusive)."""
+        inicio, fin = self._tramos(_dia(desde), _dia(hasta) + 1)
+        acum = self._acum[medida]
+        return pd.Series(acum[fin] - acum[inicio], index=self._ids(), name=medida)
+
+    def velocidades(self, ventanas=VENTANAS, hasta=None, medida='qty_sold'):
+        """Venta diaria promedio de los últimos N días (hasta `hasta`, por defecto hoy) para cada ventana."""
+        fin_dia = _dia(_hoy() if hasta is None else hasta) + 1
+        acum = self._acum[medida]
+        columnas = {}
+        for dias in ventanas:
+            inicio, fin = self._tramos(fin_dia - dias, fin_dia)
+            columnas[f'venta_{dias}d'] = (acum[fin] - acum[inicio]) / dias
+        return pd.DataFrame(columnas, index=self._ids())
+
+    def actividad(self):
+        """
+        Por producto: primer y último día con venta, días con venta y días activos
+        (del primero al último, ambos inclusive; 0 si no tiene ventas en el cubo).
+        """
+        inicio, fin = self._tramos(0, 1 << BITS_DIA)
+        con_venta = fin > inicio
+        dias = self.claves & MASCARA_DIA
+        if self.vacio:
+            primero = ultimo = np.zeros(len(self.productos), dtype=np.int64)
+        else:
+            primero = dias[np.minimum(inicio, len(dias) - 1)]
+            ultimo = dias[np.maximum(fin - 1, 0)]
+        nat = np.datetime64('NaT', 'ns')
+        return pd.DataFrame({
+            'primera_venta': np.where(con_venta, primero.astype('datetime64[D]').astype('datetime64[ns]'), nat),
+            'ultima_venta': np.where(con_venta, ultimo.astype('datetime64[D]').astype('datetime64[ns]'), nat),
+            'dias_con_venta': fin - inicio,
+            'dias_activos': np.where(con_venta, ultimo - primero + 1, 0),
+        }, index=self._ids())
+
+    def comparar(self, dias=30, hasta=None, desfase=None, medida='qty_sold'):
+        """
+        Últimos `dias` días contra el mismo largo `desfase` días antes (por defecto el periodo
+        inmediatamente anterior; desfase=365 compara contra el año pasado). La variación es
+        porcentual y queda nula si el periodo de referencia no tuvo ventas.
+        """
+        fin = _dia(_hoy() if hasta is None else hasta) + 1
+        desfase = dias if desfase is None else desfase
+        acum = self._acum[medida]
+        inicio_a, fin_a = self._tramos(fin - dias, fin)
+        inicio_r, fin_r = self._tramos(fin - dias - desfase, fin - desfase)
+        actual = acum[fin_a] - acum[inicio_a]
+        referencia = acum[fin_r] - acum[inicio_r]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variacion = np.where(referencia > 0, (actual - referencia) / referencia * 100, np.nan)
+        return pd.DataFrame({'actual': actual, 'referencia': referencia, 'variacion_pct': variacion}, index=self._ids())
+
+    def matriz(self, desde, hasta, periodo=1, medida='qty_sold', productos=None):
+        """
+        Matriz densa producto x periodo de `periodo` días con los periodos completos que terminan
+        en `hasta` (el sobrante al comienzo se descarta). Columnas = inicio de cada periodo;
+        `productos` elige y ordena las filas (los que no están en el cubo quedan en cero).
+        """
+        fin = _dia(hasta) + 1
+        n = max((fin - _dia(desde)) // periodo, 0)
+        bordes = fin - periodo * np.arange(n, -1, -1, dtype=np.int64)
+        if productos is None:
+            filas, ids = np.arange(len(self.productos)), self._ids()
+        else:
+            ids = pd.Index(productos, name='product_id')
+            filas = self._indice.get_indexer(ids)
+        base = np.maximum(filas, 0).astype(np.int64)[:, None] << BITS_DIA
+        posiciones = np.searchsorted(self.claves, base + np.clip(bordes, 0, 1 << BITS_DIA)[None, :])
+        valores = np.diff(self._acum[medida][posiciones], axis=1)
+        valores[filas < 0] = 0
+        return pd.DataFrame(valores, index=ids, columns=pd.DatetimeIndex(bordes[:-1].astype('datetime64[D]').astype('datetime64[ns]')))
+
+    def a_frame(self):
+        """Celdas como ventas por producto y día (mismas columnas que get_sales_summary con date_bucket diario)."""
+        return pd.DataFrame({
+            'product_id': self.productos[self.claves >> BITS_DIA],
+            'periodo': (self.claves & MASCARA_DIA).astype('datetime64[D]').astype('datetime64[ns]'),
+            'date': self.fecha_max,
+            'date_min': self.fecha_min,
+            **{m: self.medidas[m] for m in MEDIDAS},
+        })
+
+    def _tramos(self, desde, hasta):
+        """Posiciones [inicio, fin) de las celdas de cada producto con día en [desde, hasta)."""
+        base = np.arange(len(self.productos), dtype=np.int64) << BITS_DIA
+        desde, hasta = (int(np.clip(d, 0, 1 << BITS_DIA)) for d in (desde, hasta))
+        return np.searchsorted(self.claves, base + desde), np.searchsorted(self.claves, base + max(desde, hasta))
+
+    def _ids(self):
+        return pd.Index(self.productos, name='product_id')
+
+
+def _celdas(df, productos):
+    """
+    Ventas de `df` agregadas por (producto, día). Los productos que no están en `productos`
+    se agregan al final (las filas ya asignadas no cambian). Devuelve (productos, claves,
+    medidas, fecha_min, fecha_max) con las claves ordenadas y sin repetir.
+    """
+    if df is None or df.empty:
+        vacio = np.array([], dtype=np.int64)
+        return productos, vacio, {m: np.array([], dtype=float) for m in MEDIDAS}, vacio.astype('datetime64[ns]'), vacio.astype('datetime64[ns]')
+    fecha = df['periodo'] if 'periodo' in df.columns else df['date']
+    validas = df['product_id'].notna() & fecha.notna()
+    if not validas.all():
+        df, fecha = df[validas], fecha[validas]
+    ids = df['product_id'].to_numpy(dtype=np.int64)
+    filas = pd.Index(productos).get_indexer(ids)
+    nuevos = filas < 0
+    if nuevos.any():
+        extra = pd.unique(ids[nuevos])
+        filas[nuevos] = len(productos) + pd.Index(extra).get_indexer(ids[nuevos])
+        productos = np.concatenate([productos, extra])
+    dias = fecha.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    claves = (filas.astype(np.int64) << BITS_DIA) | dias
+    fecha_max = df['date'].to_numpy(dtype='datetime64[ns]')
+    fecha_min = df['date_min'].to_numpy(dtype='datetime64[ns]') if 'date_min' in df.columns else fecha_max
+    medidas = {m: df[m].to_numpy(dtype=float) for m in MEDIDAS}
+    return (productos, *_agrupar(claves, medidas, fecha_min, fecha_max))
+
+
+def _agrupar(claves, medidas, fecha_min, fecha_max):
+    """Ordena las celdas por clave y suma (o toma mín / máx de las fechas) las que se repiten."""
+    if len(claves) == 0:
+        return claves, medidas, fecha_min, fecha_max
+    orden = np.argsort(claves, kind='stable')
+    claves = claves[orden]
+    inicios = np.flatnonzero(np.concatenate(([True], claves[1:] != claves[:-1])))
+    return (
+        claves[inicios],
+        {m: np.add.reduceat(v[orden], inicios) for m, v in medidas.items()},
+        np.minimum.reduceat(fecha_min[orden].view(np.int64), inicios).view('datetime64[ns]'),
+        np.maximum.reduceat(fecha_max[orden].view(np.int64), inicios).view('datetime64[ns]'),
+    )
+
+
+def _dia(fecha):
+    """Fecha -> número de día desde 1970-01-01."""
+    return pd.Timestamp(fecha).normalize().value // _NS_DIA
+
+
+def _fecha(dia):
+    return pd.Timestamp(int(dia) * _NS_DIA)
+
+
+def _hoy():
+    return pd.Timestamp.today().normalize()
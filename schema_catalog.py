@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from frame_cache import CACHE_DIR
+from jsonrpc_transport import make_proxy
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN DEL CATÁLOGO DE ESQUEMAS ---
+SCHEMA_DIR = os.path.join(CACHE_DIR, 'schemas')
+SCHEMA_WORKERS = int(os.getenv("ODOO_SCHEMA_WORKERS", "8"))
+SCHEMA_CHECK_SECONDS = 300  # Entre revisiones de cambios se sirve el catálogo sin tocar Odoo
+ATRIBUTOS = ['string', 'type', 'relation', 'required', 'readonly', 'store']
+
+
+class SchemaCatalog:
+    """
+    Catálogo de `fields_get` de todos los modelos de una base de Odoo.
+    Se guarda en disco (JSON) por base y `server_version`; cada modelo lleva su sello
+    de cambios (write_date de ir.model y de sus ir.model.fields). Al actualizar solo se
+    vuelve a pedir fields_get de los modelos nuevos o cuyo sello cambió, en paralelo con
+    un pool acotado de hilos (el conector es thread-safe).
+    """
+
+    def __init__(self, connector, directory=SCHEMA_DIR, max_workers=SCHEMA_WORKERS, check_seconds=SCHEMA_CHECK_SECONDS):
+        self.connector = connector
+        self.directory = directory
+        self.max_workers = max_workers
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._modelos = None  # {modelo: {'name', 'sello', 'fields' | 'error'}}
+        self._revisado = 0.0
+        self._path = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    # --- API PÚBLICA ---
+    def actualizar(self, force=False):
+        """
+        Sincroniza el catálogo con Odoo y devuelve {'modelos', 'refrescados', 'errores', 'segundos'}.
+        Sin `force`, si la última revisión tiene menos de `check_seconds` no consulta Odoo.
+        """
+        inicio = time.time()
+        with self._lock:
+            self._cargar()
+            if force or time.time() - self._revisado >= self.check_seconds:
+                pendientes = self._refrescar(force)
+            else:
+                pendientes = []
+            errores = sum(1 for m in self._modelos.values() if 'error' in m)
+        resumen = {'modelos': len(self._modelos), 'refrescados': len(pendientes), 'errores': errores,
+                   'segundos': round(time.time() - inicio, 2)}
+        logger.info("Catálogo de esquemas: %s", resumen)
+        return resumen
+
+    def fields(self, model):
+        """fields_get del modelo desde el catálogo (lo pide a Odoo solo si aún no está)."""
+        with self._lock:
+            self._cargar()
+            entrada = self._modelos.get(model)
+            if entrada is not None and 'fields' in entrada:
+                return entrada['fields']
+        campos = self._fields_get(model)
+        if 'error' in campos:
+            raise RuntimeError(campos['error'])
+        with self._lock:
+            entrada = self._modelos.setdefault(model, {'name': model, 'sello': None})
+            entrada.update(campos)
+            entrada.pop('error', None)
+            self._guardar()
+        return campos['fields']
+
+    def resumen(self):
+        """Un DataFrame con una fila por modelo y campo (o por modelo con error)."""
+        self.actualizar()
+        filas = []
+        with self._lock:
+            for modelo in sorted(self._modelos):
+                entrada = self._modelos[modelo]
+                if 'error' in entrada:
+                    filas.append((modelo, entrada['name'], "ERROR", f"Error: {entrada['error']}", ""))
+                    continue
+                for campo, props in entrada['fields'].items():
+                    filas.append((modelo, entrada['name'], campo, props.get('string', ''), props.get('type', '')))
+        return pd.DataFrame(filas, columns=["Modelo", "Nombre Modelo", "Campo", "Descripción", "Tipo"])
+
+    # --- INTERNOS ---
+    def _cargar(self):
+        """Carga (una vez) el catálogo en disco de esta base y versión de servidor."""
+        if self._modelos is not None:
+            return
+        version = make_proxy(self.connector.url, 'common', self.connector.transport).version().get('server_version', '')
+        clave = hashlib.sha1(json.dumps([self.connector.db, version, self.connector.context], sort_keys=True).encode('utf-8')).hexdigest()[:20]
+        self._path = os.path.join(self.directory, f"{self.connector.db}__{clave}.json")
+        try:
+            with open(self._path, encoding='utf-8') as f:
+                self._modelos = json.load(f)
+        except (OSError, ValueError):
+            self._modelos = {}
+
+    def _guardar(self):
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._modelos, f)
+            os.replace(tmp, self._path)
+        except OSError as e:
+            logger.warning("No se pudo guardar el catálogo de esquemas: %s", e)
+
+    def _refrescar(self, force):
+        """Compara sellos con Odoo, pide fields_get de lo que cambió y guarda si hubo cambios."""
+        sellos = self._sellos()
+        borrados = set(self._modelos) - set(sellos)
+        for modelo in borrados:
+            del self._modelos[modelo]
+        # Nuevos, modificados o que fallaron la vez anterior
+        pendientes = [m for m, (_, sello) in sellos.items()
+                      if force or self._modelos.get(m, {}).get('sello') != sello or 'fields' not in self._modelos[m]]
+        for modelo, campos in zip(pendientes, self._fields_get_paralelo(pendientes)):
+            nombre, sello = sellos[modelo]
+            entrada = {'name': nombre, 'sello': sello}
+            entrada.update(campos)
+            self._modelos[modelo] = entrada
+        self._revisado = time.time()
+        if pendientes or borrados:
+            self._guardar()
+        return pendientes
+
+    def _sellos(self):
+        """{modelo: (nombre, sello)}: el sello combina el write_date del modelo y el de sus campos."""
+        registros = self.connector.execute_kw('ir.model', 'search_read', [[]], {'fields': ['model', 'name', 'write_date']})
+        try:
+            grupos = self.connector.execute_kw(
+                'ir.model.fields', 'read_group', [[], ['write_date:max'], ['model_id']], {'lazy': False}
+            )
+            campos = {g['model_id'][0]: g.get('write_date') for g in grupos if g.get('model_id')}
+        except Exception as e:
+            # Sin acceso a ir.model.fields basta el write_date del modelo
+            logger.info("Sin sello de ir.model.fields (%s); se usa solo ir.model.write_date", e)
+            campos = {}
+        return {r['model']: (r['name'], f"{r.get('write_date')}|{campos.get(r['id'])}") for r in registros}
+
+    def _fields_get(self, model):
+        try:
+            return {'fields': self.connector.execute_kw(model, 'fields_get', [], {'attributes': ATRIBUTOS})}
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _fields_get_paralelo(self, modelos):
+        if not modelos:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(modelos)))) as pool:
+            return list(pool.map(self._fields_get, modelos))
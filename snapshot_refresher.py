@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURACIÓN DEL REFRESCO EN SEGUNDO PLANO ---
+REFRESH_SECONDS = int(os.getenv("ODOO_REFRESH_SECONDS", "240"))  # Antes de que venza el TTL de 300 s
+RETRY_SECONDS = 30  # Espera inicial tras un fallo de Odoo (se duplica hasta REFRESH_SECONDS)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Versión inmutable de los datos: los frames, cuándo se extrajeron y su número de versión."""
+    frames: dict
+    as_of: datetime
+    version: int
+    segundos: float = 0.0
+    extra: dict = field(default_factory=dict)
+
+
+class SnapshotRefresher:
+    """
+    Refresco "stale-while-revalidate" de los datos del dashboard.
+    Un hilo daemon ejecuta `loader()` (que devuelve un dict de DataFrames) cada
+    `intervalo` segundos y publica el resultado como un Snapshot nuevo con una sola
+    asignación de referencia (atómica): los usuarios siempre leen una versión completa
+    y nunca esperan la extracción de Odoo, salvo en el arranque en frío.
+    Si Odoo está lento o caído se sigue sirviendo la última versión buena y se
+    reintenta con espera exponencial; el error queda en `last_error`.
+    """
+
+    def __init__(self, loader, intervalo=REFRESH_SECONDS, espera_error=RETRY_SECONDS, nombre='odoo-refresher'):
+        self.loader = loader
+        self.intervalo = intervalo
+        self.espera_error = espera_error
+        self.nombre = nombre
+        self.last_error = None
+        self.last_error_at = None
+        self._snapshot = None
+        self._primera = threading.Event()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Arranca el hilo de refresco (idempotente)."""
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._run, name=self.nombre, daemon=True)
+                self._hilo.start()
+        return self
+
+    def snapshot(self, timeout=None):
+        """
+        Última versión publicada. Solo bloquea si todavía no hay ninguna (arranque en frío),
+        hasta `timeout` segundos; devuelve None si la primera carga no terminó o falló.
+        """
+        actual = self._snapshot
+        if actual is None:
+            self._primera.wait(timeout)
+            actual = self._snapshot
+        return actual
+
+    def refresh_now(self):
+        """Pide un refresco inmediato sin esperarlo (ej. botón "Actualizar")."""
+        self._despertar.set()
+
+    def _refrescar(self):
+        inicio = time.time()
+        frames = self.loader()
+        anterior = self._snapshot
+        self._snapshot = Snapshot(
+            frames=frames, as_of=datetime.now(), version=(anterior.version + 1) if anterior else 1,
+            segundos=round(time.time() - inicio, 2),
+        )
+        self.last_error = None
+
+    def _run(self):
+        espera = self.espera_error
+        while True:
+            try:
+                self._refrescar()
+                espera = self.espera_error
+                pausa = self.intervalo
+            except Exception as e:
+                # Se conserva la última versión buena; se reintenta antes que en el ciclo normal
+                logger.warning("Refresco de datos falló; se mantiene la versión anterior: %s", e)
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.last_error_at = datetime.now()
+                pausa = espera
+                espera = min(espera * 2, self.intervalo)
+            finally:
+                self._primera.set()
+            self._despertar.wait(pausa)
+            self._despertar.clear()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_forecast import CROSTON, SES, SIN_VENTAS, pronosticar, stock_seguridad
+
+
+def matriz(*series):
+    return pd.DataFrame(list(series), index=pd.Index(range(1, len(series) + 1), name='product_id'), dtype=float)
+
+
+def test_ses_sobre_serie_calculada_a_mano():
+    # Los ceros antes de la primera venta no cuentan: la serie es 4, 2, 6, 4
+    out = pronosticar(matriz([0, 0, 4, 2, 6, 4]), periodo_dias=7, validacion=2).loc[1]
+
+    # Nivel con alfa a: 4 -> 4-2a -> 4+2a² -> 4+2a²-2a³; el error cuadrático crece con a,
+    # así que gana el alfa más chico de la grilla (0.1)
+    assert out['modelo'] == SES
+    assert out['alfa'] == pytest.approx(0.1)
+    assert out['adi'] == pytest.approx(1.0)
+    assert out['demanda_periodo'] == pytest.approx(4.018)
+    assert out['demanda_diaria'] == pytest.approx(4.018 / 7)
+    # Validación en los dos últimos periodos: errores 6 - 3.8 = 2.2 y 4 - 4.02 = -0.02
+    assert out['mae'] == pytest.approx((2.2 + 0.02) / 2)
+    assert out['desvio_diario'] == pytest.approx(np.sqrt((2.2 ** 2 + 0.02 ** 2) / 2) / np.sqrt(7))
+
+
+def test_croston_sobre_serie_calculada_a_mano():
+    out = pronosticar(matriz([0, 3, 0, 0, 3, 0, 6, 0]), periodo_dias=7, validacion=2).loc[1]
+
+    # Demanda cada 2.33 periodos: intermitente. Con alfa 0.1, tras la primera venta (3):
+    # venta 3 a los 3 periodos -> tamaño 3, intervalo 1 + 0.1 x (3 - 1) = 1.2
+    # venta 6 a los 2 periodos -> tamaño 3.3, intervalo 1.2 + 0.1 x (2 - 1.2) = 1.28
+    # Pronóstico SBA: (1 - 0.1 / 2) x 3.3 / 1.28
+    assert out['modelo'] == CROSTON
+    assert np.isnan(out['alfa'])
+    assert out['adi'] == pytest.approx(7 / 3)
+    assert out['demanda_periodo'] == pytest.approx(0.95 * 3.3 / 1.28)
+    # Validación: 6 contra 0.95 x 3 / 1.2 = 2.375 y 0 contra el pronóstico final
+    assert out['mae'] == pytest.approx((6 - 2.375 + 0.95 * 3.3 / 1.28) / 2)
+
+
+def test_sin_ventas_y_stock_de_seguridad():
+    out = pronosticar(matriz([0, 0, 0, 0], [5, 5, 5, 5]), periodo_dias=7, validacion=2)
+
+    assert out['modelo'].tolist() == [SIN_VENTAS, SES]
+    assert out['demanda_periodo'].tolist() == pytest.approx([0.0, 5.0])
+    assert out['desvio_diario'].tolist() == pytest.approx([0.0, 0.0])
+    # z(95%) = 1.645 x desvío diario x raíz de los días de reposición
+    assert stock_seguridad([2.0], dias_reposicion=4, nivel_servicio=0.95) == pytest.approx([1.6449 * 2 * 2], rel=1e-4)
@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex
+
+
+def filtrar_con_mascara(df, **filtros):
+    """Filtrado original: una máscara booleana por cada filtro activo."""
+    for col, valor in filtros.items():
+        if valor != 'Todas':
+            df = df[df[col] == valor]
+    return df
+
+
+def maestro_sintetico(n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    categ = rng.choice(['All / Ropa', 'All / Calzado', 'All / Accesorios', None], n, p=[0.4, 0.3, 0.2, 0.1])
+    abc = pd.Categorical(rng.choice(['A', 'B', 'C'], n), categories=['A', 'B', 'C', 'Sin Ventas'])
+    ubicacion = rng.choice([f"WH{i:02d}/Stock" for i in range(6)], n)
+    # Índice no correlativo: las vistas deben conservarlo igual que la máscara
+    return pd.DataFrame({'categ_name': categ, 'clasificacion_abc': abc, 'location_name': ubicacion,
+                         'stock': rng.integers(0, 100, n)}, index=rng.permutation(n) * 2)
+
+
+def test_vistas_igual_a_mascara_booleana():
+    df = maestro_sintetico()
+    indice = FilterIndex(df, ['categ_name', 'clasificacion_abc', 'location_name'])
+    opciones = {col: ['Todas'] + list(df[col].dropna().unique()) + ['No existe'] for col in ['categ_name', 'clasificacion_abc', 'location_name']}
+
+    for combinacion in itertools.product(*opciones.values()):
+        filtros = dict(zip(opciones, combinacion))
+        pd.testing.assert_frame_equal(indice.vista(**filtros), filtrar_con_mascara(df, **filtros))
+
+
+def test_sin_filtros_devuelve_el_mismo_frame():
+    df = maestro_sintetico()
+    indice = FilterIndex(df, ['categ_name', 'location_name'])
+
+    assert indice.posiciones(categ_name='Todas', location_name=None) is None
+    assert indice.vista(categ_name='Todas') is df
+
+
+def test_valores_en_orden_de_aparicion_sin_nulos():
+    df = maestro_sintetico()
+    indice = FilterIndex(df, ['categ_name', 'clasificacion_abc', 'location_name'])
+
+    assert indice.valores('categ_name') == list(df['categ_name'].dropna().unique())
+    # Las categorías sin filas no aparecen como opción
+    assert indice.valores('clasificacion_abc') == list(df['clasificacion_abc'].dropna().unique())
+
+    posiciones = indice.posiciones(location_name='WH02/Stock')
+    vista = filtrar_con_mascara(df, location_name='WH02/Stock')
+    assert indice.valores('categ_name', posiciones) == list(vista['categ_name'].dropna().unique())
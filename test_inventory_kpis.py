@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from inventory_kpis import calcular_kpis_inventario
+
+
+def kpis_fila_a_fila(df_master):
+    """Versión original (apply por fila) que el motor vectorizado debe reproducir."""
+    df_master = df_master.copy()
+    df_master['dias_inventario'] = df_master.apply(
+        lambda row: row['stock_total_teorico'] / row['venta_diaria_promedio'] if row['venta_diaria_promedio'] > 0 else 999, axis=1
+    )
+
+    def clasificar_stock(row):
+        if row['stock_total_teorico'] <= 0: return "🔴 Agotado"
+        if row['dias_inventario'] < 10: return "🟠 Crítico (Reabastecer)"
+        if row['dias_inventario'] > 90: return "🔵 Sobre-stock"
+        return "🟢 Saludable"
+
+    df_master['estado_inventario'] = df_master.apply(clasificar_stock, axis=1)
+    return df_master
+
+
+def maestro_sintetico(n=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    stock = rng.integers(-5, 500, n).astype(float)
+    venta = np.round(rng.exponential(2.0, n), 2)
+    venta[rng.random(n) < 0.3] = 0
+    # Casos borde: exactamente en los umbrales de 10 y 90 días
+    stock[:4], venta[:4] = [10, 90, 20, 0], [1, 1, 2, 3]
+    return pd.DataFrame({'product_id': np.arange(n), 'stock_total_teorico': stock, 'venta_diaria_promedio': venta})
+
+
+def test_kpis_vectorizados_igual_a_fila_a_fila():
+    df = maestro_sintetico()
+    esperado = kpis_fila_a_fila(df)
+    obtenido = calcular_kpis_inventario(df.copy())
+
+    pd.testing.assert_series_equal(obtenido['dias_inventario'], esperado['dias_inventario'].astype(float))
+    pd.testing.assert_series_equal(obtenido['estado_inventario'].astype(str), esperado['estado_inventario'].astype(str))
+
+
+def test_umbrales_configurables():
+    df = pd.DataFrame({'stock_total_teorico': [0.0, 50.0, 50.0, 50.0, 50.0], 'venta_diaria_promedio': [1.0, 10.0, 0.5, 1.0, 0.0]})
+    out = calcular_kpis_inventario(df, dias_critico=6, dias_sobrestock=60, dias_sin_venta=500)
+
+    assert out['dias_inventario'].tolist() == [0.0, 5.0, 100.0, 50.0, 500.0]
+    assert out['estado_inventario'].tolist() == ["🔴 Agotado", "🟠 Crítico (Reabastecer)", "🔵 Sobre-stock", "🟢 Saludable", "🔵 Sobre-stock"]
+    assert isinstance(out['estado_inventario'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,200 @@
+import operator
+import threading
+import xmlrpc.client
+
+import pandas as pd
+import pytest
+
+import odoo_client
+from frame_cache import FrameDiskCache
+from odoo_client import OdooConnector, es_error_de_conexion, get_connector
+
+OPERADORES = {'=': operator.eq, '>=': operator.ge, '>': operator.gt, '<': operator.lt,
+              'in': lambda valor, opciones: valor in opciones}
+
+
+class OdooEnMemoria:
+    """Servicios `common` y `object` de Odoo sobre tablas en memoria (lista de dicts por modelo)."""
+
+    def __init__(self, tablas, many2one=None):
+        self.tablas = tablas
+        self.many2one = many2one or {}
+        self.leidas = []  # (modelo, dominio, filas) de cada search_read
+        self.last_request_bytes = self.last_response_bytes = 0
+        self.last_parse_seconds = 0.0
+
+    def __call__(self, attr):
+        return self if attr == 'transport' else (lambda: None)
+
+    def authenticate(self, db, username, password, env):
+        return 2
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        kwargs = kwargs or {}
+        if method == 'fields_get':
+            return {campo: {'type': 'many2one', 'relation': rel} for campo, rel in self.many2one.get(model, {}).items()}
+        registros = sorted((r for r in self.tablas[model] if _cumple(r, list(args[0]))), key=operator.itemgetter('id'))
+        if method == 'search':
+            return [r['id'] for r in registros]
+        offset, limit = kwargs.get('offset', 0), kwargs.get('limit') or len(registros)
+        pagina = [{'id': r['id'], **{f: r[f] for f in kwargs['fields'] if f != 'id'}} for r in registros[offset:offset + limit]]
+        self.leidas.append((model, args[0], len(pagina)))
+        return pagina
+
+
+def _cumple(registro, dominio):
+    """Evalúa un dominio de Odoo (notación polaca con '|' y '&' implícito)."""
+    def evaluar(pila):
+        termino = pila.pop(0)
+        if termino == '|':
+            a, b = evaluar(pila), evaluar(pila)
+            return a or b
+        campo, op, valor = termino
+        return OPERADORES[op](registro[campo], valor)
+
+    pila = list(dominio)
+    resultado = True
+    while pila:
+        resultado = evaluar(pila) and resultado
+    return resultado
+
+
+@pytest.fixture
+def odoo(monkeypatch):
+    servidor = OdooEnMemoria({
+        'stock.quant': [
+            {'id': i, 'product_id': [i % 3 + 1, f"Producto {i % 3 + 1}"], 'quantity': float(i), 'write_date': f"2026-10-01 10:00:{i:02d}"}
+            for i in range(1, 11)
+        ],
+        'product.product': [
+            {'id': i, 'name': f"Producto {i}", 'default_code': f"REF-{i}", 'categ_id': [1, 'All'], 'list_price': 10.0,
+             'standard_price': 5.0, 'qty_available': 100.0, 'virtual_available': 100.0, 'uom_id': [1, 'Unidades'],
+             'active': True, 'x_studio_ref_madre': False, 'write_date': f"2026-10-01 10:00:{i:02d}"}
+            for i in range(1, 6)
+        ],
+    }, many2one={'stock.quant': {'product_id': 'product.product'},
+                 'product.product': {'categ_id': 'product.category', 'uom_id': 'uom.uom'}})
+    monkeypatch.setattr(odoo_client, 'make_proxy', lambda url, service, transport='xmlrpc': servidor)
+    monkeypatch.setattr(odoo_client, 'DISK_CACHE', False)
+    return servidor
+
+
+def conector():
+    return OdooConnector('http://odoo', 'db', 'admin', 'admin')
+
+
+def lectura_completa(connector, model, fields):
+    return connector.fetch_frame(model, [], fields).sort_values('id', ignore_index=True)
+
+
+def test_incremental_mismas_columnas_que_lectura_completa(odoo):
+    connector = conector()
+    fields = ['product_id', 'quantity']
+
+    incremental = connector.fetch_frame('stock.quant', [], fields, incremental=True)
+    pd.testing.assert_frame_equal(incremental, lectura_completa(connector, 'stock.quant', fields))
+    assert 'id' in incremental.columns and 'write_date' not in incremental.columns
+
+
+def test_incremental_fusiona_altas_cambios_y_bajas(odoo):
+    connector = conector()
+    fields = ['product_id', 'quantity']
+    connector.fetch_frame('stock.quant', [], fields, incremental=True)
+
+    quants = odoo.tablas['stock.quant']
+    quants[2].update(quantity=99.0, write_date='2026-10-02 08:00:00')   # cambio
+    quants.append({'id': 11, 'product_id': [2, 'Producto 2'], 'quantity': 7.0, 'write_date': '2026-09-01 00:00:00'})  # alta (id nuevo)
+    del quants[5]                                                         # baja (id 6)
+    odoo.leidas.clear()
+
+    incremental = connector.fetch_frame('stock.quant', [], fields, incremental=True)
+
+    # Solo viajan el modificado, el nuevo y el de la marca de agua (>= no pierde cambios del mismo segundo)
+    assert sum(filas for _, _, filas in odoo.leidas) == 3
+    pd.testing.assert_frame_equal(incremental, lectura_completa(connector, 'stock.quant', fields))
+    assert 6 not in incremental['id'].tolist()
+    assert incremental.set_index('id').loc[3, 'quantity'] == 99.0
+
+
+def test_incremental_relee_campos_calculados(odoo):
+    connector = conector()
+    antes = connector.get_products_detailed(incremental=True)
+    assert (antes['stock_total_teorico'] == 100).all()
+
+    # qty_available cambia con los movimientos de stock sin tocar write_date del producto
+    odoo.tablas['product.product'][0].update(qty_available=40.0, virtual_available=35.0)
+    despues = connector.get_products_detailed(incremental=True).set_index('product_id')
+
+    assert despues.loc[1, 'stock_total_teorico'] == 40.0
+    assert despues.loc[1, 'virtual_available'] == 35.0
+    assert (despues.drop(1)['stock_total_teorico'] == 100).all()
+
+
+def test_arranque_en_frio_parte_del_frame_en_disco(odoo, tmp_path):
+    fields = ['product_id', 'quantity']
+    primero = conector()
+    primero.disk_cache = FrameDiskCache(str(tmp_path))
+    primero.fetch_frame('stock.quant', [], fields, incremental=True)
+
+    odoo.tablas['stock.quant'][0].update(quantity=50.0, write_date='2026-10-02 08:00:00')
+    odoo.leidas.clear()
+    # Otro proceso (reinicio): sin estado en memoria, se siembra la marca de agua desde el disco
+    reinicio = conector()
+    reinicio.disk_cache = FrameDiskCache(str(tmp_path))
+    df = reinicio.fetch_frame('stock.quant', [], fields, incremental=True)
+
+    assert sum(filas for _, _, filas in odoo.leidas) == 2
+    pd.testing.assert_frame_equal(df, lectura_completa(reinicio, 'stock.quant', fields))
+    assert df.set_index('id').loc[1, 'quantity'] == 50.0
+
+
+class AutenticacionLenta(OdooEnMemoria):
+    """Odoo cuya autenticación espera a `liberar` (un servidor lento o que no responde)."""
+
+    def __init__(self):
+        super().__init__({})
+        self.liberar = threading.Event()
+        self.autenticaciones = 0
+
+    def authenticate(self, db, username, password, env):
+        self.autenticaciones += 1
+        self.liberar.wait(5)
+        return 2
+
+
+@pytest.fixture
+def registro(monkeypatch):
+    monkeypatch.setattr(odoo_client, '_CONECTORES', {})
+    monkeypatch.setattr(odoo_client, '_CANDADOS_CLAVE', {})
+    monkeypatch.setattr(odoo_client, 'DISK_CACHE', False)
+    lento, rapido = AutenticacionLenta(), OdooEnMemoria({})
+    monkeypatch.setattr(odoo_client, 'make_proxy', lambda url, service, transport='xmlrpc': lento if 'lento' in url else rapido)
+    return lento
+
+
+def test_un_odoo_lento_no_bloquea_a_los_demas(registro):
+    hilos = [threading.Thread(target=get_connector, args=('http://lento', 'db', 'admin', 'admin')) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        # Mientras el lento autentica, otras credenciales se conectan sin esperarlo
+        rapido = threading.Thread(target=get_connector, args=('http://rapido', 'db', 'admin', 'admin'))
+        rapido.start()
+        rapido.join(timeout=1)
+        assert not rapido.is_alive()
+    finally:
+        registro.liberar.set()
+        for hilo in hilos:
+            hilo.join()
+    # Las mismas credenciales se autentican una sola vez y comparten el conector
+    assert registro.autenticaciones == 1
+    assert get_connector('http://lento', 'db', 'admin', 'admin') is get_connector('http://lento', 'db', 'admin', 'admin')
+
+
+def test_errores_de_conexion_y_de_datos():
+    assert es_error_de_conexion(ConnectionRefusedError())
+    assert es_error_de_conexion(TimeoutError())
+    assert es_error_de_conexion(xmlrpc.client.ProtocolError('odoo/xmlrpc/2/object', 502, 'Bad Gateway', {}))
+    assert es_error_de_conexion(xmlrpc.client.Fault(3, 'Access Denied'))
+    assert not es_error_de_conexion(xmlrpc.client.Fault(1, "Invalid field 'foo' on model 'stock.quant'"))
+    assert not es_error_de_conexion(ValueError('fila inválida'))
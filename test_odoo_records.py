@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from odoo_records import NameRegistry, es_false, normalizar_registros, split_many2one
+
+
+def test_split_many2one_sin_vacios():
+    ids, nombres = split_many2one([[3, 'WH/Stock'], [1, 'WH'], [3, 'WH/Stock']])
+
+    assert ids.dtype == np.int64
+    assert ids.tolist() == [3, 1, 3]
+    assert nombres.tolist() == ['WH/Stock', 'WH', 'WH/Stock']
+
+
+def test_split_many2one_con_false_y_vacios():
+    ids, nombres = split_many2one([False, [7, 'Cliente'], None, [7, 'Cliente']])
+
+    assert isinstance(ids.dtype, pd.Int64Dtype)
+    assert ids.tolist() == [pd.NA, 7, pd.NA, 7]
+    assert nombres.tolist() == [None, 'Cliente', None, 'Cliente']
+
+    ids, nombres = split_many2one([])
+    assert len(ids) == 0 and len(nombres) == 0
+
+
+def test_split_many2one_reutiliza_los_nombres_del_registro():
+    registry = NameRegistry()
+    _, primeros = split_many2one([[1, 'Producto A']], 'product.product', registry)
+    # Otra página trae el mismo nombre como un string distinto: se devuelve el ya guardado
+    _, segundos = split_many2one([[1, ''.join(['Producto', ' A'])]], 'product.product', registry)
+
+    assert segundos[0] is primeros[0]
+    assert registry.nombre('product.product', 1) == 'Producto A'
+
+
+def test_normalizar_registros_separa_many2one():
+    records = [
+        {'id': 1, 'location_id': [8, 'WH/Stock'], 'quantity': 2.0, 'lot_id': False},
+        {'id': 2, 'location_id': False, 'quantity': 0.0, 'lot_id': [4, 'L-04']},
+    ]
+    columnas = normalizar_registros(records, {'location_id': 'stock.location', 'lot_id': 'stock.lot'})
+
+    assert list(columnas) == ['id', 'location_id', 'location_name', 'quantity', 'lot_id', 'lot_name']
+    assert list(columnas['location_id']) == [8, pd.NA]
+    assert list(columnas['location_name']) == ['WH/Stock', None]
+    assert list(columnas['lot_name']) == [None, 'L-04']
+    assert columnas['quantity'] == [2.0, 0.0]
+
+
+def test_normalizar_registros_detecta_many2one_y_solo_nombre():
+    records = [{'id': 1, 'product_id': False, 'name': 'x'}, {'id': 2, 'product_id': [5, 'Producto'], 'name': False}]
+
+    columnas = normalizar_registros(records)
+    assert list(columnas) == ['id', 'product_id', 'product_name', 'name']
+    assert columnas['name'] == ['x', False]
+    assert es_false(columnas['name']).tolist() == [False, True]
+
+    columnas = normalizar_registros(records, solo_nombre=True)
+    assert list(columnas) == ['id', 'product_id', 'name']
+    assert list(columnas['product_id']) == [None, 'Producto']
+
+    assert normalizar_registros([]) == {}
+
+
+def test_normalizar_registros_no_pisa_un_campo_real():
+    # En res.partner company_name es un campo de texto propio, distinto del nombre de company_id
+    records = [{'id': 1, 'company_id': [1, 'Mi Empresa'], 'company_name': 'Razón social del contacto'}]
+    columnas = normalizar_registros(records, {'company_id': 'res.company'})
+
+    assert columnas['company_name'] == ['Razón social del contacto']
+    assert list(columnas['company_id_display']) == ['Mi Empresa']
+    assert list(columnas['company_id']) == [1]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rebalancing import COLUMNAS_SUGERENCIA, sugerir_traslados
+
+
+def traslados_fila_a_fila(stock_pivot, bodegas, filtro_origen="Todas", filtro_destino="Todas"):
+    """Versión original (iterrows x origen x destino) que el motor vectorizado debe reproducir."""
+    sugerencias = []
+    for _, row in stock_pivot.iterrows():
+        for b_origen in bodegas:
+            for b_destino in bodegas:
+                if b_origen == b_destino: continue
+                if filtro_origen != "Todas" and b_origen != filtro_origen: continue
+                if filtro_destino != "Todas" and b_destino != filtro_destino: continue
+
+                q_origen = row[b_origen]
+                q_destino = row[b_destino]
+                if q_origen >= 5 and q_destino <= 1:
+                    sugerencias.append({
+                        'Aprobar': False,
+                        'Referencia': row['default_code'],
+                        'Producto': row['name'],
+                        'Bodega Origen': b_origen,
+                        'Bodega Destino': b_destino,
+                        'Stock Origen': q_origen,
+                        'Stock Destino': q_destino,
+                        'Cant. Sugerida (Editar)': int(q_origen * 0.3),
+                    })
+    return pd.DataFrame(sugerencias, columns=COLUMNAS_SUGERENCIA)
+
+
+def pivot_sintetico(n=2000, bodegas=8, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'product_id': rng.integers(1, 500, n),
+        'location_name': rng.choice([f"WH{i:02d}/Stock" for i in range(bodegas)], n),
+        'stock_real_ubicacion': rng.integers(0, 20, n).astype(float),
+    })
+    df['name'] = 'Producto ' + df['product_id'].astype(str)
+    df['default_code'] = 'REF-' + df['product_id'].astype(str)
+    stock_pivot = df.pivot_table(index=['product_id', 'name', 'default_code'], columns='location_name',
+                                 values='stock_real_ubicacion', fill_value=0).reset_index()
+    stock_pivot.columns.name = None
+    bodegas_cols = [c for c in stock_pivot.columns if c not in ['product_id', 'name', 'default_code']]
+    return stock_pivot, bodegas_cols
+
+
+@pytest.mark.parametrize('filtro_origen, filtro_destino', [
+    ("Todas", "Todas"), ("WH03/Stock", "Todas"), ("Todas", "WH05/Stock"), ("WH01/Stock", "WH02/Stock"),
+])
+def test_traslados_vectorizados_igual_a_fila_a_fila(filtro_origen, filtro_destino):
+    stock_pivot, bodegas = pivot_sintetico()
+    esperado = traslados_fila_a_fila(stock_pivot, bodegas, filtro_origen, filtro_destino)
+    obtenido = sugerir_traslados(
+        stock_pivot, bodegas,
+        None if filtro_origen == "Todas" else filtro_origen,
+        None if filtro_destino == "Todas" else filtro_destino,
+    )
+
+    assert len(obtenido) == len(esperado) > 0
+    pd.testing.assert_frame_equal(obtenido, esperado, check_dtype=False)
+
+
+def test_misma_bodega_como_origen_y_destino_no_sugiere():
+    stock_pivot, bodegas = pivot_sintetico()
+    assert sugerir_traslados(stock_pivot, bodegas, bodegas[0], bodegas[0]).empty
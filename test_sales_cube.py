@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from sales_cube import SalesCube
+
+HOY = pd.Timestamp('2026-10-17')
+
+
+def lineas_sinteticas(n=20000, productos=300, dias=400, seed=11):
+    rng = np.random.default_rng(seed)
+    # Horas dentro del día: el cubo debe agrupar por día calendario
+    date = HOY - pd.to_timedelta(rng.integers(0, dias * 86_400, n), unit='s')
+    qty = rng.integers(1, 10, n).astype(float)
+    return pd.DataFrame({'product_id': rng.integers(1, productos, n), 'date': date,
+                         'qty_sold': qty, 'revenue': qty * rng.uniform(5, 50, n)})
+
+
+def sumas_con_groupby(lineas, desde, hasta, medida='qty_sold'):
+    """Total por producto entre dos días (ambos inclusive) agrupando las líneas."""
+    dia = lineas['date'].dt.normalize()
+    en_rango = lineas[(dia >= desde) & (dia <= hasta)]
+    return en_rango.groupby('product_id')[medida].sum()
+
+
+def test_ventanas_igual_a_groupby():
+    lineas = lineas_sinteticas()
+    cubo = SalesCube.desde_frame(lineas)
+    velocidades = cubo.velocidades(hasta=HOY)
+
+    for dias in (7, 30, 90):
+        esperado = sumas_con_groupby(lineas, HOY - pd.Timedelta(days=dias - 1), HOY) / dias
+        obtenido = velocidades[f'venta_{dias}d']
+        np.testing.assert_allclose(obtenido.reindex(esperado.index).to_numpy(), esperado.to_numpy())
+        # Los productos sin ventas en la ventana quedan en cero
+        assert (obtenido.drop(esperado.index) == 0).all()
+
+    for medida in ('qty_sold', 'revenue'):
+        esperado = sumas_con_groupby(lineas, pd.Timestamp('2026-01-01'), pd.Timestamp('2026-03-31'), medida)
+        obtenido = cubo.ventas('2026-01-01', '2026-03-31', medida)
+        np.testing.assert_allclose(obtenido.reindex(esperado.index).to_numpy(), esperado.to_numpy())
+
+
+def test_matriz_semanal_igual_a_groupby():
+    lineas = lineas_sinteticas()
+    cubo = SalesCube.desde_frame(lineas)
+    matriz = cubo.matriz('2025-10-18', HOY, periodo=7)
+
+    assert matriz.shape[1] == 52
+    for inicio in matriz.columns[[0, 25, 51]]:
+        esperado = sumas_con_groupby(lineas, inicio, inicio + pd.Timedelta(days=6))
+        np.testing.assert_allclose(matriz[inicio].reindex(esperado.index).to_numpy(), esperado.to_numpy())
+
+
+def test_actualizaciones_igual_a_armar_de_nuevo():
+    lineas = lineas_sinteticas()
+    completo = SalesCube.desde_frame(lineas)
+    desde = HOY - pd.Timedelta(days=3)
+
+    # con_dias reemplaza los últimos días (aunque el cubo viejo ya tuviera parte de ellos)
+    viejo = SalesCube.desde_frame(lineas[lineas['date'] < HOY - pd.Timedelta(days=1)])
+    releido = viejo.con_dias(lineas[lineas['date'] >= desde], desde)
+    # agregar suma líneas nuevas
+    sumado = SalesCube.desde_frame(lineas.iloc[:5000]).agregar(lineas.iloc[5000:])
+
+    esperado = completo.velocidades(hasta=HOY)
+    for cubo in (releido, sumado):
+        pd.testing.assert_frame_equal(cubo.velocidades(hasta=HOY).loc[esperado.index], esperado)
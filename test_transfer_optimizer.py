@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from transfer_optimizer import COLUMNAS_PLAN, plan_traslados
+
+
+def frames(stock, demanda):
+    """stock / demanda como tuplas (product_id, location_name, cantidad)."""
+    df_stock = pd.DataFrame(stock, columns=['product_id', 'location_name', 'stock_real_ubicacion'])
+    df_stock['name'] = 'Producto ' + df_stock['product_id'].astype(str)
+    df_stock['default_code'] = 'REF-' + df_stock['product_id'].astype(str)
+    return df_stock, pd.DataFrame(demanda, columns=['product_id', 'location_name', 'venta_diaria'])
+
+
+def red_sintetica(productos=200, bodegas=6, seed=5):
+    rng = np.random.default_rng(seed)
+    ubicaciones = [f"WH{i:02d}/Stock" for i in range(bodegas)]
+    pares = [(p, u) for p in range(1, productos + 1) for u in ubicaciones]
+    stock = [(p, u, float(rng.integers(0, 200))) for p, u in pares]
+    demanda = [(p, u, float(np.round(rng.exponential(1.0), 2))) for p, u in pares if rng.random() < 0.7]
+    return frames(stock, demanda)
+
+
+def limites(df_stock, df_demanda, dias_objetivo=30, dias_maximos=60):
+    """Excedente y necesidad por (producto, bodega) con las mismas reglas que el optimizador."""
+    pares = pd.merge(df_stock, df_demanda, on=['product_id', 'location_name'], how='outer').fillna({'stock_real_ubicacion': 0, 'venta_diaria': 0})
+    pares['Referencia'] = 'REF-' + pares['product_id'].astype(str)
+    pares['excedente'] = np.floor(np.maximum(pares['stock_real_ubicacion'] - np.ceil(pares['venta_diaria'] * dias_maximos), 0))
+    pares['necesidad'] = np.ceil(np.maximum(pares['venta_diaria'] * dias_objetivo - pares['stock_real_ubicacion'], 0))
+    return pares.set_index(['Referencia', 'location_name'])
+
+
+def test_productos_sin_excedente_y_necesidad_a_la_vez():
+    # Sobra el producto 1 en A y falta el producto 2 en B: no hay nada que mover
+    df_stock, df_demanda = frames([(1, 'A', 100.0), (2, 'A', 0.0), (2, 'B', 0.0)],
+                                  [(1, 'A', 1.0), (2, 'B', 1.0)])
+    plan = plan_traslados(df_stock, df_demanda)
+
+    assert plan.empty
+    assert list(plan.columns) == COLUMNAS_PLAN
+
+
+def test_reparto_voraz_calculado_a_mano():
+    # A tiene 100 y vende 1/día: conserva 60, sobran 40. B (0 días) necesita 30 y C (10 días) 20
+    df_stock, df_demanda = frames([(1, 'A', 100.0), (1, 'B', 0.0), (1, 'C', 10.0)],
+                                  [(1, 'A', 1.0), (1, 'B', 1.0), (1, 'C', 1.0)])
+    plan = plan_traslados(df_stock, df_demanda)
+
+    assert plan[['Bodega Origen', 'Bodega Destino', 'Cant. Sugerida (Editar)']].values.tolist() == [['A', 'B', 30], ['A', 'C', 10]]
+
+
+def test_filtros_de_origen_y_destino():
+    df_stock, df_demanda = red_sintetica()
+    plan = plan_traslados(df_stock, df_demanda, origen='WH01/Stock')
+    assert not plan.empty and (plan['Bodega Origen'] == 'WH01/Stock').all()
+
+    plan = plan_traslados(df_stock, df_demanda, destino='WH02/Stock')
+    assert not plan.empty and (plan['Bodega Destino'] == 'WH02/Stock').all()
+
+    plan = plan_traslados(df_stock, df_demanda, origen='WH03/Stock', destino='WH04/Stock')
+    assert ((plan['Bodega Origen'] == 'WH03/Stock') & (plan['Bodega Destino'] == 'WH04/Stock')).all()
+
+
+def test_no_se_mueve_mas_que_el_excedente_ni_la_necesidad():
+    df_stock, df_demanda = red_sintetica()
+    plan = plan_traslados(df_stock, df_demanda)
+    tope = limites(df_stock, df_demanda)
+
+    assert not plan.empty
+    assert (plan['Bodega Origen'] != plan['Bodega Destino']).all()
+    enviado = plan.groupby(['Referencia', 'Bodega Origen'])['Cant. Sugerida (Editar)'].sum()
+    recibido = plan.groupby(['Referencia', 'Bodega Destino'])['Cant. Sugerida (Editar)'].sum()
+    assert (enviado <= tope['excedente'].reindex(enviado.index).to_numpy()).all()
+    assert (recibido <= tope['necesidad'].reindex(recibido.index).to_numpy()).all()
@@ -0,0 +1,29 @@
+import xmlrpc.client
+
+import utils_data
+from utils_data import SyncTarget, _sincronizar_target
+
+
+def test_solo_se_descarta_el_conector_ante_errores_de_conexion(monkeypatch):
+    conector = object()
+    descartados = []
+    errores = {
+        'stock_por_ubicacion': [xmlrpc.client.Fault(1, "ValueError: Invalid field 'foo'")],  # error de datos
+        'venta_linea': [ConnectionResetError('Connection reset by peer')],                  # conexión caída
+        'producto': [xmlrpc.client.Fault(3, 'Access Denied')],                              # sesión inválida
+    }
+
+    def sincronizar(engine, connector, tabla, spec, empresa_id, modo):
+        if errores.get(tabla):
+            raise errores[tabla].pop(0)
+        return {'tabla': tabla, 'modo': modo, 'filas': 0, 'bajas': 0, 'segundos': 0.0}
+
+    monkeypatch.setattr(utils_data, 'get_connector', lambda *args: conector)
+    monkeypatch.setattr(utils_data, 'descartar_conector', descartados.append)
+    monkeypatch.setattr(utils_data, 'sincronizar_tabla', sincronizar)
+
+    resultado = _sincronizar_target(None, SyncTarget(empresa_id=1), 'incremental', 3, 0, lambda *args: None)
+
+    assert resultado['error'] is None
+    assert [t['intentos'] for t in resultado['tablas']] == [2, 2, 2, 1]
+    assert descartados == [conector, conector]
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# --- PARÁMETROS POR DEFECTO DEL OPTIMIZADOR ---
+DIAS_OBJETIVO = 30    # Cobertura que debe alcanzar cada destino
+DIAS_MAXIMOS = 60     # Cobertura que conserva el origen; lo que exceda es excedente
+CANTIDAD_MINIMA = 1   # No se sugieren traslados menores a esta cantidad
+
+COLUMNAS_PLAN = [
+    'Aprobar', 'Referencia', 'Producto', 'Bodega Origen', 'Bodega Destino',
+    'Stock Origen', 'Stock Destino', 'Venta/Día Origen', 'Venta/Día Destino',
+    'Cobertura Origen (días)', 'Cobertura Destino (días)', 'Cant. Sugerida (Editar)'
+]
+
+
+def plan_traslados(df_stock, df_demanda, origen=None, destino=None, dias_objetivo=DIAS_OBJETIVO,
+                   dias_maximos=DIAS_MAXIMOS, cantidad_minima=CANTIDAD_MINIMA):
+    """
+    Optimizador de traslados basado en demanda por ubicación.
+
+    - df_stock: stock por ubicación con product_id, location_name, stock_real_ubicacion
+      (y name / default_code para mostrar).
+    - df_demanda: product_id, location_name, venta_diaria (ver OdooConnector.get_location_demand).
+
+    Cada par producto-ubicación tiene una cobertura (stock / venta diaria). Lo que supera
+    `dias_maximos` de cobertura es excedente; lo que falta para llegar a `dias_objetivo`
+    es necesidad. Por producto, los excedentes (de mayor a menor) se reparten entre las
+    necesidades (de menor a mayor cobertura) con una asignación voraz de transporte:
+    cada unidad de excedente se asigna una sola vez, así el plan es globalmente consistente.
+    Todo se resuelve con arreglos dispersos (solo pares con stock o demanda) en NumPy.
+    """
+    dias_maximos = max(dias_maximos, dias_objetivo)
+    if df_stock.empty:
+        return pd.DataFrame(columns=COLUMNAS_PLAN)
+
+    stock = df_stock.groupby(['product_id', 'location_name'], observed=True, as_index=False)['stock_real_ubicacion'].sum()
+    demanda = df_demanda[['product_id', 'location_name', 'venta_diaria']] if not df_demanda.empty else \
+        pd.DataFrame(columns=['product_id', 'location_name', 'venta_diaria'])
+    demanda = demanda[demanda['product_id'].isin(stock['product_id'])]
+    pares = pd.merge(stock, demanda, on=['product_id', 'location_name'], how='outer')
+
+    producto = pares['product_id'].to_numpy()
+    ubicacion = pares['location_name'].astype(str).to_numpy()
+    q = pares['stock_real_ubicacion'].fillna(0).to_numpy(dtype=float)
+    vel = pares['venta_diaria'].fillna(0).to_numpy(dtype=float)
+    cobertura = np.full(len(q), np.inf)
+    np.divide(q, vel, out=cobertura, where=vel > 0)
+
+    excedente = np.floor(np.maximum(q - np.ceil(vel * dias_maximos), 0))
+    necesidad = np.ceil(np.maximum(vel * dias_objetivo - q, 0))
+    if origen is not None:
+        excedente[ubicacion != origen] = 0
+    if destino is not None:
+        necesidad[ubicacion != destino] = 0
+
+    # Fuentes: por producto, de mayor a menor excedente. Destinos: por producto, los más urgentes primero
+    src = np.flatnonzero(excedente > 0)
+    dst = np.flatnonzero(necesidad > 0)
+    src = src[np.lexsort((-excedente[src], producto[src]))]
+    dst = dst[np.lexsort((cobertura[dst], producto[dst]))]
+    i_src, i_dst, cantidad = _asignar_por_producto(producto[src], excedente[src], producto[dst], necesidad[dst])
+
+    validos = cantidad >= cantidad_minima
+    o, d, cantidad = src[i_src[validos]], dst[i_dst[validos]], cantidad[validos]
+    if len(cantidad) == 0:
+        return pd.DataFrame(columns=COLUMNAS_PLAN)
+
+    nombres = df_stock.drop_duplicates('product_id').set_index('product_id')
+    plan = pd.DataFrame({
+        'Aprobar': False,
+        'Referencia': nombres['default_code'].reindex(producto[o]).to_numpy(),
+        'Producto': nombres['name'].reindex(producto[o]).to_numpy(),
+        'Bodega Origen': ubicacion[o],
+        'Bodega Destino': ubicacion[d],
+        'Stock Origen': q[o],
+        'Stock Destino': q[d],
+        'Venta/Día Origen': vel[o],
+        'Venta/Día Destino': vel[d],
+        'Cobertura Origen (días)': cobertura[o],
+        'Cobertura Destino (días)': cobertura[d],
+        'Cant. Sugerida (Editar)': cantidad.astype(int),
+    }, columns=COLUMNAS_PLAN)
+    return plan.sort_values(['Cobertura Destino (días)', 'Cant. Sugerida (Editar)'], ascending=[True, False], ignore_index=True)
+
+
+def _asignar_por_producto(prod_src, cant_src, prod_dst, cant_dst):
+    """
+    Asignación "esquina noroeste" vectorizada para todos los productos a la vez.
+    Fuentes y destinos vienen ordenados por producto (y por prioridad dentro de él).
+    Cada producto ocupa un bloque disjunto de una recta; dentro del bloque las fuentes
+    y los destinos son intervalos consecutivos de largo igual a su cantidad. Cada tramo
+    donde se solapan una fuente y un destino es un traslado.
+    Devuelve (índice fuente, índice destino, cantidad).
+    """
+    vacio = np.array([], dtype=int)
+    if len(prod_src) == 0 or len(prod_dst) == 0:
+        return vacio, vacio, np.array([], dtype=float)
+
+    productos = np.union1d(prod_src, prod_dst)
+    ps = np.searchsorted(productos, prod_src)
+    pd_ = np.searchsorted(productos, prod_dst)
+    total_src = np.bincount(ps, weights=cant_src, minlength=len(productos))
+    total_dst = np.bincount(pd_, weights=cant_dst, minlength=len(productos))
+    bloque = np.maximum(total_src, total_dst)
+    base = np.concatenate(([0.0], np.cumsum(bloque)[:-1]))
+
+    fin_src = base[ps] + _cumsum_por_grupo(ps, cant_src)
+    fin_dst = base[pd_] + _cumsum_por_grupo(pd_, cant_dst)
+    ini_src = fin_src - cant_src
+    ini_dst = fin_dst - cant_dst
+
+    cortes = np.unique(np.concatenate((ini_src, fin_src, ini_dst, fin_dst)))
+    medio = (cortes[:-1] + cortes[1:]) / 2
+    largo = np.diff(cortes)
+
+    i = np.minimum(np.searchsorted(fin_src, medio, side='right'), len(fin_src) - 1)
+    j = np.minimum(np.searchsorted(fin_dst, medio, side='right'), len(fin_dst) - 1)
+    solapa = (ini_src[i] <= medio) & (medio < fin_src[i]) & (ini_dst[j] <= medio) & (medio < fin_dst[j])
+    i, j, largo = i[solapa], j[solapa], largo[solapa]
+    if len(largo) == 0:
+        # Ningún producto tiene a la vez excedente y necesidad
+        return vacio, vacio, np.array([], dtype=float)
+
+    # Tramos consecutivos del mismo par fuente-destino se suman en un solo traslado
+    clave = i * len(fin_dst) + j
+    nuevo = np.concatenate(([True], clave[1:] != clave[:-1]))
+    grupo = np.cumsum(nuevo) - 1
+    cantidad = np.bincount(grupo, weights=largo)
+    return i[nuevo], j[nuevo], cantidad
+
+
+def _cumsum_por_grupo(grupo, valores):
+    """Suma acumulada que reinicia en cada grupo (los grupos vienen contiguos)."""
+    acumulado = np.cumsum(valores)
+    inicio = np.concatenate(([True], grupo[1:] != grupo[:-1]))
+    previo = (acumulado - valores)[inicio]
+    return acumulado - previo[np.cumsum(inicio) - 1]
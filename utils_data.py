@@ -1,78 +1,361 @@
+import argparse
+import io
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 import pandas as pd
-from sqlalchemy import create_engine
-from odoo_client import OdooConnector
+from sqlalchemy import create_engine, inspect, text
+from odoo_client import descartar_conector, es_error_de_conexion, get_connector
+from odoo_records import columna_nombre, quitar_false
 
 EMPRESA_ID = 1  # ID de odoo_triunfo
+COPY_CHUNK_ROWS = 100_000  # Filas por bloque de COPY (acota la memoria del buffer CSV)
+CONTROL_TABLE = 'sync_watermark'  # Marcas de agua (write_date / id de Odoo) por tabla y empresa
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "4"))  # Empresas que se sincronizan a la vez
+SYNC_REINTENTOS = 3  # Intentos por tabla ante errores de red / Odoo / Postgres
+SYNC_ESPERA = 5  # Segundos de espera inicial entre reintentos (se duplica en cada uno)
 
-def upload_odoo_data_to_postgres(pg_url):
-    connector = OdooConnector()
-    engine = create_engine(pg_url)
-
-    # STOCK POR UBICACION
-    df_stock = connector.get_stock_data()
-    if not df_stock.empty:
-        df_stock['empresa_id'] = EMPRESA_ID
-        df_stock.rename(columns={
-            'product_name': 'producto_nombre',
-            'quantity': 'cantidad',
-            'value': 'valor',
-            'location_name': 'ubicacion_nombre'
-        }, inplace=True)
-        df_stock.to_sql('stock_por_ubicacion', engine, if_exists='replace', index=False)
-
-    # VENTAS
-    df_sales = connector.get_sales_data()
-    if not df_sales.empty:
-        # Extrae solo el ID de order_id si es lista
-        df_sales['order_id'] = df_sales['order_id'].apply(lambda x: x[0] if isinstance(x, list) else x)
-        df_sales['empresa_id'] = EMPRESA_ID
-        df_sales.rename(columns={
-            'product_name': 'producto_nombre',
-            'date': 'fecha',
-            'qty_sold': 'cantidad_vendida',
-            'revenue': 'subtotal_venta'
-        }, inplace=True)
-        df_sales.to_sql('venta_linea', engine, if_exists='replace', index=False)
-
-    # PRODUCTOS
-    fields_prod = ['name', 'default_code', 'list_price', 'standard_price', 'categ_id']
-    data_prod = connector.models.execute_kw(connector.db, connector.uid, connector.password, 'product.product', 'search_read', [[]], {'fields': fields_prod, 'limit': 5000})
-    df_prod = pd.DataFrame(data_prod)
-    if not df_prod.empty:
-        df_prod['empresa_id'] = EMPRESA_ID
-        # Extrae solo el nombre de la categoría
-        df_prod['categoria'] = df_prod['categ_id'].apply(lambda x: x[1] if isinstance(x, list) and len(x) > 1 else None)
-        df_prod.rename(columns={
-            'name': 'nombre',
-            'default_code': 'codigo_interno',
-            'list_price': 'precio_venta',
-            'standard_price': 'precio_costo',
-            # 'categ_id': 'categoria'  # Ya lo transformaste arriba
-        }, inplace=True)
-        # Elimina la columna categ_id original para evitar problemas
-        df_prod.drop(columns=['categ_id'], inplace=True)
-        df_prod.to_sql('producto', engine, if_exists='replace', index=False)
-
-    # CLIENTES
-    fields_partner = ['name', 'email', 'phone', 'customer_rank']
-    data_partner = connector.models.execute_kw(connector.db, connector.uid, connector.password, 'res.partner', 'search_read', [[['customer_rank', '>', 0]]], {'fields': fields_partner, 'limit': 5000})
-    df_partner = pd.DataFrame(data_partner)
-    if not df_partner.empty:
-        df_partner['empresa_id'] = EMPRESA_ID
-        df_partner.rename(columns={
-            'name': 'nombre',
-            'email': 'correo',
-            'phone': 'telefono',
-            'customer_rank': 'rango_cliente'
-        }, inplace=True)
-        df_partner.to_sql('cliente', engine, if_exists='replace', index=False)
+# --- TABLAS DEL WAREHOUSE ---
+# Cada columna: (columna SQL, campo Odoo, tipo SQL). 'campo.id' / 'campo.name' toman el id
+# o el nombre de un many2one. Todas las tablas llevan además odoo_id, empresa_id (clave
+# primaria compuesta) y odoo_write_date.
+TABLAS = {
+    'stock_por_ubicacion': {
+        'model': 'stock.quant',
+        'domain': [['location_id.usage', '=', 'internal']],
+        'columns': [
+            ('producto_id', 'product_id.id', 'BIGINT'),
+            ('producto_nombre', 'product_id.name', 'TEXT'),
+            ('ubicacion_id', 'location_id.id', 'BIGINT'),
+            ('ubicacion_nombre', 'location_id.name', 'TEXT'),
+            ('cantidad', 'quantity', 'DOUBLE PRECISION'),
+        ],
+        'indexes': ['producto_id'],
+    },
+    'venta_linea': {
+        'model': 'sale.order.line',
+        'domain': [['state', 'in', ['sale', 'done']]],
+        'columns': [
+            ('order_id', 'order_id.id', 'BIGINT'),
+            ('producto_id', 'product_id.id', 'BIGINT'),
+            ('producto_nombre', 'product_id.name', 'TEXT'),
+            ('fecha', 'create_date', 'TIMESTAMP'),
+            ('cantidad_vendida', 'product_uom_qty', 'DOUBLE PRECISION'),
+            ('subtotal_venta', 'price_subtotal', 'DOUBLE PRECISION'),
+        ],
+        'indexes': ['producto_id', 'fecha'],
+    },
+    'producto': {
+        'model': 'product.product',
+        'domain': [],
+        'columns': [
+            ('nombre', 'name', 'TEXT'),
+            ('codigo_interno', 'default_code', 'TEXT'),
+            ('precio_venta', 'list_price', 'DOUBLE PRECISION'),
+            ('precio_costo', 'standard_price', 'DOUBLE PRECISION'),
+            ('categoria', 'categ_id.name', 'TEXT'),
+        ],
+        'indexes': [],
+    },
+    'cliente': {
+        'model': 'res.partner',
+        'domain': [['customer_rank', '>', 0]],
+        'columns': [
+            ('nombre', 'name', 'TEXT'),
+            ('correo', 'email', 'TEXT'),
+            ('telefono', 'phone', 'TEXT'),
+            ('rango_cliente', 'customer_rank', 'INTEGER'),
+        ],
+        'indexes': [],
+    },
+}
 
+
+def _copy_chunks(cur, quote, df, table, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Carga masiva: COPY FROM STDIN (psycopg2 copy_expert) de un DataFrame a una tabla existente
+    (la staging temporal de sincronizar_tabla), por bloques de CSV en memoria.
+    """
+    columnas = ', '.join(quote(str(c)) for c in df.columns)
+    copy_sql = f"COPY {quote(table)} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    for inicio in range(0, len(df), chunk_rows):
+        buffer = io.StringIO()
+        df.iloc[inicio:inicio + chunk_rows].to_csv(buffer, index=False, header=False, na_rep='\\N')
+        buffer.seek(0)
+        cur.copy_expert(copy_sql, buffer)
+
+
+def asegurar_esquema(engine):
+    """
+    Crea (una sola vez) la tabla de control y las tablas del warehouse con su clave
+    primaria (odoo_id, empresa_id) e índices. Las tablas heredadas del modo de reemplazo
+    completo (sin odoo_id) se eliminan: son una copia reproducible de Odoo.
+    """
+    existentes = inspect(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {CONTROL_TABLE} (
+                tabla TEXT NOT NULL,
+                empresa_id INTEGER NOT NULL,
+                last_write_date TIMESTAMP,
+                last_id BIGINT,
+                updated_at TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (tabla, empresa_id)
+            )"""))
+        for tabla, spec in TABLAS.items():
+            if existentes.has_table(tabla) and 'odoo_id' not in {c['name'] for c in existentes.get_columns(tabla)}:
+                conn.execute(text(f"DROP TABLE {tabla}"))
+            columnas = ''.join(f"{col} {tipo}, " for col, _, tipo in spec['columns'])
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {tabla} (odoo_id BIGINT NOT NULL, empresa_id INTEGER NOT NULL, "
+                f"{columnas}odoo_write_date TIMESTAMP, PRIMARY KEY (odoo_id, empresa_id))"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_write_date ON {tabla} (empresa_id, odoo_write_date)"))
+            for col in spec['indexes']:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_{col} ON {tabla} (empresa_id, {col})"))
+
+
+def _leer_watermark(engine, tabla, empresa_id):
+    with engine.connect() as conn:
+        fila = conn.execute(
+            text(f"SELECT last_write_date, last_id FROM {CONTROL_TABLE} WHERE tabla = :t AND empresa_id = :e"),
+            {'t': tabla, 'e': empresa_id},
+        ).fetchone()
+    return fila if fila and fila[0] is not None else None
+
+
+def _extraer(connector, spec, empresa_id, watermark=None):
+    """Lee de Odoo la tabla completa o, con marca de agua, solo lo nuevo o modificado."""
+    campos = sorted({campo.split('.')[0] for _, campo, _ in spec['columns']} | {'write_date'})
+    domain = list(spec['domain'])
+    if watermark is not None:
+        desde = pd.Timestamp(watermark[0]).strftime('%Y-%m-%d %H:%M:%S')
+        domain = ['|', ['write_date', '>=', desde], ['id', '>', int(watermark[1])]] + domain
+    raw = connector.fetch_frame(spec['model'], domain, campos)
+
+    df = pd.DataFrame({'odoo_id': raw['id'] if not raw.empty else pd.Series(dtype='int64'), 'empresa_id': empresa_id})
+    for col, campo, tipo in spec['columns']:
+        base, _, attr = campo.partition('.')
+        # fetch_frame ya separa los many2one: ids en `<base>` y nombres en columna_nombre(base)
+        origen = columna_nombre(base, campos + ['id']) if attr == 'name' else base
+        serie = raw[origen] if not raw.empty else pd.Series(dtype=object)
+        if attr == 'id':
+            serie = serie.astype('Int64')
+        elif attr != 'name':
+            # Odoo usa False como nulo en campos no booleanos
+            serie = quitar_false(serie)
+        if tipo == 'TIMESTAMP':
+            serie = pd.to_datetime(serie)
+        df[col] = serie
+    df['odoo_write_date'] = pd.to_datetime(raw['write_date']) if not raw.empty else pd.Series(dtype='datetime64[ns]')
+    return df
+
+
+def sincronizar_tabla(engine, connector, tabla, spec, empresa_id=EMPRESA_ID, modo='incremental'):
+    """
+    Sincroniza una tabla del warehouse para una empresa.
+    - modo 'full' (o sin marca de agua previa): reemplaza todas las filas de la empresa. Las
+      tablas son compartidas por varias empresas, así que no se cambia la tabla entera por
+      una nueva (swap): se borra y reinserta solo la empresa desde la staging.
+    - modo 'incremental': trae de Odoo solo lo nuevo/modificado desde la marca de agua y lo
+      aplica con INSERT ... ON CONFLICT DO UPDATE; los registros borrados en Odoo se
+      eliminan comparando contra un `search` de ids (barato).
+    Las filas llegan por COPY a una staging temporal y todo se aplica en una sola
+    transacción: los lectores ven la versión anterior completa hasta el commit. Devuelve un resumen con filas, bajas y tiempo.
+    """
+    inicio = time.time()
+    watermark = _leer_watermark(engine, tabla, empresa_id) if modo == 'incremental' else None
+    modo = 'incremental' if watermark is not None else 'full'
+    df = _extraer(connector, spec, empresa_id, watermark)
+    ids_vigentes = connector.execute_kw(spec['model'], 'search', [spec['domain']]) if modo == 'incremental' else None
+
+    quote = engine.dialect.identifier_preparer.quote
+    columnas = ['odoo_id', 'empresa_id'] + [col for col, _, _ in spec['columns']] + ['odoo_write_date']
+    lista = ', '.join(columnas)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.execute(f"CREATE TEMP TABLE stg_{tabla} (LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DROP")
+            _copy_chunks(cur, quote, df[columnas], f"stg_{tabla}")
+            bajas = 0
+            if modo == 'full':
+                cur.execute(f"DELETE FROM {tabla} WHERE empresa_id = %s", (empresa_id,))
+                cur.execute(f"INSERT INTO {tabla} ({lista}) SELECT {lista} FROM stg_{tabla}")
+            else:
+                actualizar = ', '.join(f"{c} = EXCLUDED.{c}" for c in columnas[2:])
+                cur.execute(
+                    f"INSERT INTO {tabla} ({lista}) SELECT {lista} FROM stg_{tabla} "
+                    f"ON CONFLICT (odoo_id, empresa_id) DO UPDATE SET {actualizar}"
+                )
+                cur.execute(f"CREATE TEMP TABLE ids_{tabla} (odoo_id BIGINT PRIMARY KEY) ON COMMIT DROP")
+                _copy_chunks(cur, quote, pd.DataFrame({'odoo_id': ids_vigentes}, dtype='int64'), f"ids_{tabla}")
+                cur.execute(
+                    f"DELETE FROM {tabla} t WHERE t.empresa_id = %s "
+                    f"AND NOT EXISTS (SELECT 1 FROM ids_{tabla} i WHERE i.odoo_id = t.odoo_id)",
+                    (empresa_id,),
+                )
+                bajas = cur.rowcount
+            # Nueva marca de agua a partir de lo que quedó en la tabla
+            cur.execute(
+                f"INSERT INTO {CONTROL_TABLE} (tabla, empresa_id, last_write_date, last_id, updated_at) "
+                f"SELECT %s, %s, max(odoo_write_date), max(odoo_id), now() FROM {tabla} WHERE empresa_id = %s "
+                f"ON CONFLICT (tabla, empresa_id) DO UPDATE SET last_write_date = EXCLUDED.last_write_date, "
+                f"last_id = EXCLUDED.last_id, updated_at = EXCLUDED.updated_at",
+                (tabla, empresa_id, empresa_id),
+            )
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return {'tabla': tabla, 'modo': modo, 'filas': len(df), 'bajas': bajas, 'segundos': round(time.time() - inicio, 2)}
+
+
+@dataclass
+class SyncTarget:
+    """
+    Una empresa a sincronizar: credenciales de Odoo (None = variables de entorno),
+    company_id de Odoo (None = las compañías por defecto del usuario) y empresa_id
+    con el que se guardan sus filas en el warehouse.
+    """
+    empresa_id: int
+    company_id: int = None
+    url: str = None
+    db: str = None
+    username: str = None
+    password: str = None
+    nombre: str = ''
+
+    @property
+    def etiqueta(self):
+        return self.nombre or f"empresa {self.empresa_id}"
+
+
+def _imprimir_progreso(target, evento, detalle):
+    """Callback de progreso por defecto: una línea por tabla / empresa."""
+    if evento == 'tabla':
+        print(f"   [{target.etiqueta}] {detalle['tabla']}: {detalle['filas']} filas ({detalle['modo']}), "
+              f"{detalle['bajas']} bajas, {detalle['segundos']} s")
+    elif evento == 'reintento':
+        print(f"   [{target.etiqueta}] {detalle['tabla']}: intento {detalle['intento']} falló ({detalle['error']}); "
+              f"reintentando en {detalle['espera']} s")
+    elif evento == 'fin':
+        estado = '✅' if detalle['ok'] else '❌'
+        print(f"{estado} [{target.etiqueta}] terminada en {detalle['segundos']} s")
+
+
+def _conectar(target):
+    """Conector compartido de las credenciales de la empresa y su vista restringida a la compañía."""
+    odoo = get_connector(target.url, target.db, target.username, target.password)
+    return odoo, (odoo.with_company(target.company_id) if target.company_id is not None else odoo)
+
+
+def _sincronizar_target(engine, target, modo, reintentos, espera, on_progress):
+    """
+    Sincroniza todas las tablas de una empresa, reintentando cada tabla por separado.
+    El conector se pide en cada intento: si un intento falla por la conexión o la sesión
+    (ver es_error_de_conexion) se saca del registro, así el siguiente (o la próxima empresa
+    con las mismas credenciales) reconecta en lugar de reutilizar una conexión rota. Un
+    error de datos o de Postgres se reintenta con el mismo conector.
+    """
+    inicio = time.time()
+    resultado = {'empresa_id': target.empresa_id, 'nombre': target.etiqueta, 'tablas': [], 'error': None}
+    try:
+        for tabla, spec in TABLAS.items():
+            for intento in range(1, reintentos + 1):
+                odoo = None
+                try:
+                    odoo, connector = _conectar(target)
+                    resumen = sincronizar_tabla(engine, connector, tabla, spec, target.empresa_id, modo)
+                    break
+                except Exception as e:
+                    if odoo is not None and es_error_de_conexion(e):
+                        descartar_conector(odoo)
+                    if intento == reintentos:
+                        raise
+                    pausa = espera * 2 ** (intento - 1)
+                    on_progress(target, 'reintento', {'tabla': tabla, 'intento': intento, 'error': e, 'espera': pausa})
+                    time.sleep(pausa)
+            resumen['intentos'] = intento
+            resultado['tablas'].append(resumen)
+            on_progress(target, 'tabla', resumen)
+    except Exception as e:
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    resultado['segundos'] = round(time.time() - inicio, 2)
+    on_progress(target, 'fin', {'ok': resultado['error'] is None, 'segundos': resultado['segundos']})
+    return resultado
+
+
+def sync_targets(pg_url, targets, modo='incremental', max_workers=SYNC_WORKERS,
+                 reintentos=SYNC_REINTENTOS, espera=SYNC_ESPERA, on_progress=None):
+    """
+    Sincroniza varias empresas/bases de Odoo a la vez en las tablas compartidas del warehouse.
+    Cada empresa corre en su propio hilo (la espera es de red: Odoo y Postgres), con sus
+    tablas en serie y reintentos con espera exponencial por tabla. Todas comparten un único
+    engine de SQLAlchemy con pool dimensionado para los hilos, así el tiempo total queda
+    acotado por la empresa más lenta y no por la suma. Un fallo en una empresa no detiene
+    a las demás: queda registrado en su resultado.
+    Devuelve una lista de resultados por empresa (tablas, tiempos, error).
+    """
+    targets = list(targets)
+    on_progress = on_progress or _imprimir_progreso
+    if not targets:
+        return []
+    workers = max(1, min(max_workers, len(targets)))
+    engine = create_engine(pg_url, pool_size=workers, max_overflow=workers, pool_pre_ping=True)
+    try:
+        asegurar_esquema(engine)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futuros = {
+                executor.submit(_sincronizar_target, engine, target, modo, reintentos, espera, on_progress): n
+                for n, target in enumerate(targets)
+            }
+            resultados = [None] * len(targets)
+            for futuro in as_completed(futuros):
+                resultados[futuros[futuro]] = futuro.result()
+    finally:
+        engine.dispose()
+    return resultados
+
+
+def cargar_targets(path):
+    """Lee la lista de empresas de un JSON: [{"empresa_id": 1, "company_id": 1, "db": ..., ...}, ...]."""
+    with open(path, encoding='utf-8') as f:
+        return [SyncTarget(**t) for t in json.load(f)]
+
+
+def upload_odoo_data_to_postgres(pg_url, modo='incremental'):
+    """
+    Sincroniza stock, ventas, productos y clientes de Odoo en PostgreSQL.
+    Por defecto es incremental (solo viaja lo que cambió desde la última corrida);
+    modo='full' fuerza la recarga completa de la empresa.
+    Atajo de sync_targets para la empresa de las variables de entorno.
+    """
+    resultado = sync_targets(pg_url, [SyncTarget(empresa_id=EMPRESA_ID)], modo)[0]
+    if resultado['error']:
+        raise RuntimeError(resultado['error'])
     print("✅ Datos subidos a PostgreSQL correctamente.")
 
-# Ejemplo de uso:
-pg_url = (
-    f"postgresql://{os.getenv('PG_USER')}:{os.getenv('PG_PASSWORD')}"
-    f"@{os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}"
-)
-upload_odoo_data_to_postgres(pg_url)
\ No newline at end of file
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sincroniza Odoo con el warehouse PostgreSQL.")
+    parser.add_argument('--targets', help="JSON con la lista de empresas (sin él: la empresa del entorno)")
+    parser.add_argument('--modo', choices=['incremental', 'full'], default='incremental')
+    parser.add_argument('--workers', type=int, default=SYNC_WORKERS)
+    args = parser.parse_args()
+
+    pg_url = (
+        f"postgresql://{os.getenv('PG_USER')}:{os.getenv('PG_PASSWORD')}"
+        f"@{os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}"
+    )
+    if args.targets:
+        inicio = time.time()
+        resultados = sync_targets(pg_url, cargar_targets(args.targets), args.modo, args.workers)
+        fallidas = [r['nombre'] for r in resultados if r['error']]
+        print(f"⏱ {len(resultados)} empresas en {time.time() - inicio:.1f} s"
+              + (f" — con errores: {', '.join(fallidas)}" if fallidas else ""))
+    else:
+        upload_odoo_data_to_postgres(pg_url, args.modo)